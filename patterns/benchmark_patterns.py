@@ -0,0 +1,241 @@
+# patterns/benchmark_patterns.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 非交互式图案性能基准：无窗口下按多种分辨率运行每个图案，
+# 记录 update / draw_basic_elements / apply_effects 的 p50/p95/p99 耗时，
+# 输出JSON报告，并可与基线报告比较，出现性能回退时以非零状态退出。
+# 加压选项（如 --star-formation）在创建图案后调用图案的规模设置方法，测试远大于缺省节目的规模
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# 添加当前目录到Python路径，确保可以导入其他图案
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from render_engine import HeadlessRenderEngine, discover_pattern_names, init_headless_display, load_pattern_class
+
+STAGES = ('update', 'draw_basic_elements', 'apply_effects')
+DEFAULT_RESOLUTIONS = ('800x500', '1200x750', '1920x1080')
+
+
+def parse_resolution(text):
+    """把 "1200x750" 解析为 (1200, 750)"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def summarize(samples):
+    """耗时样本（秒）-> 毫秒统计"""
+    if not samples:
+        return None
+    values = np.array(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': len(samples),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(values.max()),
+    }
+
+
+def _instrument(pattern, samples):
+    """在图案实例上包装各阶段方法，记录每次调用耗时"""
+    perf_counter = time.perf_counter
+
+    for stage in STAGES:
+        method = getattr(pattern, stage)
+        stage_samples = samples.setdefault(stage, [])
+
+        def timed(*args, _method=method, _samples=stage_samples, **kwargs):
+            start = perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                _samples.append(perf_counter() - start)
+
+        setattr(pattern, stage, timed)
+
+
+def benchmark_pattern(pattern_name, width, height, frames=300, warmup=30, fps=60, debug_mode=False, setup=None):
+    """运行一个图案并返回各阶段统计（预热帧不计入）
+
+    setup: {方法名: 参数}，创建图案后依次调用，如 {'setup_formation': 100}
+    """
+    engine = HeadlessRenderEngine(load_pattern_class(pattern_name), width, height, fps, debug_mode)
+    pattern = engine.create_pattern()
+    for method_name, value in (setup or {}).items():
+        getattr(pattern, method_name)(value)
+
+    samples = {}
+    _instrument(pattern, samples)
+    frame_samples = []
+
+    rendered = 0
+    while rendered < warmup + frames:
+        start = time.perf_counter()
+        keep_running = engine.render_frame()
+        frame_time = time.perf_counter() - start
+
+        rendered += 1
+        if rendered == warmup:
+            # 预热结束（精灵缓存、表面池已就绪），丢弃之前的样本
+            for stage_samples in samples.values():
+                stage_samples.clear()
+        elif rendered > warmup:
+            frame_samples.append(frame_time)
+
+        if not keep_running:
+            break
+
+    result = {stage: summarize(samples.get(stage, [])) for stage in STAGES}
+    result['frame'] = summarize(frame_samples)
+    # 图案在建议时长结束时停止，实际计时帧数可能少于 frames；比较基线时据此判断样本数是否相同
+    result['frames_timed'] = len(frame_samples)
+    return result
+
+
+def run_benchmarks(pattern_names, resolutions, frames=300, warmup=30, fps=60, debug_mode=False, setups=None):
+    """运行全部基准，返回报告字典
+
+    setups: {图案模块名: {方法名: 参数}}，加压的用例在键名里注明，不会和缺省规模的基线混在一起比较
+    """
+    pygame = init_headless_display()
+    setups = setups or {}
+
+    results = {}
+    for pattern_name in pattern_names:
+        setup = setups.get(pattern_name)
+        label = pattern_name
+        if setup:
+            label += "[" + ",".join(f"{name}={value}" for name, value in setup.items()) + "]"
+        for width, height in resolutions:
+            key = f"{label}@{width}x{height}"
+            try:
+                results[key] = benchmark_pattern(pattern_name, width, height, frames, warmup, fps, debug_mode,
+                                                 setup)
+            except Exception as e:
+                print(f"基准测试 {key} 失败: {e}")
+                continue
+
+            frame = results[key]['frame']
+            if frame is not None:
+                print(f"{key}: {frame['count']} 帧, p50 {frame['p50_ms']:.2f}ms, "
+                      f"p95 {frame['p95_ms']:.2f}ms, p99 {frame['p99_ms']:.2f}ms")
+            if results[key]['frames_timed'] < frames:
+                print(f"  警告: 图案提前结束，只计时了 {results[key]['frames_timed']} 帧（要求 {frames} 帧）")
+
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'frames': frames,
+            'warmup': warmup,
+            'fps': fps,
+            'debug_mode': debug_mode,
+            'setups': setups,
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def compare_reports(report, baseline, threshold=0.15, metric='p95_ms', min_delta_ms=0.05):
+    """与基线比较，返回回退列表 [(键, 阶段, 基线毫秒, 当前毫秒)]
+
+    同时超过相对阈值和绝对阈值（过滤亚毫秒阶段的计时噪声）才算回退
+    """
+    regressions = []
+    for key, stages in report['results'].items():
+        base_stages = baseline.get('results', {}).get(key)
+        if base_stages is None:
+            continue
+
+        for stage in STAGES + ('frame',):
+            stats, base_stats = stages.get(stage), base_stages.get(stage)
+            if stats is None or base_stats is None:
+                continue
+
+            current, previous = stats[metric], base_stats[metric]
+            if current > previous * (1 + threshold) and current - previous > min_delta_ms:
+                regressions.append((key, stage, previous, current))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图案性能基准测试（无窗口，JSON报告，基线比较）")
+    parser.add_argument("patterns", nargs="*", help="图案模块名，如 pattern_stars；缺省为全部图案")
+    parser.add_argument("--resolutions", nargs="+", default=list(DEFAULT_RESOLUTIONS),
+                        help="分辨率列表，如 800x500 1920x1080")
+    parser.add_argument("--frames", type=int, default=300, help="每个用例计时的帧数")
+    parser.add_argument("--warmup", type=int, default=30, help="不计时的预热帧数")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--debug", action="store_true", help="使用调试模式绘制")
+    parser.add_argument("--star-formation", type=int, default=None, metavar="N",
+                        help="pattern_star 排成N颗星的编队（setup_formation）")
+    parser.add_argument("--circle-interval", type=float, default=None, metavar="SECONDS",
+                        help="pattern_circle 的圆圈生成间隔（set_spawn_interval），如 0.0167 为每帧一个")
+    parser.add_argument("--neon-beams", type=int, default=None, metavar="N",
+                        help="pattern_neon 使用N道探照灯光束（setup_beams）")
+    parser.add_argument("--output", default="benchmark_report.json", help="JSON报告输出路径")
+    parser.add_argument("--baseline", help="基线JSON报告，给出时进行回退比较")
+    parser.add_argument("--threshold", type=float, default=0.15, help="允许的相对回退比例")
+    parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    args = parser.parse_args()
+
+    pattern_names = args.patterns or discover_pattern_names()
+    resolutions = [parse_resolution(text) for text in args.resolutions]
+    setups = {}
+    if args.star_formation:
+        setups['pattern_star'] = {'setup_formation': args.star_formation}
+    if args.circle_interval:
+        setups['pattern_circle'] = {'set_spawn_interval': args.circle_interval}
+    if args.neon_beams:
+        setups['pattern_neon'] = {'setup_beams': args.neon_beams}
+
+    print("开始图案性能基准测试...")
+    print("=" * 50)
+    report = run_benchmarks(pattern_names, resolutions, args.frames, args.warmup, args.fps, args.debug, setups)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已写入: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        regressions = compare_reports(report, baseline, args.threshold, args.metric)
+        print("=" * 50)
+        for key, result in report['results'].items():
+            base_result = baseline.get('results', {}).get(key)
+            if base_result is not None and base_result.get('frames_timed') != result['frames_timed']:
+                print(f"警告: {key} 计时帧数 {result['frames_timed']} 与基线 {base_result.get('frames_timed')} 不同，"
+                      f"比较结果仅供参考")
+        if regressions:
+            print(f"发现 {len(regressions)} 项性能回退 ({args.metric}, 阈值 {args.threshold:.0%}):")
+            for key, stage, previous, current in regressions:
+                print(f"  {key} {stage}: {previous:.3f}ms -> {current:.3f}ms "
+                      f"(+{(current / previous - 1) if previous else float('inf'):.0%})")
+            return 1
+        print("未发现性能回退")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
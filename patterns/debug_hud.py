@@ -0,0 +1,148 @@
+# patterns/debug_hud.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 调试信息层：进程级字体缓存 + 渲染文字缓存，静态标签只渲染一次，
+# 只有变化的数值才重新渲染；同时显示各阶段（更新、基础绘制、特效、合成）耗时，
+# 避免打开调试模式本身改变我们要调试的性能
+
+import functools
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pygame
+
+FONT_PATH = "C:/Windows/Fonts/simhei.ttf"
+
+_font_cache = {}
+
+
+def get_font(size=16, fallback_size=None):
+    """获取支持中文的字体（进程内只从磁盘加载一次）"""
+    key = (size, fallback_size)
+    font = _font_cache.get(key)
+    if font is None:
+        try:
+            # 使用系统中文字体
+            font = pygame.font.Font(FONT_PATH, size)
+        except:
+            # 备用方案
+            font = pygame.font.Font(None, fallback_size or size)
+        _font_cache[key] = font
+    return font
+
+
+class TextCache:
+    """渲染文字缓存 - 按 (文字, 字号, 颜色) 做LRU"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._texts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, size=16, color=(255, 255, 255), fallback_size=None):
+        """获取渲染好的文字表面"""
+        key = (text, size, color, fallback_size)
+        rendered = self._texts.get(key)
+        if rendered is not None:
+            self._texts.move_to_end(key)
+            self.hits += 1
+            return rendered
+
+        self.misses += 1
+        rendered = get_font(size, fallback_size).render(text, True, color)
+        self._texts[key] = rendered
+        if len(self._texts) > self.max_entries:
+            self._texts.popitem(last=False)
+        return rendered
+
+
+_shared_text_cache = None
+
+
+def timed_stage(stage_name):
+    """方法装饰器：图案处于调试模式时把每次调用的耗时记到 self.hud
+
+    在类上装饰而不是逐实例包装，关闭调试模式时只多一次属性检查，也不会形成引用环
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def timed(self, *args, **kwargs):
+            if not self.debug_mode:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.hud.record_stage(stage_name, time.perf_counter() - start)
+        return timed
+    return decorate
+
+
+def get_shared_text_cache():
+    """获取所有图案共享的文字缓存"""
+    global _shared_text_cache
+    if _shared_text_cache is None:
+        _shared_text_cache = TextCache()
+    return _shared_text_cache
+
+
+class DebugHud:
+    """调试信息层"""
+
+    def __init__(self, font_size=16, line_height=25, color=(255, 255, 255), fallback_size=None):
+        self.font_size = font_size
+        self.line_height = line_height
+        self.color = color
+        self.fallback_size = fallback_size
+        self.text_cache = get_shared_text_cache()
+
+        # 各阶段耗时（秒，指数平滑），按首次记录的顺序显示
+        self.stage_times = OrderedDict()
+        self.smoothing = 0.1
+
+    def record_stage(self, name, seconds):
+        """记录一个阶段的耗时"""
+        previous = self.stage_times.get(name)
+        if previous is None:
+            self.stage_times[name] = seconds
+        else:
+            self.stage_times[name] = previous + (seconds - previous) * self.smoothing
+
+    @contextmanager
+    def stage(self, name):
+        """计时上下文：with hud.stage("特效"): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    def stage_lines(self):
+        """各阶段耗时的显示行"""
+        lines = []
+        if self.stage_times:
+            lines.append("--- 各阶段耗时 ---")
+            for name, seconds in self.stage_times.items():
+                lines.append((f"{name}: ", f"{seconds * 1000:.2f}ms"))
+        return lines
+
+    def draw_lines(self, surface, lines, pos=(10, 10), line_height=None, font_size=None):
+        """绘制多行信息
+
+        每行可以是字符串，或 (标签, 数值) 元组：标签不变所以总能命中缓存，
+        只有数值变化时才重新渲染
+        """
+        line_height = line_height or self.line_height
+        font_size = font_size or self.font_size
+        x, y = pos
+
+        for i, line in enumerate(lines):
+            parts = (line,) if isinstance(line, str) else line
+            part_x = x
+            for part in parts:
+                text = self.text_cache.render(part, font_size, self.color, self.fallback_size)
+                surface.blit(text, (part_x, y + i * line_height))
+                part_x += text.get_width()
\ No newline at end of file
@@ -0,0 +1,43 @@
+# patterns/dirty_rects.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 脏矩形工具：图案在 draw_basic_elements 中把每次绘制返回的矩形记录到
+# self.dirty_rects，复合图案只对这些区域做清除、加权与混合
+
+import pygame
+
+
+def merge_dirty_rects(rects, bounds=None, max_rects=32):
+    """合并重叠的脏矩形，返回互不重叠的矩形列表
+
+    矩形数量超过max_rects时直接返回它们的外包矩形，避免合并本身成为瓶颈
+    """
+    clipped = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        if bounds is not None:
+            rect = rect.clip(bounds)
+        if rect.width > 0 and rect.height > 0:
+            clipped.append(rect)
+
+    if len(clipped) > max_rects:
+        return [clipped[0].unionall(clipped[1:])]
+
+    # 反复合并相交的矩形，直到互不相交（保证每个像素只被加权、混合一次）
+    merged = clipped
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for rect in merged:
+            for other in result:
+                if other.colliderect(rect):
+                    other.union_ip(rect)
+                    changed = True
+                    break
+            else:
+                result.append(rect)
+        merged = result
+
+    return merged
\ No newline at end of file
@@ -0,0 +1,352 @@
+# patterns/frame_cache.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 烘焙帧缓存：把一段图案的渲染结果压缩存放在内存里，排练时循环回放只需解码和blit，
+# 不再重新模拟和光栅化。每帧与上一帧做XOR差分（相邻帧大部分像素相同，差分几乎全零），
+# 再用快速压缩（有lz4时用lz4，否则用zlib最快档）；定期插入关键帧以便随机定位。
+# 多个片段按内存预算做LRU淘汰
+
+import argparse
+import os
+import sys
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# 添加当前目录到Python路径，确保可以导入其他图案
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from debug_hud import DebugHud
+
+
+def _compress(data, codec):
+    if codec == 'lz4':
+        return lz4_frame.compress(data)
+    return zlib.compress(data, 1)
+
+
+def _decompress(blob, codec):
+    if codec == 'lz4':
+        return lz4_frame.decompress(blob)
+    return zlib.decompress(blob)
+
+
+class BakedSegment:
+    """一段烘焙好的帧（RGB24，XOR差分 + 压缩）"""
+
+    def __init__(self, size, fps=60, keyframe_interval=60, codec=None):
+        self.size = (int(size[0]), int(size[1]))
+        self.fps = fps
+        self.keyframe_interval = keyframe_interval
+        self.codec = codec or ('lz4' if lz4_frame is not None else 'zlib')
+        self.frames = []  # 每帧压缩后的字节；关键帧存原始像素，其余存与上一帧的XOR
+        self.nbytes = 0
+        self._previous = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def frame_bytes(self):
+        """单帧未压缩字节数"""
+        return self.size[0] * self.size[1] * 3
+
+    @property
+    def compression_ratio(self):
+        return len(self) * self.frame_bytes / self.nbytes if self.nbytes else 0.0
+
+    def is_keyframe(self, index):
+        return index % self.keyframe_interval == 0
+
+    def append_surface(self, surface):
+        """追加一帧"""
+        self.append_bytes(pygame.image.tostring(surface, 'RGB'))
+
+    def append_bytes(self, data):
+        current = np.frombuffer(data, dtype=np.uint8)
+        if self.is_keyframe(len(self.frames)):
+            payload = data
+        else:
+            payload = np.bitwise_xor(current, self._previous).tobytes()
+
+        blob = _compress(payload, self.codec)
+        self.frames.append(blob)
+        self.nbytes += len(blob)
+        self._previous = current
+
+    def finish(self):
+        """烘焙结束，释放编码用的上一帧"""
+        self._previous = None
+        return self
+
+
+class SegmentPlayer:
+    """片段回放器 - 维护解码状态，顺序播放时每帧只解一次差分"""
+
+    def __init__(self, segment):
+        self.segment = segment
+        self.buffer = np.zeros(segment.frame_bytes, dtype=np.uint8)
+        # 表面直接引用解码缓冲区，解码后无需再拷贝
+        self.surface = pygame.image.frombuffer(self.buffer, segment.size, 'RGB')
+        self.index = -1
+
+    def _apply(self, index):
+        data = np.frombuffer(_decompress(self.segment.frames[index], self.segment.codec), dtype=np.uint8)
+        if self.segment.is_keyframe(index):
+            self.buffer[:] = data
+        else:
+            np.bitwise_xor(self.buffer, data, out=self.buffer)
+        self.index = index
+
+    def seek(self, index):
+        """解码到第index帧，返回帧表面"""
+        index %= len(self.segment)
+        if index != self.index:
+            if index < self.index or self.index < 0 or index - self.index > self.segment.keyframe_interval:
+                # 回退或跨度较大时，从不晚于index的最近关键帧开始
+                start = index - index % self.segment.keyframe_interval
+            else:
+                start = self.index + 1
+            for i in range(start, index + 1):
+                self._apply(i)
+        return self.surface
+
+    def draw(self, target, index, pos=(0, 0)):
+        """把第index帧绘制到target"""
+        return target.blit(self.seek(index), pos)
+
+
+class FrameCache:
+    """多片段烘焙帧缓存 - 按压缩后字节数做LRU淘汰"""
+
+    def __init__(self, memory_budget=256 * 1024 * 1024):
+        self.memory_budget = memory_budget
+        self._segments = OrderedDict()
+        self.memory_used = 0
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._segments
+
+    def get(self, key):
+        """获取已烘焙的片段，没有时返回None"""
+        segment = self._segments.get(key)
+        if segment is None:
+            self.misses += 1
+            return None
+        self._segments.move_to_end(key)
+        self.hits += 1
+        return segment
+
+    def put(self, key, segment):
+        """放入片段并按预算淘汰最久未用的片段（至少保留刚放入的片段）"""
+        old = self._segments.pop(key, None)
+        if old is not None:
+            self.memory_used -= old.nbytes
+
+        self._segments[key] = segment
+        self.memory_used += segment.nbytes
+
+        while self.memory_used > self.memory_budget and len(self._segments) > 1:
+            _, evicted = self._segments.popitem(last=False)
+            self.memory_used -= evicted.nbytes
+            self.evictions += 1
+        return segment
+
+    def get_or_bake(self, key, engine, frame_count, start_frame=0, keyframe_interval=60):
+        """命中直接返回，否则用离屏渲染引擎烘焙后放入缓存"""
+        segment = self.get(key)
+        if segment is None:
+            segment = bake_segment(engine, frame_count, start_frame, keyframe_interval)
+            self.put(key, segment)
+        return segment
+
+    def clear(self):
+        self._segments.clear()
+        self.memory_used = 0
+
+    def stats(self):
+        """返回缓存统计信息"""
+        raw_bytes = sum(len(segment) * segment.frame_bytes for segment in self._segments.values())
+        return {
+            'segments': len(self._segments),
+            'frames': sum(len(segment) for segment in self._segments.values()),
+            'memory_used': self.memory_used,
+            'memory_budget': self.memory_budget,
+            'compression_ratio': raw_bytes / self.memory_used if self.memory_used else 0.0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+def bake_segment(engine, frame_count, start_frame=0, keyframe_interval=60):
+    """用离屏渲染引擎（HeadlessRenderEngine）烘焙 [start_frame, start_frame + frame_count)
+
+    start_frame 从节目开头算起：引擎已经越过段首时（复用的引擎）从头重新模拟，
+    否则从引擎当前位置快进，同一个片段无论何时烘焙结果都相同
+    """
+    if engine.pattern is None or engine.clock.tick_count > start_frame:
+        engine.reset()
+
+    for _ in range(start_frame - engine.clock.tick_count):
+        if not engine.advance():
+            break
+
+    segment = BakedSegment((engine.width, engine.height), engine.fps, keyframe_interval)
+    for _ in range(frame_count):
+        keep_running = engine.render_frame()
+        segment.append_surface(engine.target_surface)
+        if not keep_running:
+            break
+    return segment.finish()
+
+
+class BakedPattern:
+    """烘焙片段的回放图案 - 接口与普通图案一致，可以直接替代原图案循环播放"""
+
+    def __init__(self, width, height, debug_mode=False, segment=None, loops=None):
+        self.width = width
+        self.height = height
+        self.debug_mode = debug_mode
+        self.segment = segment
+        self.loops = loops  # None 表示无限循环
+        self.frame_count = 0
+        self.running = True
+        self.player = SegmentPlayer(segment)
+
+        # 调试信息层（字体和文字缓存）
+        self.hud = DebugHud(font_size=16, line_height=25)
+
+    def initialize(self):
+        """初始化"""
+        self.frame_count = 0
+        print(f"烘焙片段回放初始化完成，共 {len(self.segment)} 帧")
+
+    def update(self, dt):
+        """推进一帧"""
+        self.frame_count += 1
+        return self.should_continue()
+
+    def _draw_frame(self, surface):
+        # 烘焙的第0帧是第一次update之后画的，与实时渲染保持相同的对应关系
+        frame = self.player.seek(self.frame_count - 1)
+        if frame.get_size() != surface.get_size():
+            frame = pygame.transform.scale(frame, surface.get_size())
+        surface.blit(frame, (0, 0))
+
+    def draw_final(self, surface):
+        """被调用模式下的最终绘制：解码并blit"""
+        with self.hud.stage("解码"):
+            self._draw_frame(surface)
+
+    def draw_debug(self, surface):
+        """调试模式下的绘制"""
+        if not self.debug_mode:
+            return
+        self.draw_final(surface)
+        self._draw_debug_info(surface)
+
+    def _draw_debug_info(self, surface):
+        """绘制调试信息"""
+        info_lines = [
+            "图案: Baked",
+            ("帧数: ", f"{self.frame_count}"),
+            ("片段帧: ", f"{(self.frame_count - 1) % len(self.segment)}/{len(self.segment)}"),
+            ("压缩比: ", f"{self.segment.compression_ratio:.1f}x ({self.segment.codec})"),
+        ]
+        self.hud.draw_lines(surface, info_lines + self.hud.stage_lines(), (10, 10))
+
+    def get_duration(self):
+        """返回图案建议持续时间"""
+        if self.loops is None:
+            return float('inf')
+        return len(self.segment) * self.loops / self.segment.fps
+
+    def should_continue(self):
+        """判断是否应该继续运行"""
+        if not self.running:
+            return False
+        return self.loops is None or self.frame_count < len(self.segment) * self.loops
+
+    def stop(self):
+        """停止图案运行"""
+        self.running = False
+
+
+def main():
+    from render_engine import HeadlessRenderEngine, init_headless_display, load_pattern_class
+
+    parser = argparse.ArgumentParser(description="烘焙图案片段并对比循环回放与实时渲染的开销")
+    parser.add_argument("pattern", help="图案模块名，如 pattern_composite")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=750)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=int, default=0, help="片段起始帧")
+    parser.add_argument("--frames", type=int, default=300, help="片段帧数")
+    parser.add_argument("--loops", type=int, default=3, help="回放循环次数")
+    parser.add_argument("--keyframe-interval", type=int, default=60)
+    parser.add_argument("--budget-mb", type=int, default=256, help="缓存内存预算(MB)")
+    parser.add_argument("--verify", action="store_true",
+                        help="用同一引擎烘焙另一片段把它挤出缓存后再烘焙一次，检查与首次烘焙逐字节一致")
+    args = parser.parse_args()
+
+    pygame_module = init_headless_display()
+    engine = HeadlessRenderEngine(load_pattern_class(args.pattern), args.width, args.height, args.fps,
+                                  pattern_kwargs={'seed': args.seed})
+    cache = FrameCache(args.budget_mb * 1024 * 1024)
+    key = (args.pattern, args.seed, args.start, args.frames, args.width, args.height)
+
+    start = time.perf_counter()
+    segment = cache.get_or_bake(key, engine, args.frames, args.start, args.keyframe_interval)
+    bake_time = time.perf_counter() - start
+
+    baked = BakedPattern(args.width, args.height, segment=segment, loops=args.loops)
+    baked.initialize()
+    target = pygame_module.Surface((args.width, args.height))
+    start = time.perf_counter()
+    while baked.should_continue():
+        baked.update(1.0 / args.fps)
+        baked.draw_final(target)
+    replay_time = time.perf_counter() - start
+    replay_frames = len(segment) * args.loops
+
+    stats = cache.stats()
+    print("=" * 50)
+    print(f"烘焙: {len(segment)} 帧, 耗时 {bake_time:.2f} 秒 ({bake_time / len(segment) * 1000:.2f}ms/帧)")
+    print(f"回放: {replay_frames} 帧, 耗时 {replay_time:.2f} 秒 ({replay_time / replay_frames * 1000:.2f}ms/帧)")
+    print(f"内存: {stats['memory_used'] / 1024 / 1024:.1f}MB, 压缩比 {stats['compression_ratio']:.1f}x "
+          f"({segment.codec}, 关键帧间隔 {segment.keyframe_interval})")
+
+    if args.verify:
+        # 预算为1字节时每次放入都会淘汰其他片段
+        small_cache = FrameCache(1)
+        small_cache.put(key, segment)
+        other_start = args.start + args.frames
+        small_cache.get_or_bake(key[:2] + (other_start,) + key[3:], engine, args.frames, other_start,
+                                args.keyframe_interval)
+        rebaked = small_cache.get_or_bake(key, engine, args.frames, args.start, args.keyframe_interval)
+        same = rebaked is not segment and rebaked.frames == segment.frames
+        print(f"淘汰后重新烘焙: {'与首次烘焙逐字节一致' if same else '与首次烘焙不一致!'} "
+              f"(淘汰 {small_cache.evictions} 次)")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,202 @@
+# patterns/frame_export.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 流式帧导出：把 draw_final 输出的每一帧写成原始RGBA流或编号PNG序列，用于生成预览视频。
+# 渲染线程只拷贝像素并放入有界队列，编码和文件写入在后台线程完成，内存占用不超过队列长度；
+# 队列满时渲染线程等待写入（背压），等待次数和时长计入统计
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import pygame
+
+# 添加当前目录到Python路径，确保可以导入其他图案
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+FORMATS = ('raw', 'png')
+
+
+class FrameExporter:
+    """后台线程写帧的导出器
+
+    format 为 'raw' 时 path 是输出文件（RGBA逐帧相接，旁边写一个 .json 说明尺寸和帧率），
+    由一个线程按顺序写入；为 'png' 时 path 是输出目录，writers 个线程并行编码 frame_000000.png ...
+    """
+
+    def __init__(self, path, width, height, fps=60, format='raw', queue_size=8, writers=None):
+        if format not in FORMATS:
+            raise ValueError(f"不支持的导出格式: {format}")
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.format = format
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.lock = threading.Lock()
+
+        # 统计信息
+        self.frames = 0  # 已提交的帧数
+        self.frames_written = 0
+        self.bytes_written = 0
+        self.backpressure_count = 0  # 提交时队列已满的次数
+        self.backpressure_time = 0.0  # 渲染线程因队列满而等待的总时长
+        self.max_queue_depth = 0
+        self.start_time = None
+        self.end_time = None
+
+        if format == 'raw':
+            self.file = open(path, 'wb')
+            writers = 1  # 原始流必须按顺序写入
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.file = None
+            writers = writers or 2
+
+        self.threads = [threading.Thread(target=self._writer_loop, name=f"frame-export-{i}", daemon=True)
+                        for i in range(writers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, surface):
+        """提交一帧（拷贝像素后立即返回，队列满时等待）"""
+        if self.error is not None:
+            raise self.error
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+
+        item = (self.frames, pygame.image.tostring(surface, 'RGBA'))
+        self.frames += 1
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            wait_start = time.perf_counter()
+            self.queue.put(item)
+            self.backpressure_count += 1
+            self.backpressure_time += time.perf_counter() - wait_start
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def write_frame(self, frame_index, surface):
+        """与 HeadlessRenderEngine.render 的 frame_callback 签名一致"""
+        self.submit(surface)
+
+    def _writer_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue  # 出错后只清空队列，避免渲染线程卡在背压上
+            index, data = item
+            try:
+                if self.format == 'raw':
+                    self.file.write(data)
+                    size = len(data)
+                else:
+                    frame = pygame.image.frombuffer(data, (self.width, self.height), 'RGBA')
+                    frame_path = os.path.join(self.path, f"frame_{index:06d}.png")
+                    pygame.image.save(frame, frame_path)
+                    size = os.path.getsize(frame_path)  # 压缩后的实际大小
+            except Exception as e:
+                self.error = e
+                continue
+            with self.lock:
+                self.frames_written += 1
+                self.bytes_written += size
+
+    def close(self):
+        """等待队列写完，关闭文件，返回统计信息"""
+        if self.threads:
+            for _ in self.threads:
+                self.queue.put(None)
+            for thread in self.threads:
+                thread.join()
+            self.threads = []
+            self.end_time = time.perf_counter()
+
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+                with open(self.path + '.json', 'w', encoding='utf-8') as f:
+                    json.dump({'format': 'rawvideo', 'pix_fmt': 'rgba', 'width': self.width,
+                               'height': self.height, 'fps': self.fps, 'frames': self.frames_written}, f)
+
+        if self.error is not None:
+            raise self.error
+        return self.stats()
+
+    def stats(self):
+        """返回统计信息"""
+        end_time = self.end_time or time.perf_counter()
+        elapsed = end_time - self.start_time if self.start_time is not None else 0.0
+        return {
+            'frames': self.frames_written,
+            'bytes': self.bytes_written,
+            'wall_time': elapsed,
+            'sustained_fps': self.frames_written / elapsed if elapsed > 0 else 0.0,
+            'backpressure_count': self.backpressure_count,
+            'backpressure_time': self.backpressure_time,
+            'max_queue_depth': self.max_queue_depth,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def export_frames(pattern_name, path, width=1200, height=750, fps=60, seed=0, format='raw', queue_size=8,
+                  writers=None, max_frames=None, debug_mode=False):
+    """离屏渲染图案并导出每一帧，返回 (渲染统计, 导出统计)"""
+    from render_engine import HeadlessRenderEngine, load_pattern_class
+
+    engine = HeadlessRenderEngine(load_pattern_class(pattern_name), width, height, fps, debug_mode,
+                                  pattern_kwargs={'seed': seed})
+    with FrameExporter(path, width, height, fps, format, queue_size, writers) as exporter:
+        render_stats = engine.render(max_frames=max_frames, frame_callback=exporter.write_frame)
+    return render_stats, exporter.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离屏渲染图案并流式导出帧（原始RGBA流或PNG序列）")
+    parser.add_argument("pattern", help="图案模块名，如 pattern_neon")
+    parser.add_argument("output", nargs="?", help="输出文件（raw）或目录（png）")
+    parser.add_argument("--format", choices=FORMATS, default='raw')
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=750)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=None, help="最多导出帧数，缺省为图案建议时长")
+    parser.add_argument("--queue", type=int, default=8, help="写入队列长度（帧）")
+    parser.add_argument("--writers", type=int, default=None, help="PNG编码线程数，缺省为2")
+    parser.add_argument("--debug", action="store_true", help="导出调试模式画面")
+    args = parser.parse_args()
+
+    from render_engine import init_headless_display
+    init_headless_display()
+
+    output = args.output or (f"{args.pattern}.rgba" if args.format == 'raw' else f"{args.pattern}_frames")
+    render_stats, stats = export_frames(args.pattern, output, args.width, args.height, args.fps, args.seed,
+                                        args.format, args.queue, args.writers, args.frames, args.debug)
+
+    print(f"{args.pattern}: 导出 {stats['frames']} 帧, {stats['bytes'] / 1024 / 1024:.1f}MB, "
+          f"耗时 {stats['wall_time']:.2f} 秒, 持续 {stats['sustained_fps']:.1f} fps "
+          f"(渲染线程 {render_stats['fps']:.1f} fps) -> {output}")
+    print(f"  背压: {stats['backpressure_count']} 次, 渲染线程共等待 {stats['backpressure_time']:.2f} 秒, "
+          f"队列最深 {stats['max_queue_depth']}/{args.queue}")
+    if args.format == 'raw':
+        print(f"  转视频: ffmpeg -f rawvideo -pix_fmt rgba -s {args.width}x{args.height} -r {args.fps} "
+              f"-i {output} preview.mp4")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,125 @@
+# patterns/gradients.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 渐变纹理库：通过 pygame.surfarray + NumPy 一次性填充RGBA像素数组，
+# 支持线性渐变、径向渐变和锥形光束，结果按参数缓存
+
+import numpy as np
+import pygame
+
+from sprite_cache import SpriteCache
+
+_gradient_cache = SpriteCache(memory_budget=32 * 1024 * 1024)
+
+
+def get_gradient_cache():
+    """获取渐变纹理缓存（用于查看命中统计）"""
+    return _gradient_cache
+
+
+def surface_from_rgba(rgba):
+    """把 (宽, 高, 4) 的uint8数组写入一个新的SRCALPHA表面"""
+    width, height = rgba.shape[:2]
+    surface = pygame.Surface((width, height), pygame.SRCALPHA, 32)
+
+    pixels = pygame.surfarray.pixels3d(surface)
+    pixels[...] = rgba[..., :3]
+    del pixels  # 释放对表面的锁定
+
+    alpha = pygame.surfarray.pixels_alpha(surface)
+    alpha[...] = rgba[..., 3]
+    del alpha
+
+    return surface
+
+
+def tint_white(surface, color):
+    """给白色纹理着色（原地修改）：RGB换成color、透明度不变，等价于乘法着色
+
+    直接改写打包的32位像素，比 fill(..., BLEND_RGBA_MULT) 快一个数量级
+    """
+    alpha_mask = surface.get_masks()[3]
+    pixels = pygame.surfarray.pixels2d(surface)
+    pixels &= alpha_mask
+    pixels |= surface.map_rgb((*color[:3], 0)) & ~alpha_mask
+    del pixels  # 释放对表面的锁定
+    return surface
+
+
+def _cached(key, factory, use_cache):
+    if not use_cache:
+        return factory()
+    return _gradient_cache.get(key, factory)
+
+
+def linear_gradient(width, height, start_color, end_color, vertical=True, use_cache=True):
+    """线性渐变矩形（RGBA），vertical为True时沿高度方向渐变
+
+    返回的表面可能被缓存共享，调用方不要直接修改它
+    """
+    start_color = tuple(start_color)
+    end_color = tuple(end_color)
+
+    def build():
+        steps = height if vertical else width
+        t = np.arange(steps) / (steps - 1) if steps > 1 else np.zeros(steps)
+        start = np.array(start_color, dtype=np.float64)
+        end = np.array(end_color, dtype=np.float64)
+        line = (start * (1 - t[:, None]) + end * t[:, None]).astype(np.uint8)
+
+        # 一条渐变线广播到整个矩形
+        if vertical:
+            rgba = np.broadcast_to(line[None, :, :], (width, height, 4))
+        else:
+            rgba = np.broadcast_to(line[:, None, :], (width, height, 4))
+        return surface_from_rgba(rgba)
+
+    return _cached(('linear', width, height, start_color, end_color, vertical), build, use_cache)
+
+
+def radial_gradient(radius, inner_color, outer_color, use_cache=True):
+    """径向渐变圆（RGBA），尺寸 2r x 2r，圆外完全透明"""
+    inner_color = tuple(inner_color)
+    outer_color = tuple(outer_color)
+
+    def build():
+        size = radius * 2
+        coords = np.arange(size) + 0.5 - radius
+        distance = np.sqrt(coords[:, None] ** 2 + coords[None, :] ** 2)
+        t = np.clip(distance / radius, 0.0, 1.0)[..., None]
+
+        inner = np.array(inner_color, dtype=np.float64)
+        outer = np.array(outer_color, dtype=np.float64)
+        rgba = inner * (1 - t) + outer * t
+        rgba[..., 3] *= distance <= radius
+        return surface_from_rgba(rgba.astype(np.uint8))
+
+    return _cached(('radial', radius, inner_color, outer_color), build, use_cache)
+
+
+def tapered_beam(length, start_width, end_width, color, alpha_range=(0.3, 0.8), use_cache=True):
+    """锥形光束纹理：沿x轴从起点(左)到终点(右)，宽度从start_width渐变到end_width
+
+    透明度从起点的 alpha_range[1] 线性降到终点的 alpha_range[0]，边缘抗锯齿
+    """
+    length = max(1, int(length))
+    color = tuple(color)
+    alpha_range = tuple(alpha_range)
+
+    def build():
+        height = int(np.ceil(max(start_width, end_width))) + 2
+        t = (np.arange(length) + 0.5) / length
+        half_width = (start_width + (end_width - start_width) * t) / 2
+        alpha = 255 * (alpha_range[0] + (alpha_range[1] - alpha_range[0]) * (1 - t))
+
+        # 像素中心到光束中轴的距离，边缘1像素做线性过渡
+        offset = np.abs(np.arange(height) + 0.5 - height / 2)
+        coverage = np.clip(half_width[:, None] - offset[None, :] + 0.5, 0.0, 1.0)
+
+        rgba = np.empty((length, height, 4), dtype=np.uint8)
+        rgba[..., :3] = color
+        rgba[..., 3] = (alpha[:, None] * coverage).astype(np.uint8)
+        return surface_from_rgba(rgba)
+
+    return _cached(('beam', length, start_width, end_width, color, alpha_range), build, use_cache)
\ No newline at end of file
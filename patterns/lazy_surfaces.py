@@ -0,0 +1,144 @@
+# patterns/lazy_surfaces.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 延迟分配的图案表面：buffer_surface / final_surface 等在第一次访问时才分配。
+# 复合图案的子图案只调用 draw_basic_elements，从不使用自己的全屏表面，
+# 成为子图案时直接释放；已分配的表面登记在进程级注册表中，用于汇报表面内存占用
+
+import weakref
+
+import pygame
+
+from sprite_cache import surface_bytes
+
+_owners = weakref.WeakSet()  # 持有已分配延迟表面的对象
+
+# 统计信息
+_stats = {'allocations': 0, 'releases': 0}
+
+
+def pattern_surface_size(pattern):
+    """图案绘制表面的尺寸：调试模式下左右分屏，宽度减半"""
+    if pattern.debug_mode:
+        return pattern.width // 2, pattern.height
+    return pattern.width, pattern.height
+
+
+class LazySurface:
+    """延迟分配的表面描述符（类属性）
+
+    size:          size(实例) -> (宽, 高)，缺省为 pattern_surface_size
+    flags:         pygame.Surface 的标志
+    convert_alpha: 分配后是否 convert_alpha()（与原来图案的写法一致）
+    赋值为None或调用 release_surfaces() 后，下次访问时重新分配
+    """
+
+    def __init__(self, size=pattern_surface_size, flags=0, convert_alpha=True):
+        self.size = size
+        self.flags = flags
+        self.convert_alpha = convert_alpha
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        surface = instance.__dict__.get(self.name)
+        if surface is None:
+            surface = pygame.Surface(self.size(instance), self.flags)
+            if self.convert_alpha:
+                surface = surface.convert_alpha()
+            instance.__dict__[self.name] = surface
+            _owners.add(instance)
+            _stats['allocations'] += 1
+        return surface
+
+    def __set__(self, instance, value):
+        if value is None:
+            self.__delete__(instance)
+            return
+        instance.__dict__[self.name] = value
+        _owners.add(instance)
+
+    def __delete__(self, instance):
+        if instance.__dict__.pop(self.name, None) is not None:
+            _stats['releases'] += 1
+
+    def is_allocated(self, instance):
+        return instance.__dict__.get(self.name) is not None
+
+
+def _lazy_attributes(cls):
+    """类（含父类）上声明的所有 LazySurface"""
+    attributes = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if isinstance(value, LazySurface):
+                attributes[name] = value
+    return attributes
+
+
+def release_surfaces(instance):
+    """释放实例已分配的延迟表面，返回释放的字节数"""
+    freed = 0
+    for name, descriptor in _lazy_attributes(type(instance)).items():
+        surface = instance.__dict__.get(name)
+        if surface is not None:
+            freed += surface_bytes(surface)
+            descriptor.__delete__(instance)
+    return freed
+
+
+def allocated_surfaces(instance):
+    """实例已分配的延迟表面 {属性名: 表面}"""
+    return {name: instance.__dict__[name] for name, descriptor in _lazy_attributes(type(instance)).items()
+            if descriptor.is_allocated(instance)}
+
+
+def surface_memory_report():
+    """进程内表面内存报告（字节）：各类图案的延迟表面、共享表面池、精灵缓存"""
+    from gradients import get_gradient_cache
+    from sprite_cache import get_shared_glow_cache
+    from surface_pool import get_shared_surface_pool
+
+    by_class = {}
+    surfaces = 0
+    for owner in list(_owners):
+        for surface in allocated_surfaces(owner).values():
+            name = owner.__class__.__name__
+            by_class[name] = by_class.get(name, 0) + surface_bytes(surface)
+            surfaces += 1
+
+    pattern_bytes = sum(by_class.values())
+    pool_bytes = get_shared_surface_pool().stats()['memory_bytes']
+    glow_bytes = get_shared_glow_cache().memory_used
+    gradient_bytes = get_gradient_cache().memory_used
+
+    return {
+        'pattern_surfaces': surfaces,
+        'pattern_bytes': pattern_bytes,
+        'by_class': by_class,
+        'surface_pool_bytes': pool_bytes,
+        'glow_cache_bytes': glow_bytes,
+        'gradient_cache_bytes': gradient_bytes,
+        'total_bytes': pattern_bytes + pool_bytes + glow_bytes + gradient_bytes,
+        'allocations': _stats['allocations'],
+        'releases': _stats['releases'],
+    }
+
+
+def print_surface_memory_report():
+    """打印表面内存报告"""
+    report = surface_memory_report()
+    mb = 1024 * 1024
+    print(f"表面内存: 共 {report['total_bytes'] / mb:.1f}MB")
+    print(f"  图案表面: {report['pattern_surfaces']} 个, {report['pattern_bytes'] / mb:.1f}MB "
+          f"(延迟分配 {report['allocations']} 次, 释放 {report['releases']} 次)")
+    for name, size in sorted(report['by_class'].items(), key=lambda item: -item[1]):
+        print(f"    {name}: {size / mb:.1f}MB")
+    print(f"  表面池: {report['surface_pool_bytes'] / mb:.1f}MB, 光晕缓存: {report['glow_cache_bytes'] / mb:.1f}MB, "
+          f"渐变缓存: {report['gradient_cache_bytes'] / mb:.1f}MB")
+    return report
\ No newline at end of file
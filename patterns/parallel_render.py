@@ -0,0 +1,209 @@
+# patterns/parallel_render.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 分段并行离屏渲染：把节目时间线切成若干段，在进程池中并行渲染。
+# 每个工作进程用相同的种子创建图案，只调用update快进到段首再开始绘制，
+# 主进程按顺序拼接各段输出（原始RGB24帧），结果与单进程顺序渲染逐位一致。
+# 不支持调试模式：调试信息里画的是各进程实时测得的耗时，无法逐位复现
+
+import argparse
+import hashlib
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+# 添加当前目录到Python路径，确保可以导入其他图案
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from render_engine import HeadlessRenderEngine, init_headless_display, load_pattern_class
+
+
+def split_segments(total_frames, segment_count):
+    """把 [0, total_frames) 切成segment_count个尽量等长的区间"""
+    segment_count = max(1, min(segment_count, total_frames))
+    bounds = [total_frames * i // segment_count for i in range(segment_count + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(segment_count)]
+
+
+def _create_engine(pattern_name, width, height, fps, seed):
+    init_headless_display()
+    engine = HeadlessRenderEngine(load_pattern_class(pattern_name), width, height, fps, False,
+                                  pattern_kwargs={'seed': seed})
+    engine.create_pattern()
+    return engine
+
+
+def count_frames(pattern_name, width, height, fps=60, seed=0, max_frames=None):
+    """节目总帧数：图案建议时长，不超过max_frames"""
+    engine = _create_engine(pattern_name, width, height, fps, seed)
+    total_frames = int(math.ceil(engine.pattern.get_duration() * fps))
+    if max_frames is not None:
+        total_frames = min(total_frames, max_frames)
+    return total_frames
+
+
+def render_segment(task):
+    """工作进程：快进到段首，渲染 [start, end) 并写入段文件
+
+    返回 (段序号, 实际帧数, 段文件sha256, 快进耗时, 渲染耗时)
+    """
+    index, pattern_name, width, height, fps, seed, start, end, path = task
+    engine = _create_engine(pattern_name, width, height, fps, seed)
+    pygame = init_headless_display()
+
+    # 快进：只推进模拟，不绘制
+    fast_forward_start = time.perf_counter()
+    keep_running = True
+    for _ in range(start):
+        if not engine.advance():
+            keep_running = False
+            break
+    fast_forward_time = time.perf_counter() - fast_forward_start
+
+    render_start = time.perf_counter()
+    digest = hashlib.sha256()
+    frames = 0
+    with open(path, 'wb') as f:
+        if keep_running:
+            for _ in range(start, end):
+                keep_running = engine.render_frame()
+                data = pygame.image.tostring(engine.target_surface, 'RGB')
+                f.write(data)
+                digest.update(data)
+                frames += 1
+                if not keep_running:
+                    break
+    render_time = time.perf_counter() - render_start
+
+    return index, frames, digest.hexdigest(), fast_forward_time, render_time
+
+
+def _file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_parallel(pattern_name, output_path, width=1200, height=750, fps=60, seed=0,
+                    processes=None, segments=None, max_frames=None):
+    """并行渲染整段节目到 output_path（原始RGB24帧连续存放），返回统计信息"""
+    processes = processes or os.cpu_count() or 1
+    segments = segments or processes
+    total_frames = count_frames(pattern_name, width, height, fps, seed, max_frames)
+
+    tasks = []
+    for index, (start, end) in enumerate(split_segments(total_frames, segments)):
+        segment_path = f"{output_path}.seg{index:04d}"
+        tasks.append((index, pattern_name, width, height, fps, seed, start, end, segment_path))
+
+    wall_start = time.perf_counter()
+    # 统一使用spawn（Windows上的默认方式）：主进程已初始化SDL显示，fork出的子进程会继承其状态而卡住
+    pool = multiprocessing.get_context('spawn').Pool(processes)
+    try:
+        results = sorted(pool.imap_unordered(render_segment, tasks))
+    finally:
+        # 用close/join让工作进程正常退出；SDL接管了SIGTERM，terminate()会一直等待
+        pool.close()
+        pool.join()
+
+    # 按顺序拼接，并校验每段文件与工作进程报告的哈希一致
+    digest = hashlib.sha256()
+    frames = 0
+    with open(output_path, 'wb') as output:
+        for (index, segment_frames, segment_hash, _, _), task in zip(results, tasks):
+            segment_path = task[-1]
+            if _file_sha256(segment_path) != segment_hash:
+                raise IOError(f"段文件校验失败: {segment_path}")
+
+            with open(segment_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    output.write(chunk)
+                    digest.update(chunk)
+            os.remove(segment_path)
+            frames += segment_frames
+
+            # 某段提前结束说明图案已停止，后续段不应再有帧
+            if segment_frames < task[7] - task[6]:
+                break
+    wall_time = time.perf_counter() - wall_start
+
+    return {
+        'pattern': pattern_name,
+        'frames': frames,
+        'segments': len(tasks),
+        'processes': processes,
+        'wall_time': wall_time,
+        'fps': frames / wall_time if wall_time > 0 else float('inf'),
+        'fast_forward_time': sum(result[3] for result in results),
+        'render_time': sum(result[4] for result in results),
+        'sha256': digest.hexdigest(),
+    }
+
+
+def render_sequential_hash(pattern_name, width=1200, height=750, fps=60, seed=0, max_frames=None):
+    """单进程顺序渲染，返回 (帧数, sha256)，用于验证并行结果逐位一致"""
+    total_frames = count_frames(pattern_name, width, height, fps, seed, max_frames)
+    engine = _create_engine(pattern_name, width, height, fps, seed)
+    pygame = init_headless_display()
+
+    digest = hashlib.sha256()
+    frames = 0
+    while frames < total_frames:
+        keep_running = engine.render_frame()
+        digest.update(pygame.image.tostring(engine.target_surface, 'RGB'))
+        frames += 1
+        if not keep_running:
+            break
+    return frames, digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分段并行离屏渲染（进程池，结果与顺序渲染逐位一致）")
+    parser.add_argument("pattern", help="图案模块名，如 pattern_composite")
+    parser.add_argument("output", help="输出文件（原始RGB24帧）")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=750)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0, help="图案随机数种子")
+    parser.add_argument("--processes", type=int, default=None, help="工作进程数，缺省为CPU核数")
+    parser.add_argument("--segments", type=int, default=None, help="分段数，缺省等于进程数")
+    parser.add_argument("--frames", type=int, default=None, help="最多渲染帧数，缺省为图案建议时长")
+    parser.add_argument("--verify", action="store_true", help="再顺序渲染一遍，比较哈希")
+    args = parser.parse_args()
+
+    print(f"开始并行渲染 {args.pattern}...")
+    print("=" * 50)
+    stats = render_parallel(args.pattern, args.output, args.width, args.height, args.fps, args.seed,
+                            args.processes, args.segments, args.frames)
+    print(f"{stats['frames']} 帧, {stats['segments']} 段, {stats['processes']} 个进程, "
+          f"耗时 {stats['wall_time']:.2f} 秒, {stats['fps']:.1f} fps")
+    print(f"快进总耗时 {stats['fast_forward_time']:.2f} 秒, 渲染总耗时 {stats['render_time']:.2f} 秒")
+    print(f"sha256: {stats['sha256']}")
+    print(f"播放/转码: ffmpeg -f rawvideo -pix_fmt rgb24 -s {args.width}x{args.height} "
+          f"-r {args.fps} -i {args.output} out.mp4")
+
+    if args.verify:
+        start = time.perf_counter()
+        frames, sequential_hash = render_sequential_hash(args.pattern, args.width, args.height, args.fps,
+                                                         args.seed, args.frames)
+        sequential_time = time.perf_counter() - start
+        same = frames == stats['frames'] and sequential_hash == stats['sha256']
+        print(f"顺序渲染: {frames} 帧, 耗时 {sequential_time:.2f} 秒 "
+              f"(并行加速 {sequential_time / stats['wall_time']:.1f}x)")
+        print("逐位一致" if same else "结果不一致!")
+        print("=" * 50)
+        return 0 if same else 1
+
+    print("=" * 50)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -7,110 +7,161 @@
 import pygame
 import math
 import random
+import os
+import sys
+
+import numpy as np
+
+# 添加当前目录到Python路径，确保可以导入辅助模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from debug_hud import DebugHud, timed_stage, get_font
+from lazy_surfaces import LazySurface, release_surfaces
+from render_graph import pattern_graph, split_screen_views
+from ring_buffer import RingBuffer
+from sprite_cache import get_shared_glow_cache
+
+CIRCLE_LIFETIME = 255 / 2 / 60  # 透明度每帧减2，圆圈最长存活时间（秒）
 
 
 class PatternCircle:
     """圆圈波浪图案"""
 
-    def __init__(self, width, height, debug_mode=False):
+    # 绘制表面第一次使用时才分配（见 lazy_surfaces.py），作为复合图案的子图案时会被释放
+    buffer_surface = LazySurface()
+    final_surface = LazySurface()
+
+    def __init__(self, width, height, debug_mode=False, seed=None):
         self.width = width
         self.height = height
         self.debug_mode = debug_mode
         self.frame_count = 0
+        self.elapsed_time = 0.0  # 累计模拟时间（秒）
+        self.spawned_count = 0  # 已生成的圆圈数
+        self.spawn_interval = 10 / 60  # 每1/6秒生成一个新圆圈
+        self.render_alpha = 1.0  # 渲染插值系数：0为上一步状态，1为当前状态（见 simulation_loop.py）
         self.running = True
+        self.rng = random.Random(seed)  # 独立的随机数流，给定seed时节目可复现
+        self.clear_on_draw = True  # 作为复合图案的子图案时由父图案负责清除
+        self.dirty_rects = []  # 本帧 draw_basic_elements 绘制过的区域
 
-        # 创建绘制表面
-        if self.debug_mode:
-            self.buffer_surface = pygame.Surface((width // 2, height))
-            self.final_surface = pygame.Surface((width // 2, height))
-        else:
-            self.buffer_surface = pygame.Surface((width, height))
-            self.final_surface = pygame.Surface((width, height))
-
-        # 透明度支持
-        self.buffer_surface = self.buffer_surface.convert_alpha()
-        self.final_surface = self.final_surface.convert_alpha()
+        # 共享的光晕精灵缓存
+        self.glow_cache = get_shared_glow_cache()
 
         # 圆圈相关变量
         self.center_x = width // 2
         self.center_y = height // 2
         self.max_radius = min(width, height) // 2 - 20
-        self.circles = []
+        # 圆圈存放在定长环形缓冲里，半径增长和淡出对所有圆圈一次算完
+        self.circles = RingBuffer(self._circle_capacity(self.spawn_interval),
+                                  radius=np.float64, prev_radius=np.float64,
+                                  alpha=np.float64, prev_alpha=np.float64,
+                                  growth_speed=np.float64, color=(np.uint8, (3,)),
+                                  serial=np.uint32)  # 稳定编号（创建序号），槽位会被复用
+
+        # 调试信息层（字体和文字缓存），调试模式下记录更新阶段耗时（见 update 上的 timed_stage）
+        self.hud = DebugHud(font_size=16, line_height=25)
+
+        # 调试分屏的渲染图：左右窗格共用同一份基础图层
+        self.render_graph = pattern_graph(self)
+        self.debug_views = split_screen_views(self)
 
     def get_chinese_font(self, size=16):
         """获取支持中文的字体"""
-        try:
-            font_path = "C:/Windows/Fonts/simhei.ttf"
-            return pygame.font.Font(font_path, size)
-        except:
-            return pygame.font.Font(None, size)
+        # 进程级字体缓存，避免每帧从磁盘重新打开字体
+        return get_font(size)
 
     def initialize(self):
         """初始化"""
         print("圆圈波浪图案初始化完成")
 
-    def update(self, dt):
-        """更新逻辑"""
-        self.frame_count += 1
-
-        # 生成新的圆圈
-        if self.frame_count % 10 == 0:  # 每10帧生成一个新圆圈
-            self.circles.append({
-                'radius': 5,
-                'color': (random.randint(50, 255), random.randint(50, 255), random.randint(50, 255)),
-                'alpha': 255,
-                'growth_speed': random.uniform(1, 3)
-            })
+    @staticmethod
+    def _circle_capacity(spawn_interval):
+        """同时存活的圆圈数上限（留两个余量）"""
+        return math.ceil(CIRCLE_LIFETIME / spawn_interval) + 2
 
-        # 更新现有圆圈
-        for circle in self.circles[:]:
-            circle['radius'] += circle['growth_speed']
-            circle['alpha'] -= 2
+    def set_spawn_interval(self, spawn_interval):
+        """设置生成间隔（秒），如每帧一个圆圈的密集波纹，环形缓冲按需扩容"""
+        self.spawn_interval = spawn_interval
+        self.spawned_count = int(self.elapsed_time / spawn_interval + 1e-9)
+        self.circles.reserve(self._circle_capacity(spawn_interval))
 
-            # 移除不可见的圆圈
-            if circle['alpha'] <= 0 or circle['radius'] > self.max_radius:
-                self.circles.remove(circle)
-
-        return self.frame_count < 400  # 运行约6.5秒
+    @timed_stage("更新")
+    def update(self, dt):
+        """更新逻辑 - 按时间推进，与帧率无关"""
+        self.frame_count += 1
+        self.elapsed_time += dt
+        step = dt * 60  # 增长和淡出速度按每帧(1/60秒)标定
+
+        # 生成新的圆圈（按累计时间计数，帧率变化时生成速度不变）
+        due = int(self.elapsed_time / self.spawn_interval + 1e-9)
+        while self.spawned_count < due:
+            self.spawned_count += 1
+            color = (self.rng.randint(50, 255), self.rng.randint(50, 255), self.rng.randint(50, 255))
+            self.circles.push(radius=5, color=color, alpha=255, growth_speed=self.rng.uniform(1, 3),
+                              serial=self.circles.pushed)
+
+        # 更新现有圆圈，保留上一步状态用于渲染插值（空闲槽位一起算，结果不会被读取）
+        circles = self.circles
+        radius, alpha = circles['radius'], circles['alpha']
+        circles['prev_radius'][:] = radius
+        circles['prev_alpha'][:] = alpha
+        radius += circles['growth_speed'] * step
+        alpha -= 2 * step
+
+        # 移除不可见的圆圈
+        circles.discard(circles.alive & ((alpha <= 0) | (radius > self.max_radius)))
+
+        return self.should_continue()
+
+    def get_emitters(self):
+        """返回当前帧的发光体（无人机）状态：位置 (N,2)、颜色 (N,3)、亮度 (N,)、稳定编号 (N,)，用于轨迹导出"""
+        # 每个扩散的圆圈是一架从中心出发的无人机，亮度随透明度衰减
+        slots = self.circles.slots()
+        positions = np.tile(np.array([self.center_x, self.center_y], dtype=np.float32), (len(slots), 1))
+        colors = self.circles['color'].take(slots, axis=0)
+        brightness = (np.maximum(self.circles['alpha'].take(slots), 0) / 255).astype(np.float32)
+        return positions, colors, brightness, self.circles['serial'].take(slots)
 
     def draw_basic_elements(self, surface):
         """绘制基础圆圈"""
-        surface.fill((0, 0, 0, 0))
-
-        # 绘制所有圆圈
-        for circle in self.circles:
-            color_with_alpha = (*circle['color'], int(circle['alpha']))
-            pygame.draw.circle(surface, color_with_alpha,
-                               (self.center_x, self.center_y),
-                               int(circle['radius']), 2)
+        self.dirty_rects = []
+        if self.clear_on_draw:
+            surface.fill((0, 0, 0, 0))
+
+        # 绘制所有圆圈（半径和透明度按 render_alpha 插值），颜色和半径一次转换成列表
+        slots = self.circles.slots()
+        radius = self.circles['radius'].take(slots)
+        alpha = self.circles['alpha'].take(slots)
+        t = self.render_alpha
+        if t < 1.0:
+            prev_radius = self.circles['prev_radius'].take(slots)
+            prev_alpha = self.circles['prev_alpha'].take(slots)
+            radius = prev_radius + (radius - prev_radius) * t
+            alpha = prev_alpha + (alpha - prev_alpha) * t
+        rgba = np.empty((len(slots), 4), dtype=np.uint8)
+        rgba[:, :3] = self.circles['color'].take(slots, axis=0)
+        rgba[:, 3] = alpha.astype(np.int64)
+
+        # 2像素宽的圆环 pygame.draw.circle 只写圆周上的像素，比贴整块预渲染精灵快得多
+        center = (self.center_x, self.center_y)
+        for color_with_alpha, r in zip(rgba.tolist(), radius.astype(np.int64).tolist()):
+            self.dirty_rects.append(pygame.draw.circle(surface, color_with_alpha, center, r, 2))
 
     def apply_effects(self, surface):
         """应用特效"""
         # 添加中心光点
-        center_glow = pygame.Surface((50, 50), pygame.SRCALPHA)
-        pygame.draw.circle(center_glow, (255, 255, 255, 100), (25, 25), 25)
-        surface.blit(center_glow, (self.center_x - 25, self.center_y - 25))
+        self.glow_cache.blit_glow(surface, (self.center_x, self.center_y), 25, (255, 255, 255), 100, quantize=False)
 
     def draw_debug(self, surface):
         """调试模式下的绘制"""
         if not self.debug_mode:
             return
 
-        # 左侧：基础图形
-        self.buffer_surface.fill((0, 0, 0, 0))
-        self.draw_basic_elements(self.buffer_surface)
-
-        # 右侧：基础图形 + 特效
-        self.final_surface.fill((0, 0, 0, 0))
-        self.final_surface.blit(self.buffer_surface, (0, 0))
-        self.apply_effects(self.final_surface)
-
-        # 合并到主surface
-        surface.blit(self.buffer_surface, (0, 0))
-        surface.blit(self.final_surface, (self.width // 2, 0))
-
-        # 绘制调试信息
-        self._draw_debug_info(surface)
+        # 左侧基础图形，右侧基础图形 + 特效，最后叠加调试信息；基础图层每帧只画一次（见 render_graph.py）
+        self.render_graph.present(surface, self.debug_views)
 
     def draw_final(self, surface):
         """被调用模式下的最终绘制"""
@@ -121,18 +172,15 @@ class PatternCircle:
 
     def _draw_debug_info(self, surface):
         """绘制调试信息"""
-        font = self.get_chinese_font(16)
-
+        # 标签和数值分开缓存，只有数值变化时才重新渲染
         info_lines = [
-            f"图案: 圆圈波浪",
-            f"帧数: {self.frame_count}",
-            f"调试模式: {self.debug_mode}",
-            f"圆圈数量: {len(self.circles)}"
+            "图案: 圆圈波浪",
+            ("帧数: ", f"{self.frame_count}"),
+            ("调试模式: ", f"{self.debug_mode}"),
+            ("圆圈数量: ", f"{len(self.circles)}/{self.circles.capacity}")
         ]
 
-        for i, line in enumerate(info_lines):
-            text = font.render(line, True, (255, 255, 255))
-            surface.blit(text, (10, 10 + i * 25))
+        self.hud.draw_lines(surface, info_lines + self.hud.stage_lines(), (10, 10))
 
     def get_duration(self):
         """返回图案建议持续时间"""
@@ -140,7 +188,7 @@ class PatternCircle:
 
     def should_continue(self):
         """判断是否应该继续运行"""
-        return self.frame_count * 0.016 < self.get_duration()
+        return self.elapsed_time < self.get_duration()
 
     def stop(self):
         """停止图案运行"""
@@ -153,13 +201,5 @@ class PatternCircle:
 
         self.debug_mode = debug_mode
 
-        # 重新创建surface
-        if self.debug_mode:
-            self.buffer_surface = pygame.Surface((self.width // 2, self.height))
-            self.final_surface = pygame.Surface((self.width // 2, self.height))
-        else:
-            self.buffer_surface = pygame.Surface((self.width, self.height))
-            self.final_surface = pygame.Surface((self.width, self.height))
-
-        self.buffer_surface = self.buffer_surface.convert_alpha()
-        self.final_surface = self.final_surface.convert_alpha()
\ No newline at end of file
+        # 表面尺寸随调试模式变化：释放后下次使用时按新尺寸重新分配
+        release_surfaces(self)
\ No newline at end of file
@@ -10,54 +10,88 @@ import math
 import sys
 import os
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 # 添加当前目录到Python路径，确保可以导入其他图案
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
+from debug_hud import DebugHud, timed_stage, get_font
+from dirty_rects import merge_dirty_rects
+from lazy_surfaces import LazySurface, release_surfaces
+from render_graph import pattern_graph, split_screen_views
+from quality_governor import QualityKnob
+from separation_check import SeparationChecker
+from surface_pool import get_shared_surface_pool
+
+CHILD_ID_BITS = 24  # 发光体编号的低24位为子图案内的编号，高位为子图案序号
+
 
 class PatternComposite:
     """复合图案 - 修复时间传递问题"""
 
-    def __init__(self, width, height, debug_mode=False):
+    # 绘制表面第一次使用时才分配（见 lazy_surfaces.py），作为复合图案的子图案时会被释放
+    buffer_surface = LazySurface()
+    final_surface = LazySurface()
+    layer_surface = LazySurface(size=lambda pattern: (pattern.width, pattern.height), flags=pygame.SRCALPHA,
+                                convert_alpha=False)
+
+    def __init__(self, width, height, debug_mode=False, seed=None):
         self.width = width
         self.height = height
         self.debug_mode = debug_mode
         self.is_first_call = True
         self.frame_count = 0
         self.running = True
+        self.rng = random.Random(seed)  # 独立的随机数流，子图案的种子也由它派生
         self.start_time = None
         self.last_update_time = None  # 添加时间跟踪
-
-        # 创建绘制表面
-        if self.debug_mode:
-            self.buffer_surface = pygame.Surface((width // 2, height))
-            self.final_surface = pygame.Surface((width // 2, height))
-        else:
-            self.buffer_surface = pygame.Surface((width, height))
-            self.final_surface = pygame.Surface((width, height))
-
-        self.buffer_surface = self.buffer_surface.convert_alpha()
-        self.final_surface = self.final_surface.convert_alpha()
+        self.time_source = time.time  # 时间源，离屏渲染时可注入模拟时钟
+        self.clear_on_draw = True  # 作为复合图案的子图案时由父图案负责清除
+        self.dirty_rects = []  # 本帧 draw_basic_elements 绘制过的区域
+        self.glow_ring_spacing = 10  # 全局光晕圆环间距，越大圆环越少（画质调节参数）
+        self.effects_scale = 1.0  # 全局光晕缓冲的分辨率比例，低于1时缩小绘制再放大叠加（画质调节参数）
+        self.sub_pattern_stages = ('basic',)  # 只调用子图案的 draw_basic_elements，画质调节器据此收集子图案参数
 
         # 子图案列表
         self.sub_patterns = []
         self.sub_pattern_weights = {}
 
+        # 子图案共用的绘制层（layer_surface）只在脏矩形内清除，首次使用时创建
+        self.surface_pool = get_shared_surface_pool()
+
+        # 可选的帧分析器（见 profiler.py），挂载后新添加的子图案也会被分析
+        self.profiler = None
+
+        # 可选的线程池并行绘制（见 enable_parallel），记录每帧的并行加速比
+        self.executor = None
+        self.parallel_workers = 0
+        self.parallel_speedups = deque(maxlen=120)
+
+        # 可选的无人机最小间距检查（见 enable_separation_check），每次更新后检查一次
+        self.separation_checker = None
+
+        # 调试信息层（字体和文字缓存），调试模式下记录更新阶段耗时（见 update 上的 timed_stage）
+        self.hud = DebugHud(font_size=16, line_height=25)
+
+        # 调试分屏的渲染图：左右窗格共用同一份基础图层
+        self.render_graph = pattern_graph(self)
+        self.debug_views = split_screen_views(self)
+
     def get_chinese_font(self, size=16):
         """获取支持中文的字体"""
-        try:
-            font_path = "C:/Windows/Fonts/simhei.ttf"
-            return pygame.font.Font(font_path, size)
-        except:
-            return pygame.font.Font(None, size)
+        # 进程级字体缓存，避免每帧从磁盘重新打开字体
+        return get_font(size)
 
     def initialize(self):
         """初始化复合图案"""
         print("复合图案初始化 - 创建子图案")
-        self.start_time = time.time()
-        self.last_update_time = time.time()  # 初始化时间跟踪
+        self.start_time = self.time_source()
+        self.last_update_time = self.time_source()  # 初始化时间跟踪
 
         # 清空现有的子图案
         self.sub_patterns = []
@@ -80,6 +114,10 @@ class PatternComposite:
             pattern_name = pattern.__class__.__name__
             print(f"  子图案 {i + 1}: {pattern_name}, 权重: {weight}")
 
+    def _next_child_seed(self):
+        """为下一个子图案派生随机数种子（按创建顺序，保证可复现）"""
+        return self.rng.getrandbits(64)
+
     def _try_create_star_pattern(self):
         """尝试创建星星图案"""
         try:
@@ -87,7 +125,8 @@ class PatternComposite:
             module = importlib.import_module('pattern_star')
             star_class = getattr(module, 'PatternStar')
 
-            star_pattern = star_class(self.width, self.height, debug_mode=False)
+            star_pattern = star_class(self.width, self.height, debug_mode=False, seed=self._next_child_seed())
+            star_pattern.time_source = self.time_source  # 子图案共享同一时钟
             star_pattern.initialize()
             self.add_pattern(star_pattern, weight=0.8)
             print("成功添加星星子图案，权重: 0.8")
@@ -101,7 +140,8 @@ class PatternComposite:
             module = importlib.import_module('pattern_circle')
             circle_class = getattr(module, 'PatternCircle')
 
-            circle_pattern = circle_class(self.width, self.height, debug_mode=False)
+            circle_pattern = circle_class(self.width, self.height, debug_mode=False, seed=self._next_child_seed())
+            circle_pattern.time_source = self.time_source  # 子图案共享同一时钟
             circle_pattern.initialize()
             self.add_pattern(circle_pattern, weight=0.5)
             print("成功添加圆圈子图案，权重: 0.5")
@@ -115,7 +155,8 @@ class PatternComposite:
             module = importlib.import_module('pattern_simple')
             simple_class = getattr(module, 'PatternSimple')
 
-            simple_pattern = simple_class(self.width, self.height, debug_mode=False)
+            simple_pattern = simple_class(self.width, self.height, debug_mode=False, seed=self._next_child_seed())
+            simple_pattern.time_source = self.time_source  # 子图案共享同一时钟
             simple_pattern.initialize()
             self.add_pattern(simple_pattern, weight=0.3)
             print("成功添加简单子图案，权重: 0.3")
@@ -133,7 +174,8 @@ class PatternComposite:
 
             neon_class = getattr(module, 'PatternNeon')
 
-            neon_pattern = neon_class(self.width, self.height, debug_mode=False)
+            neon_pattern = neon_class(self.width, self.height, debug_mode=False, seed=self._next_child_seed())
+            neon_pattern.time_source = self.time_source  # 子图案共享同一时钟
             neon_pattern.initialize()
             self.add_pattern(neon_pattern, weight=0.6)  # 确认权重为0.6
             print("成功添加霓虹子图案，权重: 0.6")
@@ -146,7 +188,7 @@ class PatternComposite:
         """创建备用简单图案"""
 
         class FallbackPattern:
-            def __init__(self, width, height):
+            def __init__(self, width, height, time_source):
                 self.width = width
                 self.height = height
                 self.center_x = width // 2
@@ -154,7 +196,8 @@ class PatternComposite:
                 self.angle = 0
                 self.frame_count = 0
                 self.running = True
-                self.start_time = time.time()
+                self.time_source = time_source
+                self.start_time = self.time_source()
 
             def initialize(self):
                 pass
@@ -185,12 +228,12 @@ class PatternComposite:
 
             def should_continue(self):
                 """判断是否应该继续运行"""
-                return time.time() - self.start_time < 10.0
+                return self.time_source() - self.start_time < 10.0
 
             def get_duration(self):
                 return 10.0
 
-        fallback = FallbackPattern(self.width, self.height)
+        fallback = FallbackPattern(self.width, self.height, self.time_source)
         fallback.initialize()
         self.add_pattern(fallback, weight=1.0)
         print("创建备用图案")
@@ -200,13 +243,78 @@ class PatternComposite:
         self.sub_patterns.append(pattern)
         self.sub_pattern_weights[id(pattern)] = weight
 
+        # 子图案绘制到共用层上，由复合图案按脏矩形清除
+        if hasattr(pattern, 'clear_on_draw'):
+            pattern.clear_on_draw = False
+
+        # 子图案只绘制到共用层，从不使用自己的全屏表面，释放已分配的部分
+        release_surfaces(pattern)
+
+        if self.profiler is not None:
+            self.profiler.attach(pattern, self.profiler.child_name(
+                self.profiler_name, pattern, len(self.sub_patterns) - 1))
+
+    def enable_parallel(self, workers=None):
+        """开启线程池并行模式：子图案各自绘制到表面池中的独立表面，再按固定顺序合成
+
+        pygame的blit/fill等操作执行时会释放GIL，互不依赖的子图案可以同时光栅化
+        """
+        self.disable_parallel()
+        self.parallel_workers = workers or min(4, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.parallel_workers, thread_name_prefix="composite")
+        self.parallel_speedups.clear()
+        print(f"复合图案并行绘制已开启，{self.parallel_workers} 个线程")
+
+    def disable_parallel(self):
+        """关闭线程池并行模式，恢复逐个绘制"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        self.parallel_workers = 0
+
+    def parallel_stats(self):
+        """返回并行加速统计：子图案绘制耗时之和 / 并行阶段实际耗时"""
+        speedups = list(self.parallel_speedups)
+        return {
+            'workers': self.parallel_workers,
+            'frames': len(speedups),
+            'last_speedup': speedups[-1] if speedups else 0.0,
+            'mean_speedup': sum(speedups) / len(speedups) if speedups else 0.0,
+        }
+
+    def enable_separation_check(self, min_distance, **kwargs):
+        """开启逐帧最小间距检查：参与检查的是 separation_check 为True的子图案的发光体"""
+        self.separation_checker = SeparationChecker(min_distance, **kwargs)
+        return self.separation_checker
+
+    def _check_separation(self):
+        """检查所有参与检查的子图案的发光体，告警里的编号为 子图案类名#发光体序号"""
+        checked = [pattern for pattern in self.sub_patterns
+                   if getattr(pattern, 'separation_check', False) and hasattr(pattern, 'get_emitters')]
+        if not checked:
+            return 0
+
+        emitters = [pattern.get_emitters() for pattern in checked]
+        positions = [pattern_emitters[0] for pattern_emitters in emitters]
+        ids = np.concatenate([pattern_emitters[3] for pattern_emitters in emitters])
+        offsets = np.cumsum([0] + [len(p) for p in positions])
+        names = [pattern.__class__.__name__ for pattern in checked]
+
+        def labels(indices):
+            owners = np.searchsorted(offsets, indices, side='right') - 1
+            return [f"{names[owner]}#{emitter_id}"
+                    for owner, emitter_id in zip(owners.tolist(), ids.take(indices).tolist())]
+
+        return self.separation_checker.check(np.concatenate(positions), self.frame_count, labels)
+
     def set_pattern_weight(self, pattern, weight):
         """设置子图案的混合权重"""
         self.sub_pattern_weights[id(pattern)] = weight
 
+    @timed_stage("更新")
     def update(self, dt):
         """更新所有子图案 - 修复时间传递"""
-        current_time = time.time()
+        current_time = self.time_source()
 
         # 使用实际时间差，确保与帧率无关
         if self.last_update_time is not None:
@@ -225,74 +333,156 @@ class PatternComposite:
                 # 传递实际时间差，而不是主程序传递的dt
                 pattern.update(actual_dt)
 
+        if self.separation_checker is not None:
+            self._check_separation()
+
         return self.should_continue()
 
+    def quality_knobs(self):
+        """可由画质调节器（quality_governor.py）降级的参数，子图案的参数由调节器另行收集
+
+        子图案的加权混合决定各子图案的亮度比例，属于节目内容，不参与降级
+        """
+        return [
+            QualityKnob(self, 'glow_ring_spacing', (10, 20, 40), name="复合图案光晕圆环间距"),
+            QualityKnob(self, 'effects_scale', (1.0, 0.5), name="复合图案光晕缓冲分辨率"),
+        ]
+
+    def get_emitters(self):
+        """合并所有子图案的发光体，亮度按子图案混合权重缩放
+
+        编号为 子图案序号 << CHILD_ID_BITS | 子图案内的编号，子图案只增不删，序号不变
+        """
+        positions, colors, brightness, ids = [], [], [], []
+        for child_index, pattern in enumerate(self.sub_patterns):
+            if not hasattr(pattern, 'get_emitters'):
+                continue
+            weight = self.sub_pattern_weights.get(id(pattern), 1.0)
+            pattern_positions, pattern_colors, pattern_brightness, pattern_ids = pattern.get_emitters()
+            positions.append(pattern_positions)
+            colors.append(pattern_colors)
+            brightness.append(pattern_brightness * weight)
+            ids.append((child_index << CHILD_ID_BITS) | pattern_ids.astype(np.uint32))
+
+        if not positions:
+            return (np.zeros((0, 2), np.float32), np.zeros((0, 3), np.uint8), np.zeros(0, np.float32),
+                    np.zeros(0, np.uint32))
+        return (np.concatenate(positions).astype(np.float32),
+                np.concatenate(colors).astype(np.uint8),
+                np.concatenate(brightness).astype(np.float32),
+                np.concatenate(ids).astype(np.uint32))
+
+    def _get_layer_surface(self):
+        """获取子图案共用的绘制层（保持全透明）"""
+        return self.layer_surface
+
+    def _get_dirty_rects(self, pattern, layer):
+        """获取子图案本帧绘制过的区域，不支持脏矩形的图案视为整个层"""
+        rects = getattr(pattern, 'dirty_rects', None)
+        if rects is None:
+            return [layer.get_rect()]
+        return merge_dirty_rects(rects, bounds=layer.get_rect())
+
     def draw_basic_elements(self, surface):
         """绘制基础元素 - 叠加所有子图案"""
-        surface.fill((0, 0, 0, 0))  # 透明背景
+        self.dirty_rects = []
+        if self.clear_on_draw:
+            surface.fill((0, 0, 0, 0))  # 透明背景
 
-        # 绘制每个子图案到临时表面，然后混合
-        for pattern in self.sub_patterns:
-            # 创建临时表面用于子图案绘制
-            temp_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-
-            # 检查图案是否有draw_basic_elements方法
-            if hasattr(pattern, 'draw_basic_elements'):
-                pattern.draw_basic_elements(temp_surface)
-            elif hasattr(pattern, 'draw_final'):
-                # 如果只有draw_final方法，使用它
-                pattern.draw_final(temp_surface)
-            else:
-                # 如果都没有，跳过这个图案
-                continue
+        if self.executor is not None:
+            self._draw_sub_patterns_parallel(surface)
+            return
 
-            # 应用权重混合
-            weight = self.sub_pattern_weights.get(id(pattern), 1.0)
+        # 每个子图案绘制到共用层上，只对其脏矩形做加权、混合和清除
+        layer = self._get_layer_surface()
+        for pattern in self.sub_patterns:
+            if self._draw_sub_pattern(pattern, layer):
+                self._composite_layer(pattern, layer, surface)
+                # 把绘制过的区域恢复为透明，供下一个子图案使用
+                for rect in self._get_dirty_rects(pattern, layer):
+                    layer.fill((0, 0, 0, 0), rect)
+
+    @staticmethod
+    def _draw_sub_pattern(pattern, layer):
+        """把子图案绘制到layer上，子图案不支持绘制时返回False"""
+        # 检查图案是否有draw_basic_elements方法
+        if hasattr(pattern, 'draw_basic_elements'):
+            pattern.draw_basic_elements(layer)
+        elif hasattr(pattern, 'draw_final'):
+            # 如果只有draw_final方法，使用它
+            pattern.draw_final(layer)
+        else:
+            # 如果都没有，跳过这个图案
+            return False
+        return True
+
+    def _composite_layer(self, pattern, layer, surface):
+        """把子图案的层按权重混合到主表面（只处理脏矩形）"""
+        weight = self.sub_pattern_weights.get(id(pattern), 1.0)
+        for rect in self._get_dirty_rects(pattern, layer):
+            # 应用权重混合 - 调整透明度
             if weight < 1.0:
-                # 调整透明度
-                temp_surface.fill((255, 255, 255, int(255 * weight)),
-                                  special_flags=pygame.BLEND_RGBA_MULT)
-
-            # 混合到主表面
-            surface.blit(temp_surface, (0, 0))
+                layer.fill((255, 255, 255, int(255 * weight)), rect,
+                           special_flags=pygame.BLEND_RGBA_MULT)
+            self.dirty_rects.append(surface.blit(layer, rect.topleft, area=rect))
+
+    def _draw_sub_patterns_parallel(self, surface):
+        """线程池并行模式：各子图案同时绘制到独立的池化表面，再按添加顺序合成"""
+        layers = [self.surface_pool.acquire((self.width, self.height)) for _ in self.sub_patterns]
+        perf_counter = time.perf_counter
+
+        def render(pattern, layer):
+            start = perf_counter()
+            drawn = self._draw_sub_pattern(pattern, layer)
+            return drawn, perf_counter() - start
+
+        start = perf_counter()
+        results = list(self.executor.map(render, self.sub_patterns, layers))
+        wall_time = perf_counter() - start
+        if wall_time > 0:
+            self.parallel_speedups.append(sum(duration for _, duration in results) / wall_time)
+
+        # 合成顺序与逐个绘制模式相同，结果逐像素一致
+        for pattern, layer, (drawn, _) in zip(self.sub_patterns, layers, results):
+            if drawn:
+                self._composite_layer(pattern, layer, surface)
+            self.surface_pool.release(layer)
 
     def apply_effects(self, surface):
         """应用特效到复合图案"""
-        # 添加全局光晕效果
-        glow_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-
-        # 在图案中心添加光晕
+        # 添加全局光晕效果：光晕缓冲只覆盖光晕圆环所在的正方形，画质降级时在缩小的缓冲上绘制
         center_x, center_y = self.width // 2, self.height // 2
         max_radius = min(self.width, self.height) // 3
+        box = 2 * max_radius + 2
+        scale = self.effects_scale
+        glow_size = max(1, int(box * scale))
+        glow_surface = self.surface_pool.acquire((glow_size, glow_size))
 
-        for radius in range(20, max_radius, 10):
+        # 在图案中心添加光晕
+        for radius in range(20, max_radius, self.glow_ring_spacing):
             alpha = 50 - radius // 5
             if alpha > 0:
                 pygame.draw.circle(glow_surface, (255, 255, 255, alpha),
-                                   (center_x, center_y), radius, 2)
-
-        surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2)
+                                   (int(box // 2 * scale), int(box // 2 * scale)), int(radius * scale),
+                                   max(1, int(2 * scale)))
+
+        position = (center_x - box // 2, center_y - box // 2)
+        if scale != 1.0:
+            scaled = self.surface_pool.acquire((box, box), clear=False)
+            pygame.transform.scale(glow_surface, (box, box), scaled)
+            surface.blit(scaled, position, special_flags=pygame.BLEND_ALPHA_SDL2)
+            self.surface_pool.release(scaled)
+        else:
+            surface.blit(glow_surface, position, special_flags=pygame.BLEND_ALPHA_SDL2)
+        self.surface_pool.release(glow_surface)
 
     def draw_debug(self, surface):
         """调试模式下的绘制"""
         if not self.debug_mode:
             return
 
-        # 左侧：基础图形
-        self.buffer_surface.fill((0, 0, 0, 0))
-        self.draw_basic_elements(self.buffer_surface)
-
-        # 右侧：基础图形 + 特效
-        self.final_surface.fill((0, 0, 0, 0))
-        self.final_surface.blit(self.buffer_surface, (0, 0))
-        self.apply_effects(self.final_surface)
-
-        # 合并到主surface
-        surface.blit(self.buffer_surface, (0, 0))
-        surface.blit(self.final_surface, (self.width // 2, 0))
-
-        # 绘制调试信息
-        self._draw_debug_info(surface)
+        # 左侧基础图形，右侧基础图形 + 特效，最后叠加调试信息；基础图层每帧只画一次（见 render_graph.py）
+        self.render_graph.present(surface, self.debug_views)
 
     def draw_final(self, surface):
         """被调用模式下的最终绘制"""
@@ -303,20 +493,25 @@ class PatternComposite:
 
     def _draw_debug_info(self, surface):
         """绘制调试信息"""
-        font = self.get_chinese_font(16)
-
         # 计算剩余时间
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = self.time_source() - self.start_time
         remaining_time = max(0, self.get_duration() - elapsed_time)
 
+        # 标签和数值分开缓存，只有数值变化时才重新渲染
         info_lines = [
-            f"图案: 复合图案",
-            f"帧数: {self.frame_count}",
-            f"运行时间: {elapsed_time:.1f}秒",
-            f"剩余时间: {remaining_time:.1f}秒",
-            f"调试模式: {self.debug_mode}",
-            f"子图案数量: {len(self.sub_patterns)}"
+            "图案: 复合图案",
+            ("帧数: ", f"{self.frame_count}"),
+            ("运行时间: ", f"{elapsed_time:.1f}秒"),
+            ("剩余时间: ", f"{remaining_time:.1f}秒"),
+            ("调试模式: ", f"{self.debug_mode}"),
+            ("子图案数量: ", f"{len(self.sub_patterns)}")
         ]
+        if self.executor is not None:
+            stats = self.parallel_stats()
+            info_lines.append(("并行加速: ", f"{stats['last_speedup']:.2f}x ({stats['workers']}线程)"))
+        if self.separation_checker is not None:
+            stats = self.separation_checker.stats()
+            info_lines.append(("间距告警帧: ", f"{stats['frames_with_violations']}/{stats['frames_checked']}"))
 
         # 显示每个子图案的权重
         for i, pattern in enumerate(self.sub_patterns):
@@ -324,9 +519,7 @@ class PatternComposite:
             pattern_name = pattern.__class__.__name__
             info_lines.append(f"图案{i + 1}: {pattern_name} (权重: {weight:.1f})")
 
-        for i, line in enumerate(info_lines):
-            text = font.render(line, True, (255, 255, 255))
-            surface.blit(text, (10, 10 + i * 25))
+        self.hud.draw_lines(surface, info_lines + self.hud.stage_lines(), (10, 10))
 
     def get_duration(self):
         """返回图案建议持续时间"""
@@ -336,9 +529,10 @@ class PatternComposite:
         """判断是否应该继续运行 - 使用准确的时间计算"""
         if self.start_time is None:
             return True
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = self.time_source() - self.start_time
         return elapsed_time < self.get_duration()
 
     def stop(self):
         """停止图案运行"""
-        self.running = False
\ No newline at end of file
+        self.running = False
+        self.disable_parallel()
\ No newline at end of file
@@ -6,32 +6,52 @@
 
 import pygame
 import math
+import os
 import random
+import sys
 import time
 
+import numpy as np
+
+# 添加当前目录到Python路径，确保可以导入辅助模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from debug_hud import DebugHud, timed_stage, get_font
+from lazy_surfaces import LazySurface, release_surfaces
+from render_graph import buffer_surface, pattern_graph, split_screen_views
+from quality_governor import QualityKnob
+from gradients import tapered_beam, tint_white
+from sprite_cache import get_shared_glow_cache
+from surface_pool import get_shared_surface_pool
+
 
 class PatternNeon:
     """霓虹探照灯图案 - 修复旋转速度问题"""
 
-    def __init__(self, width, height, debug_mode=False):
+    # 绘制表面第一次使用时才分配（见 lazy_surfaces.py），作为复合图案的子图案时会被释放
+    buffer_surface = LazySurface()
+    final_surface = LazySurface()
+
+    def __init__(self, width, height, debug_mode=False, seed=None):
         self.width = width
         self.height = height
         self.debug_mode = debug_mode
         self.frame_count = 0
+        self.render_alpha = 1.0  # 渲染插值系数：0为上一步状态，1为当前状态（见 simulation_loop.py）
         self.running = True
-        self.start_time = time.time()
-        self.last_update_time = time.time()
-
-        # 创建绘制表面
-        if self.debug_mode:
-            self.buffer_surface = pygame.Surface((width // 2, height))
-            self.final_surface = pygame.Surface((width // 2, height))
-        else:
-            self.buffer_surface = pygame.Surface((width, height))
-            self.final_surface = pygame.Surface((width, height))
-
-        self.buffer_surface = self.buffer_surface.convert_alpha()
-        self.final_surface = self.final_surface.convert_alpha()
+        self.rng = random.Random(seed)  # 独立的随机数流，给定seed时节目可复现
+        self.clear_on_draw = True  # 作为复合图案的子图案时由父图案负责清除
+        self.dirty_rects = []  # 本帧 draw_basic_elements 绘制过的区域
+        self.beam_scale = 1.0  # 光束纹理分辨率，低于1时先按低分辨率旋转再放大（画质调节参数）
+        self.time_source = time.time  # 时间源，离屏渲染时可注入模拟时钟
+        self.start_time = self.time_source()
+        self.last_update_time = self.time_source()
+
+        # 共享的光晕精灵缓存
+        self.glow_cache = get_shared_glow_cache()
+        self.surface_pool = get_shared_surface_pool()
 
         # 霓虹灯相关变量 - 调整速度参数
         self.beams = []
@@ -39,78 +59,54 @@ class PatternNeon:
         self.color_cycle_speed = 0.02  # 降低颜色变化速度：从0.08降到0.02
         self.current_rotation = 0
         self.color_phase = 0
+        self.prev_rotation = 0  # 上一步的旋转和颜色相位，用于渲染插值
+        self.prev_color_phase = 0
+
+        # 调试信息层（字体和文字缓存），调试模式下记录更新阶段耗时（见 update 上的 timed_stage）
+        self.hud = DebugHud(font_size=16, line_height=20)
+
+        # 调试分屏的渲染图：左右窗格共用同一份基础图层，光束预览是左侧窗格上的叠加层
+        self.debug_previews = []  # 本帧基础图层生成的光束预览（表面池借出，叠加层绘制后归还）
+        self.render_graph = pattern_graph(self)
+        self.render_graph.add_node('base', PatternNeon._draw_base_layer, surface=buffer_surface, stage="基础绘制")
+        self.render_graph.add_node('previews', PatternNeon._draw_beam_previews)
+        self.debug_views = split_screen_views(self, overlays=('previews',))
 
     def get_chinese_font(self, size=16):
         """获取支持中文的字体"""
-        try:
-            font_path = "C:/Windows/Fonts/simhei.ttf"
-            return pygame.font.Font(font_path, size)
-        except:
-            return pygame.font.Font(None, size)
+        # 进程级字体缓存，避免每帧从磁盘重新打开字体
+        return get_font(size)
 
     def draw_simple_beam(self, surface, start_pos, angle, length, start_width, end_width, color,
-                         alpha_range=(0.3, 0.8)):
-        """简单但可靠的光束绘制方法"""
+                         alpha_range=(0.3, 0.8), texture_length=None):
+        """简单但可靠的光束绘制方法 - 使用缓存的锥形渐变纹理"""
+        # 白色基础纹理只和光束形状有关（按 texture_length 生成一次），沿x轴从起点指向终点；
+        # 每帧把它拉伸到当前脉冲长度、乘上颜色、再旋转，颜色和长度变化都不会产生新纹理
+        scale = self.beam_scale
+        texture = tapered_beam((texture_length or length) * scale, start_width * scale, end_width * scale,
+                               (255, 255, 255), alpha_range)
+        beam = tint_white(pygame.transform.scale(texture, (max(1, round(length * scale)), texture.get_height())),
+                          color)
+        rotated = pygame.transform.rotate(beam, angle)
+        if scale != 1.0:
+            rotated = pygame.transform.scale_by(rotated, 1 / scale)
+
+        # 纹理中心对应光束中点
         angle_rad = math.radians(angle)
+        mid_x = start_pos[0] + math.cos(angle_rad) * length / 2
+        mid_y = start_pos[1] - math.sin(angle_rad) * length / 2  # Pygame Y轴向下
 
-        # 计算光束端点
-        end_x = start_pos[0] + math.cos(angle_rad) * length
-        end_y = start_pos[1] - math.sin(angle_rad) * length  # Pygame Y轴向下
-
-        # 计算垂直方向
-        perp_angle = angle_rad + math.pi / 2
-        perp_x = math.cos(perp_angle)
-        perp_y = -math.sin(perp_angle)
+        beam_rect = surface.blit(rotated, rotated.get_rect(center=(mid_x, mid_y)))
+        self.dirty_rects.append(beam_rect)
 
-        # 计算四个角点
-        half_start = start_width / 2
-        half_end = end_width / 2
-
-        points = [
-            (start_pos[0] + perp_x * half_start, start_pos[1] + perp_y * half_start),
-            (start_pos[0] - perp_x * half_start, start_pos[1] - perp_y * half_start),
-            (end_x - perp_x * half_end, end_y - perp_y * half_end),
-            (end_x + perp_x * half_end, end_y + perp_y * half_end)
-        ]
+        # 返回调试用的简单图形 - 只在调试模式下生成，使用后由draw_debug归还表面池
+        if not self.debug_mode:
+            return None, None
 
-        # 绘制渐变多边形
-        steps = 10
-        for i in range(steps):
-            t1 = i / steps
-            t2 = (i + 1) / steps
-
-            # 计算当前段的四个点
-            segment_points = [
-                (
-                    points[0][0] * (1 - t1) + points[3][0] * t1,
-                    points[0][1] * (1 - t1) + points[3][1] * t1
-                ),
-                (
-                    points[1][0] * (1 - t1) + points[2][0] * t1,
-                    points[1][1] * (1 - t1) + points[2][1] * t1
-                ),
-                (
-                    points[1][0] * (1 - t2) + points[2][0] * t2,
-                    points[1][1] * (1 - t2) + points[2][1] * t2
-                ),
-                (
-                    points[0][0] * (1 - t2) + points[3][0] * t2,
-                    points[0][1] * (1 - t2) + points[3][1] * t2
-                )
-            ]
-
-            # 计算当前段的alpha值
-            current_alpha = int(255 * (alpha_range[0] + (alpha_range[1] - alpha_range[0]) * (1 - t1)))
-
-            # 绘制四边形
-            if len(segment_points) == 4:
-                pygame.draw.polygon(surface, (*color, current_alpha), segment_points)
-
-        # 返回调试用的简单图形
-        debug_buffer = pygame.Surface((60, 60), pygame.SRCALPHA)
+        debug_buffer = self.surface_pool.acquire((60, 60))
         pygame.draw.circle(debug_buffer, (*color, 180), (30, 30), 25)
 
-        debug_radius = pygame.Surface((50, 20), pygame.SRCALPHA)
+        debug_radius = self.surface_pool.acquire((50, 20), clear=False)
         debug_radius.fill((*color, 180))
 
         return debug_buffer, debug_radius
@@ -134,11 +130,13 @@ class PatternNeon:
         print("霓虹探照灯图案初始化完成")
 
         # 重置时间跟踪
-        self.start_time = time.time()
-        self.last_update_time = time.time()
+        self.start_time = self.time_source()
+        self.last_update_time = self.time_source()
         self.frame_count = 0
         self.current_rotation = 0
         self.color_phase = 0
+        self.prev_rotation = 0
+        self.prev_color_phase = 0
 
         self.beams = []
         center_x, center_y = self.width // 2, self.height // 2
@@ -169,9 +167,30 @@ class PatternNeon:
             }
         ]
 
+    def setup_beams(self, count):
+        """排成count道探照灯（沿画面中线等距排开，左右交替、颜色轮换），用于测试几十道光束的情况"""
+        center_y = self.height // 2
+        spacing = self.width / count
+        color_types = ('rainbow', 'warm', 'cool')
+        self.beams = [
+            {
+                'start_pos': (int(spacing * (i + 0.5)), center_y),
+                'base_angle': 45 if i % 2 == 0 else 135,
+                'length': 400,
+                'start_width': 20,
+                'end_width': 80,
+                'color_type': color_types[i % len(color_types)],
+                'alpha_range': (0.3, 0.6),
+                'rotation_offset': i * 360 / count,
+                'pulse_speed': 0.5 + 0.1 * (i % 5)
+            }
+            for i in range(count)
+        ]
+
+    @timed_stage("更新")
     def update(self, dt):
         """更新霓虹灯动画 - 修复时间计算"""
-        current_time = time.time()
+        current_time = self.time_source()
 
         # 使用实际时间差，确保与帧率无关
         if hasattr(self, 'last_update_time'):
@@ -183,33 +202,61 @@ class PatternNeon:
 
         self.frame_count += 1
 
-        # 使用实际时间计算旋转和颜色变化
+        # 使用实际时间计算旋转和颜色变化，保留上一步状态用于渲染插值
+        self.prev_rotation = self.current_rotation
+        self.prev_color_phase = self.color_phase
         self.current_rotation += self.rotation_speed * actual_dt * 30  # 进一步降低速度系数
         self.color_phase += self.color_cycle_speed * actual_dt * 30  # 进一步降低速度系数
 
         if self.current_rotation >= 360:
             self.current_rotation -= 360
+            self.prev_rotation -= 360  # 一起回绕，插值不会跨过一整圈
 
         return self.should_continue()
 
+    def get_beam_state(self, beam_config, t=1.0):
+        """光束的角度、长度和颜色：t 为渲染插值系数，1为当前状态（绘制时传入 render_alpha）"""
+        rotation = self.prev_rotation + (self.current_rotation - self.prev_rotation) * t
+        base_color_phase = self.prev_color_phase + (self.color_phase - self.prev_color_phase) * t
+
+        # 计算当前角度
+        current_angle = (beam_config['base_angle'] +
+                         rotation +
+                         beam_config['rotation_offset'])
+
+        # 计算脉冲效果 - 使用更慢的速度（帧数同样按 t 插值）
+        pulse_frame = self.frame_count - 1 + t
+        pulse_factor = 0.8 + 0.2 * math.sin(pulse_frame * 0.02 * beam_config['pulse_speed'])  # 降低脉冲幅度和速度
+        current_length = beam_config['length'] * pulse_factor
+
+        # 获取当前颜色
+        color_phase = base_color_phase + beam_config['rotation_offset'] * 0.005  # 降低颜色变化关联
+        color = self.get_cycling_color(color_phase, beam_config['color_type'])
+
+        return current_angle, current_length, color
+
+    def quality_knobs(self):
+        """可由画质调节器（quality_governor.py）降级的参数，按降级顺序排列"""
+        return [QualityKnob(self, 'beam_scale', (1.0, 0.5), name="霓虹灯光束分辨率", stage='basic')]
+
+    def get_emitters(self):
+        """返回当前帧的发光体（无人机）状态：位置 (N,2)、颜色 (N,3)、亮度 (N,)、稳定编号 (N,)，用于轨迹导出"""
+        # 每道光束的发射点是一架无人机，亮度取光束起点的透明度
+        positions = np.array([beam['start_pos'] for beam in self.beams], dtype=np.float32).reshape(-1, 2)
+        colors = np.array([self.get_beam_state(beam)[2] for beam in self.beams], dtype=np.uint8).reshape(-1, 3)
+        brightness = np.array([beam['alpha_range'][1] for beam in self.beams], dtype=np.float32)
+        ids = np.arange(len(self.beams), dtype=np.uint32)  # 光束整组设置、不单独增删，序号即稳定编号
+        return positions, colors, brightness, ids
+
     def draw_basic_elements(self, surface):
         """绘制基础光束"""
-        surface.fill((0, 0, 0, 0))
+        self.dirty_rects = []
+        if self.clear_on_draw:
+            surface.fill((0, 0, 0, 0))
         gradient_data = []
 
         for beam_config in self.beams:
-            # 计算当前角度
-            current_angle = (beam_config['base_angle'] +
-                             self.current_rotation +
-                             beam_config['rotation_offset'])
-
-            # 计算脉冲效果 - 使用更慢的速度
-            pulse_factor = 0.8 + 0.2 * math.sin(self.frame_count * 0.02 * beam_config['pulse_speed'])  # 降低脉冲幅度和速度
-            current_length = beam_config['length'] * pulse_factor
-
-            # 获取当前颜色
-            color_phase = self.color_phase + beam_config['rotation_offset'] * 0.005  # 降低颜色变化关联
-            color = self.get_cycling_color(color_phase, beam_config['color_type'])
+            current_angle, current_length, color = self.get_beam_state(beam_config, self.render_alpha)
 
             # 绘制光束
             buffer, radius = self.draw_simple_beam(
@@ -220,7 +267,8 @@ class PatternNeon:
                 beam_config['start_width'],
                 beam_config['end_width'],
                 color,
-                beam_config['alpha_range']
+                beam_config['alpha_range'],
+                beam_config['length']
             )
             gradient_data.append((buffer, radius, color))
 
@@ -230,46 +278,38 @@ class PatternNeon:
         """应用特效 - 减弱效果"""
         if not self.debug_mode:
             # 添加简单的光晕效果 - 减弱
-            glow_surface = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
             center_x, center_y = surface.get_width() // 2, surface.get_height() // 2
 
-            pygame.draw.circle(glow_surface, (255, 255, 255, 40),  # 降低光晕强度
-                               (center_x, center_y), 80)  # 减小光晕半径
-
-            surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+            # 光晕以外的区域叠加的是0，直接叠加缓存精灵即可，无需全屏临时表面
+            self.glow_cache.blit_glow(surface, (center_x, center_y), 80,  # 减小光晕半径
+                                      (255, 255, 255), 40,  # 降低光晕强度
+                                      special_flags=pygame.BLEND_RGB_ADD, quantize=False)
 
     def draw_debug(self, surface):
         """调试模式下的绘制"""
         if not self.debug_mode:
             return
 
-        # 左侧：基础图形和调试信息
-        self.buffer_surface.fill((20, 20, 40, 255))
-        gradient_data = self.draw_basic_elements(self.buffer_surface)
+        # 左侧基础图形，右侧基础图形 + 特效，最后叠加调试信息；基础图层每帧只画一次（见 render_graph.py）
+        self.render_graph.present(surface, self.debug_views)
+
+    def _draw_base_layer(self, target):
+        """渲染图的基础图层，同时记下本帧的光束预览"""
+        target.fill((0, 0, 0, 0))
+        self.debug_previews = self.draw_basic_elements(target)
 
-        # 在左侧显示调试信息
+    def _draw_beam_previews(self, surface, position):
+        """在左侧窗格上显示各光束的颜色预览，并归还预览表面"""
+        x, y = position
         buffer_y = 50
-        for i, (gradient_buffer, radius_surface, color) in enumerate(gradient_data):
-            font = self.get_chinese_font(16)
-            color_names = ["彩虹色", "暖色调"]
-            text = font.render(f"光束 {i + 1}", True, (255, 255, 255))
-            self.buffer_surface.blit(text, (20, buffer_y - 25))
-
-            # 显示颜色预览
-            self.buffer_surface.blit(gradient_buffer, (30, buffer_y))
+        for i, (gradient_buffer, radius_surface, color) in enumerate(self.debug_previews):
+            self.hud.draw_lines(surface, [f"光束 {i + 1}"], (x + 20, y + buffer_y - 25))
+            surface.blit(gradient_buffer, (x + 30, y + buffer_y))
             buffer_y += gradient_buffer.get_height() + 50
 
-        # 右侧：最终效果
-        self.final_surface.fill((10, 10, 30, 255))
-        self.draw_basic_elements(self.final_surface)
-        self.apply_effects(self.final_surface)
-
-        # 合并到主surface
-        surface.blit(self.buffer_surface, (0, 0))
-        surface.blit(self.final_surface, (self.width // 2, 0))
-
-        # 绘制调试信息
-        self._draw_debug_info(surface)
+            self.surface_pool.release(gradient_buffer)
+            self.surface_pool.release(radius_surface)
+        self.debug_previews = []
 
     def draw_final(self, surface):
         """最终绘制模式"""
@@ -280,28 +320,25 @@ class PatternNeon:
 
     def _draw_debug_info(self, surface):
         """绘制调试信息"""
-        font = self.get_chinese_font(16)
-
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = self.time_source() - self.start_time
         remaining_time = max(0, self.get_duration() - elapsed_time)
 
+        # 标签和数值分开缓存，只有数值变化时才重新渲染
         info_lines = [
-            f"图案: 霓虹探照灯(慢速)",
-            f"帧数: {self.frame_count}",
-            f"旋转: {self.current_rotation:.1f}°",
-            f"光束: {len(self.beams)}",
-            f"速度: {self.rotation_speed:.1f}°/帧"
+            "图案: 霓虹探照灯(慢速)",
+            ("帧数: ", f"{self.frame_count}"),
+            ("旋转: ", f"{self.current_rotation:.1f}°"),
+            ("光束: ", f"{len(self.beams)}"),
+            ("速度: ", f"{self.rotation_speed:.1f}°/帧")
         ]
 
-        for i, line in enumerate(info_lines):
-            text = font.render(line, True, (255, 255, 255))
-            surface.blit(text, (10, 10 + i * 20))
+        self.hud.draw_lines(surface, info_lines + self.hud.stage_lines(), (10, 10))
 
     def get_duration(self):
         return 10.0
 
     def should_continue(self):
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = self.time_source() - self.start_time
         return elapsed_time < self.get_duration()
 
     def stop(self):
@@ -313,12 +350,5 @@ class PatternNeon:
 
         self.debug_mode = debug_mode
 
-        if self.debug_mode:
-            self.buffer_surface = pygame.Surface((self.width // 2, self.height))
-            self.final_surface = pygame.Surface((self.width // 2, self.height))
-        else:
-            self.buffer_surface = pygame.Surface((self.width, self.height))
-            self.final_surface = pygame.Surface((self.width, self.height))
-
-        self.buffer_surface = self.buffer_surface.convert_alpha()
-        self.final_surface = self.final_surface.convert_alpha()
\ No newline at end of file
+        # 表面尺寸随调试模式变化：释放后下次使用时按新尺寸重新分配
+        release_surfaces(self)
\ No newline at end of file
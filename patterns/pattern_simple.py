@@ -7,59 +7,92 @@
 import pygame
 import random
 import math
+import os
+import sys
+
+import numpy as np
+
+# 添加当前目录到Python路径，确保可以导入辅助模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from sprite_cache import get_shared_glow_cache
+from debug_hud import DebugHud, timed_stage
+from lazy_surfaces import LazySurface
+from render_graph import pattern_graph, split_screen_views
+from surface_pool import get_shared_surface_pool
+from point_splat import glow_layer
 
 
 class PatternSimple:
     """简单测试图案"""
 
-    def __init__(self, width, height, debug_mode=False):
+    # 绘制表面第一次使用时才分配（见 lazy_surfaces.py），作为复合图案的子图案时会被释放
+    buffer_surface = LazySurface()
+    final_surface = LazySurface()
+
+    def __init__(self, width, height, debug_mode=False, seed=None):
         self.width = width
         self.height = height
         self.debug_mode = debug_mode
         self.is_first_call = True
         self.frame_count = 0
+        self.elapsed_time = 0.0  # 累计模拟时间（秒）
+        self.render_alpha = 1.0  # 渲染插值系数：0为上一步状态，1为当前状态（见 simulation_loop.py）
         self.running = True
+        self.rng = random.Random(seed)  # 独立的随机数流，给定seed时节目可复现
+        self.clear_on_draw = True  # 作为复合图案的子图案时由父图案负责清除
+        self.dirty_rects = []  # 本帧 draw_basic_elements 绘制过的区域
+        self.separation_check = True  # 发光体是实际的无人机，参与复合图案的最小间距检查
+        self.use_point_splat = False  # 圆圈几百个以上时光晕改用批量光晕层（point_splat.glow_layer）
 
-        # 创建绘制表面
-        if self.debug_mode:
-            self.buffer_surface = pygame.Surface((width // 2, height))
-            self.final_surface = pygame.Surface((width // 2, height))
-        else:
-            self.buffer_surface = pygame.Surface((width, height))
-            self.final_surface = pygame.Surface((width, height))
-
-        # 透明度支持
-        self.buffer_surface = self.buffer_surface.convert_alpha()
-        self.final_surface = self.final_surface.convert_alpha()
+        # 共享的光晕精灵缓存
+        self.glow_cache = get_shared_glow_cache()
+        self.surface_pool = get_shared_surface_pool()
 
         # 简单图案的变量
         self.circles = []
         self.setup_circles()
 
-    def setup_circles(self):
+        # 调试信息层（字体和文字缓存），调试模式下记录更新阶段耗时（见 update 上的 timed_stage）
+        self.hud = DebugHud(font_size=16, line_height=25, fallback_size=26)
+
+        # 调试分屏的渲染图：左右窗格共用同一份基础图层
+        self.render_graph = pattern_graph(self)
+        self.debug_views = split_screen_views(self)
+
+    def setup_circles(self, count=10):
         """设置圆圈"""
-        for i in range(10):
+        for i in range(count):
             self.circles.append({
-                'x': random.randint(50, self.width - 50),
-                'y': random.randint(50, self.height - 50),
-                'radius': random.randint(10, 40),
-                'color': (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255)),
-                'speed': random.uniform(0.5, 2.0),
-                'angle': random.uniform(0, 2 * math.pi)
+                'x': self.rng.randint(50, self.width - 50),
+                'y': self.rng.randint(50, self.height - 50),
+                'radius': self.rng.randint(10, 40),
+                'color': (self.rng.randint(100, 255), self.rng.randint(100, 255), self.rng.randint(100, 255)),
+                'speed': self.rng.uniform(0.5, 2.0),
+                'angle': self.rng.uniform(0, 2 * math.pi)
             })
+            self.circles[-1]['prev_x'] = self.circles[-1]['x']
+            self.circles[-1]['prev_y'] = self.circles[-1]['y']
 
     def initialize(self):
         """初始化"""
         print("简单图案初始化完成")
 
+    @timed_stage("更新")
     def update(self, dt):
-        """更新逻辑"""
+        """更新逻辑 - 按时间推进，与帧率无关"""
         self.frame_count += 1
+        self.elapsed_time += dt
+        step = dt * 60  # 速度按每帧(1/60秒)的像素数标定
 
-        # 移动圆圈
+        # 移动圆圈，保留上一步位置用于渲染插值
         for circle in self.circles:
-            circle['x'] += math.cos(circle['angle']) * circle['speed']
-            circle['y'] += math.sin(circle['angle']) * circle['speed']
+            circle['prev_x'] = circle['x']
+            circle['prev_y'] = circle['y']
+            circle['x'] += math.cos(circle['angle']) * circle['speed'] * step
+            circle['y'] += math.sin(circle['angle']) * circle['speed'] * step
 
             # 边界检测
             if circle['x'] < circle['radius'] or circle['x'] > self.width - circle['radius']:
@@ -67,48 +100,69 @@ class PatternSimple:
             if circle['y'] < circle['radius'] or circle['y'] > self.height - circle['radius']:
                 circle['angle'] = -circle['angle']
 
-        return self.frame_count < 300  # 运行5秒（60fps * 5）
+        return self.should_continue()
+
+    def get_emitters(self):
+        """返回当前帧的发光体（无人机）状态：位置 (N,2)、颜色 (N,3)、亮度 (N,)、稳定编号 (N,)，用于轨迹导出"""
+        positions = np.array([(circle['x'], circle['y']) for circle in self.circles], dtype=np.float32)
+        colors = np.array([circle['color'] for circle in self.circles], dtype=np.uint8)
+        brightness = np.ones(len(self.circles), dtype=np.float32)
+        ids = np.arange(len(self.circles), dtype=np.uint32)  # 圆圈只增不删，序号即稳定编号
+        return positions.reshape(-1, 2), colors.reshape(-1, 3), brightness, ids
+
+    def render_position(self, circle):
+        """圆圈的渲染位置：按 render_alpha 在上一步和当前步之间插值"""
+        t = self.render_alpha
+        if t >= 1.0:
+            return circle['x'], circle['y']
+        return (circle['prev_x'] + (circle['x'] - circle['prev_x']) * t,
+                circle['prev_y'] + (circle['y'] - circle['prev_y']) * t)
+
+    def render_positions(self):
+        """所有圆圈的渲染位置 (N,2)"""
+        positions = [self.render_position(circle) for circle in self.circles]
+        return np.array(positions, dtype=np.float32).reshape(-1, 2)
 
     def draw_basic_elements(self, surface):
         """绘制基础元素"""
-        surface.fill((0, 0, 0, 0))  # 透明背景
+        self.dirty_rects = []
+        if self.clear_on_draw:
+            surface.fill((0, 0, 0, 0))  # 透明背景
 
-        # 绘制所有圆圈
+        # 绘制所有圆圈：半径10-40的实心圆用 draw.circle 逐个画比 splat 快（splat 的核随半径平方增长），
+        # 开启 use_point_splat 时也只批量处理光晕
         for circle in self.circles:
-            pygame.draw.circle(surface, circle['color'],
-                               (int(circle['x']), int(circle['y'])),
-                               circle['radius'])
+            x, y = self.render_position(circle)
+            self.dirty_rects.append(pygame.draw.circle(surface, circle['color'], (int(x), int(y)),
+                                                       circle['radius']))
 
     def apply_effects(self, surface):
         """应用特效"""
         # 简单的光晕效果
-        glow_surface = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+        if self.use_point_splat:
+            if self.circles:
+                colors = self.get_emitters()[1]
+                positions = self.render_positions()
+                radius = np.mean([circle['radius'] for circle in self.circles]) + 10
+                layer = glow_layer(surface.get_size(), positions, colors, 50, radius)
+                surface.blit(layer, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2)
+            return
+
+        glow_surface = self.surface_pool.acquire(surface.get_size())
         for circle in self.circles:
-            pygame.draw.circle(glow_surface, (*circle['color'], 50),
-                               (int(circle['x']), int(circle['y'])),
-                               circle['radius'] + 10)
+            # 与直接 draw.circle 一样覆盖绘制，重叠处后画的光晕盖住先画的
+            self.glow_cache.blit_glow(glow_surface, self.render_position(circle),
+                                      circle['radius'] + 10, circle['color'], 50, quantize=False, overwrite=True)
         surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2)
+        self.surface_pool.release(glow_surface)
 
     def draw_debug(self, surface):
         """调试模式下的绘制"""
         if not self.debug_mode:
             return
 
-        # 左侧：基础图形
-        self.buffer_surface.fill((0, 0, 0, 0))
-        self.draw_basic_elements(self.buffer_surface)
-
-        # 右侧：基础图形 + 特效
-        self.final_surface.fill((0, 0, 0, 0))
-        self.final_surface.blit(self.buffer_surface, (0, 0))
-        self.apply_effects(self.final_surface)
-
-        # 合并到主surface
-        surface.blit(self.buffer_surface, (0, 0))
-        surface.blit(self.final_surface, (self.width // 2, 0))
-
-        # 绘制调试信息
-        self._draw_debug_info(surface)
+        # 左侧基础图形，右侧基础图形 + 特效，最后叠加调试信息；基础图层每帧只画一次（见 render_graph.py）
+        self.render_graph.present(surface, self.debug_views)
 
     def draw_final(self, surface):
         """被调用模式下的最终绘制"""
@@ -119,27 +173,15 @@ class PatternSimple:
 
     def _draw_debug_info(self, surface):
         """绘制调试信息"""
-        # 显示当前图案信息
-        try:
-            # 使用系统中文字体
-            font_path = "C:/Windows/Fonts/simhei.ttf"
-            font = pygame.font.Font(font_path, 16)
-        except:
-            # 备用方案
-            font = pygame.font.Font(None, 26)
-
-        # font = pygame.font.Font(None, 24)
-
+        # 显示当前图案信息 - 标签和数值分开缓存，只有数值变化时才重新渲染
         info_lines = [
-            f"图案: Simple",
-            f"帧数: {self.frame_count}",
-            f"调试模式: {self.debug_mode}",
-            f"圆圈数量: {len(self.circles)}"
+            "图案: Simple",
+            ("帧数: ", f"{self.frame_count}"),
+            ("调试模式: ", f"{self.debug_mode}"),
+            ("圆圈数量: ", f"{len(self.circles)}")
         ]
 
-        for i, line in enumerate(info_lines):
-            text = font.render(line, True, (255, 255, 255))
-            surface.blit(text, (10, 10 + i * 25))
+        self.hud.draw_lines(surface, info_lines + self.hud.stage_lines(), (10, 10))
 
     def get_duration(self):
         """返回图案建议持续时间"""
@@ -147,7 +189,7 @@ class PatternSimple:
 
     def should_continue(self):
         """判断是否应该继续运行"""
-        return self.frame_count * 0.016 < self.get_duration()
+        return self.elapsed_time < self.get_duration()
 
     def stop(self):
         """停止图案运行"""
@@ -7,30 +7,48 @@
 import pygame
 import math
 import random
+import os
+import sys
+
+import numpy as np
+
+# 添加当前目录到Python路径，确保可以导入辅助模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from sprite_cache import get_shared_glow_cache
+from debug_hud import DebugHud, timed_stage
+from lazy_surfaces import LazySurface
+from render_graph import pattern_graph, split_screen_views
+from surface_pool import get_shared_surface_pool
+from transform_stage import Affine2D, TransformStage
 
 
 class PatternStar:
     """星星图案"""
 
-    def __init__(self, width, height, debug_mode=False):
+    # 绘制表面第一次使用时才分配（见 lazy_surfaces.py），作为复合图案的子图案时会被释放
+    buffer_surface = LazySurface()
+    final_surface = LazySurface()
+
+    def __init__(self, width, height, debug_mode=False, seed=None):
         self.width = width
         self.height = height
         self.debug_mode = debug_mode
         self.is_first_call = True
         self.frame_count = 0
+        self.elapsed_time = 0.0  # 累计模拟时间（秒）
+        self.render_alpha = 1.0  # 渲染插值系数：0为上一步状态，1为当前状态（见 simulation_loop.py）
         self.running = True
+        self.rng = random.Random(seed)  # 独立的随机数流，给定seed时节目可复现
+        self.clear_on_draw = True  # 作为复合图案的子图案时由父图案负责清除
+        self.dirty_rects = []  # 本帧 draw_basic_elements 绘制过的区域
+        self.separation_check = True  # 发光体是实际的无人机，参与复合图案的最小间距检查
 
-        # 创建绘制表面
-        if self.debug_mode:
-            self.buffer_surface = pygame.Surface((width // 2, height))
-            self.final_surface = pygame.Surface((width // 2, height))
-        else:
-            self.buffer_surface = pygame.Surface((width, height))
-            self.final_surface = pygame.Surface((width, height))
-
-        # 透明度支持
-        self.buffer_surface = self.buffer_surface.convert_alpha()
-        self.final_surface = self.final_surface.convert_alpha()
+        # 共享的光晕精灵缓存
+        self.glow_cache = get_shared_glow_cache()
+        self.surface_pool = get_shared_surface_pool()
 
         # 星星相关变量
         self.star_points = []
@@ -38,95 +56,111 @@ class PatternStar:
         self.center_y = height // 2
         self.radius = min(width, height) // 3
         self.rotation = 0
+        self.prev_rotation = 0  # 上一步的旋转角度，用于渲染插值
+        self.formation = None  # 多星编队：每颗星相对中心的变换（以星星半径为单位），缺省为单颗
+        self.transform_stage = None  # 当前帧的顶点（绘制、特效和发光体导出共用）
+
+        # 调试信息层（字体和文字缓存），调试模式下记录更新阶段耗时（见 update 上的 timed_stage）
+        self.hud = DebugHud(font_size=16, line_height=25, fallback_size=26)
+
+        # 调试分屏的渲染图：左右窗格共用同一份基础图层
+        self.render_graph = pattern_graph(self)
+        self.debug_views = split_screen_views(self)
 
     def initialize(self):
         """初始化星星点阵"""
-        # 创建8角星的点
-        self.star_points = []
-        for i in range(16):  # 16个点（8个外角，8个内角）
-            angle = 2 * math.pi * i / 16
-            if i % 2 == 0:
-                # 外点
-                radius = self.radius
-            else:
-                # 内点
-                radius = self.radius * 0.4
-
-            x = self.center_x + radius * math.cos(angle)
-            y = self.center_y + radius * math.sin(angle)
-            self.star_points.append((x, y))
+        # 8角星的模型顶点：16个点（8个外角，8个内角），外半径1、内半径0.4，以原点为中心
+        angles = 2 * np.pi * np.arange(16) / 16
+        radii = np.where(np.arange(16) % 2 == 0, 1.0, 0.4)
+        self.star_points = np.stack([radii * np.cos(angles), radii * np.sin(angles)], axis=1)
+
+        self.transform_stage = TransformStage(self.star_points, self.formation)
+        self.update_transform()
 
         print("星星图案初始化完成")
 
+    def setup_formation(self, count):
+        """排成count颗星的编队（方阵，整体大小不变），用于测试上百个顶点的情况"""
+        side = math.ceil(math.sqrt(count))
+        scale = 1.0 / side
+        self.formation = [
+            Affine2D.translation((2 * (i % side) + 1) * scale - 1, (2 * (i // side) + 1) * scale - 1) @
+            Affine2D.scale(scale * 0.9)
+            for i in range(count)
+        ]
+        if self.transform_stage is not None:
+            self.transform_stage.set_instances(self.formation)
+
+    def update_transform(self, rotation=None):
+        """设置本帧的整体变换：缩放到星星半径、旋转（缺省为当前角度）、平移到画面中心"""
+        self.transform_stage.set_transform(
+            Affine2D.translation(self.center_x, self.center_y) @
+            Affine2D.rotation(self.rotation if rotation is None else rotation) @
+            Affine2D.scale(self.radius))
+
+    def get_rotated_points(self):
+        """当前旋转角度下的所有顶点位置 [(x, y), ...] - 每帧只做一次批量变换"""
+        return self.transform_stage.vertices()
+
+    @timed_stage("更新")
     def update(self, dt):
         """更新星星旋转"""
+        self.prev_rotation = self.rotation
         self.rotation += dt * 0.5  # 缓慢旋转
+        self.update_transform()
         self.frame_count += 1
-        return self.frame_count < 480  # 运行8秒（60fps * 8）
+        self.elapsed_time += dt
+        return self.should_continue()
+
+    def get_emitters(self):
+        """返回当前帧的发光体（无人机）状态：位置 (N,2)、颜色 (N,3)、亮度 (N,)、稳定编号 (N,)，用于轨迹导出"""
+        positions = self.transform_stage.flat_points().astype(np.float32)
+        colors = np.full((len(positions), 3), 255, dtype=np.uint8)
+        brightness = np.ones(len(positions), dtype=np.float32)
+        ids = np.arange(len(positions), dtype=np.uint32)  # 编队顶点顺序固定，序号即稳定编号
+        return positions, colors, brightness, ids
 
     def draw_basic_elements(self, surface):
         """绘制基础星星图形"""
-        surface.fill((0, 0, 0, 0))  # 透明背景
-
-        # 绘制星星轮廓
-        rotated_points = []
-        for x, y in self.star_points:
-            # 计算旋转后的位置
-            dx = x - self.center_x
-            dy = y - self.center_y
-            rotated_x = self.center_x + dx * math.cos(self.rotation) - dy * math.sin(self.rotation)
-            rotated_y = self.center_y + dx * math.sin(self.rotation) + dy * math.cos(self.rotation)
-            rotated_points.append((rotated_x, rotated_y))
-
-        # 绘制连线
-        if len(rotated_points) > 2:
-            pygame.draw.lines(surface, (255, 255, 255), True, rotated_points, 2)
+        self.dirty_rects = []
+        if self.clear_on_draw:
+            surface.fill((0, 0, 0, 0))  # 透明背景
+
+        # 按 render_alpha 在上一步和当前步的角度之间插值（特效沿用本帧的变换，下一次 update 恢复当前角度）
+        if self.render_alpha < 1.0:
+            self.update_transform(self.prev_rotation + (self.rotation - self.prev_rotation) * self.render_alpha)
+
+        # 绘制连线（编队时每颗星一条闭合折线）
+        for polygon in self.transform_stage.polygons():
+            if len(polygon) > 2:
+                self.dirty_rects.append(pygame.draw.lines(surface, (255, 255, 255), True, polygon, 2))
 
         # 绘制顶点
-        for x, y in rotated_points:
-            pygame.draw.circle(surface, (255, 255, 255), (int(x), int(y)), 2)
+        for x, y in self.get_rotated_points():
+            self.dirty_rects.append(pygame.draw.circle(surface, (255, 255, 255), (int(x), int(y)), 2))
 
     def apply_effects(self, surface):
         """应用星星特效"""
         # 添加光晕效果
-        glow_surface = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+        glow_surface = self.surface_pool.acquire(surface.get_size())
 
         # 在星星位置添加光晕
-        for x, y in self.star_points:
-            dx = x - self.center_x
-            dy = y - self.center_y
-            rotated_x = self.center_x + dx * math.cos(self.rotation) - dy * math.sin(self.rotation)
-            rotated_y = self.center_y + dx * math.sin(self.rotation) + dy * math.cos(self.rotation)
-
-            # 绘制光晕
-            for radius in range(10, 30, 5):
-                alpha = 100 - radius * 3
-                if alpha > 0:
-                    pygame.draw.circle(glow_surface, (255, 255, 255, alpha),
-                                       (int(rotated_x), int(rotated_y)), radius)
+        for rotated_x, rotated_y in self.get_rotated_points():
+            # 绘制光晕：原先由内向外逐个覆盖绘制4层同心圆，最外层（半径25、透明度25）盖住了里面几层，
+            # 精灵直接画这一层，并按覆盖方式绘制，结果与逐个 draw.circle 相同
+            self.glow_cache.blit_glow(glow_surface, (rotated_x, rotated_y), 25, (255, 255, 255), 25,
+                                      quantize=False, overwrite=True)
 
         surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2)
+        self.surface_pool.release(glow_surface)
 
     def draw_debug(self, surface):
         """调试模式下的绘制"""
         if not self.debug_mode:
             return
 
-        # 左侧：基础图形
-        self.buffer_surface.fill((0, 0, 0, 0))
-        self.draw_basic_elements(self.buffer_surface)
-
-        # 右侧：基础图形 + 特效
-        self.final_surface.fill((0, 0, 0, 0))
-        self.final_surface.blit(self.buffer_surface, (0, 0))
-        self.apply_effects(self.final_surface)
-
-        # 合并到主surface
-        surface.blit(self.buffer_surface, (0, 0))
-        surface.blit(self.final_surface, (self.width // 2, 0))
-
-        # 绘制调试信息
-        self._draw_debug_info(surface)
+        # 左侧基础图形，右侧基础图形 + 特效，最后叠加调试信息；基础图层每帧只画一次（见 render_graph.py）
+        self.render_graph.present(surface, self.debug_views)
 
     def draw_final(self, surface):
         """被调用模式下的最终绘制"""
@@ -137,27 +171,15 @@ class PatternStar:
 
     def _draw_debug_info(self, surface):
         """绘制调试信息"""
-        # 显示当前图案信息
-        try:
-            # 使用系统中文字体
-            font_path = "C:/Windows/Fonts/simhei.ttf"
-            font = pygame.font.Font(font_path, 16)
-        except:
-            # 备用方案
-            font = pygame.font.Font(None, 26)
-
-        # font = pygame.font.Font(None, 24)
-
+        # 显示当前图案信息 - 标签和数值分开缓存，只有数值变化时才重新渲染
         info_lines = [
-            f"图案: Star",
-            f"帧数: {self.frame_count}",
-            f"调试模式: {self.debug_mode}",
-            f"旋转角度: {self.rotation:.2f}"
+            "图案: Star",
+            ("帧数: ", f"{self.frame_count}"),
+            ("调试模式: ", f"{self.debug_mode}"),
+            ("旋转角度: ", f"{self.rotation:.2f}")
         ]
 
-        for i, line in enumerate(info_lines):
-            text = font.render(line, True, (255, 255, 255))
-            surface.blit(text, (10, 10 + i * 25))
+        self.hud.draw_lines(surface, info_lines + self.hud.stage_lines(), (10, 10))
 
     def get_duration(self):
         """返回图案建议持续时间"""
@@ -165,7 +187,7 @@ class PatternStar:
 
     def should_continue(self):
         """判断是否应该继续运行"""
-        return self.frame_count * 0.016 < self.get_duration()
+        return self.elapsed_time < self.get_duration()
 
     def stop(self):
         """停止图案运行"""
@@ -6,36 +6,75 @@
 
 import pygame
 import math
+import os
 import random
+import sys
 import time
 
+import numpy as np
+
+# 添加当前目录到Python路径，确保可以导入辅助模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from debug_hud import DebugHud, timed_stage, get_font
+from lazy_surfaces import LazySurface, release_surfaces
+from render_graph import pattern_graph, split_screen_views
+from quality_governor import QualityKnob
+from sprite_cache import get_shared_glow_cache
+from surface_pool import get_shared_surface_pool
+from star_store import StarStore
+from point_splat import glow_layer, splat
+
+PROGRAM_STAR_IDS = 1 << 20  # 节目星星的编号起点，背景恒星编号在它之前
+
 
 class PatternStars:
     """多星星图案 - 修复调试信息和时间问题"""
 
-    def __init__(self, width, height, debug_mode=False):
+    # 绘制表面第一次使用时才分配（见 lazy_surfaces.py），作为复合图案的子图案时会被释放
+    buffer_surface = LazySurface()
+    final_surface = LazySurface()
+
+    def __init__(self, width, height, debug_mode=False, seed=None):
         self.width = width
         self.height = height
         self.debug_mode = debug_mode
         self.frame_count = 0
         self.running = True
-        self.start_time = time.time()
-        self.last_update_time = time.time()  # 添加精确时间跟踪
-
-        # 创建绘制表面
-        if self.debug_mode:
-            self.buffer_surface = pygame.Surface((width // 2, height))
-            self.final_surface = pygame.Surface((width // 2, height))
-        else:
-            self.buffer_surface = pygame.Surface((width, height))
-            self.final_surface = pygame.Surface((width, height))
-
-        self.buffer_surface = self.buffer_surface.convert_alpha()
-        self.final_surface = self.final_surface.convert_alpha()
-
-        # 星星系统变量
-        self.background_stars = []  # 背景恒星
-        self.program_stars = []  # 节目星星
+        self.rng = random.Random(seed)  # 独立的随机数流，给定seed时节目可复现
+        self.clear_on_draw = True  # 作为复合图案的子图案时由父图案负责清除
+        self.dirty_rects = []  # 本帧 draw_basic_elements 绘制过的区域
+        self.separation_check = True  # 发光体是实际的无人机，参与复合图案的最小间距检查
+        self.use_point_splat = False  # 星星上千颗时改用批量点渲染（point_splat）
+        self.glow_fraction = 1.0  # 带光晕的节目星星比例（画质调节参数）
+        self.effects_scale = 1.0  # 光晕缓冲的分辨率比例，低于1时缩小绘制再放大叠加（画质调节参数）
+        self.time_source = time.time  # 时间源，离屏渲染时可注入模拟时钟
+        self.start_time = self.time_source()
+        self.last_update_time = self.time_source()  # 添加精确时间跟踪
+
+        # 星星系统变量 - 列式存储，支持上万颗星星
+        self.max_shape_points = 8
+        self.background_stars = StarStore(capacity=32, max_shape_points=self.max_shape_points)  # 背景恒星
+        self.program_stars = StarStore(capacity=32, max_shape_points=self.max_shape_points,
+                                       id_offset=PROGRAM_STAR_IDS)  # 节目星星
+        self.background_star_range = (15, 25)  # 初始背景恒星数量范围
+        self.program_star_range = (8, 15)  # 初始节目星星数量范围
+        self.program_star_limits = (8, 20)  # 节目星星数量下限/上限
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))  # 由同一随机数流派生
+
+        # 共享的光晕精灵缓存
+        self.glow_cache = get_shared_glow_cache()
+        self.surface_pool = get_shared_surface_pool()
+
+        # 调试信息层（字体和文字缓存），调试模式下记录更新阶段耗时（见 update 上的 timed_stage）
+        self.hud = DebugHud(font_size=16, line_height=20)
+
+        # 调试分屏的渲染图：左右窗格共用同一份基础图层，颜色说明是左侧窗格上的叠加层
+        self.render_graph = pattern_graph(self)
+        self.render_graph.add_node('legend', PatternStars._draw_legend)
+        self.debug_views = split_screen_views(self, overlays=('legend',))
         self.star_colors = [
             (255, 255, 255),  # 白色
             (255, 255, 200),  # 暖白
@@ -50,275 +89,292 @@ class PatternStars:
             (255, 50, 255),  # 紫色
             (50, 255, 255),  # 青色
         ]
+        self.star_palette = np.array(self.star_colors, dtype=np.float64)
+        self.program_palette = np.array(self.program_colors, dtype=np.float64)
 
     def get_chinese_font(self, size=24):
         """获取支持中文的字体"""
-        try:
-            font_path = "C:/Windows/Fonts/simhei.ttf"
-            return pygame.font.Font(font_path, size)
-        except:
-            return pygame.font.Font(None, size)
+        # 进程级字体缓存，避免每帧从磁盘重新打开字体
+        return get_font(size)
 
-    def create_star_shape(self, star_type, size, complexity=1.0):
-        """创建星星形状"""
-        points = []
+    def create_star_shapes(self, star_type, sizes, complexity=1.0):
+        """批量创建星星形状，返回 (形状点数组, 每颗星的点数)"""
+        n = len(sizes)
+        max_points = self.max_shape_points
+        point_index = np.arange(max_points)
 
         if star_type == "background":
             # 背景恒星：不规则多边形
-            num_points = random.randint(5, 8)
-            base_radius = size
-            for i in range(num_points):
-                angle = 2 * math.pi * i / num_points
-                # 添加随机性使形状不规则
-                radius_variation = random.uniform(0.7, 1.3) * complexity
-                radius = base_radius * radius_variation
-                x = math.cos(angle) * radius
-                y = math.sin(angle) * radius
-                points.append((x, y))
-
+            num_points = self.np_rng.integers(5, 9, n)
+            # 添加随机性使形状不规则
+            radius_variation = self.np_rng.uniform(0.7, 1.3, (n, max_points)) * complexity
         else:  # program stars
-            # 节目星星：更规则的形状
-            num_points = random.choice([5, 6, 7])  # 五角星、六角星、七角星
-            base_radius = size
-            for i in range(num_points):
-                angle = 2 * math.pi * i / num_points
-                radius = base_radius
-                x = math.cos(angle) * radius
-                y = math.sin(angle) * radius
-                points.append((x, y))
-
-        return points
-
-    def create_background_star(self):
-        """创建背景恒星"""
-        return {
-            'x': random.uniform(50, self.width - 50),
-            'y': random.uniform(50, self.height - 50),
-            'size': random.uniform(1.5, 4.0),  # 较小的尺寸
-            'base_brightness': random.uniform(0.3, 0.8),
-            'flicker_speed': random.uniform(0.5, 2.0),
-            'flicker_phase': random.uniform(0, 2 * math.pi),
-            'color': random.choice(self.star_colors),
-            'shape_points': [],  # 将在initialize中生成
-            'type': 'background'
-        }
-
-    def create_program_star(self):
-        """创建节目星星"""
-        # 随机选择进入方向
-        side = random.choice(['left', 'right', 'top', 'bottom'])
-
-        if side == 'left':
-            x = -20
-            y = random.uniform(50, self.height - 50)
-            speed_x = random.uniform(1.0, 3.0)
-            speed_y = random.uniform(-0.5, 0.5)
-        elif side == 'right':
-            x = self.width + 20
-            y = random.uniform(50, self.height - 50)
-            speed_x = random.uniform(-3.0, -1.0)
-            speed_y = random.uniform(-0.5, 0.5)
-        elif side == 'top':
-            x = random.uniform(50, self.width - 50)
-            y = -20
-            speed_x = random.uniform(-0.5, 0.5)
-            speed_y = random.uniform(1.0, 3.0)
-        else:  # bottom
-            x = random.uniform(50, self.width - 50)
-            y = self.height + 20
-            speed_x = random.uniform(-0.5, 0.5)
-            speed_y = random.uniform(-3.0, -1.0)
-
-        return {
-            'x': x,
-            'y': y,
-            'speed_x': speed_x,
-            'speed_y': speed_y,
-            'size': random.uniform(5.0, 12.0),  # 较大的尺寸
-            'base_brightness': random.uniform(0.7, 1.0),
-            'flicker_speed': random.uniform(0.2, 0.8),
-            'flicker_phase': random.uniform(0, 2 * math.pi),
-            'color': random.choice(self.program_colors),
-            'shape_points': [],  # 将在initialize中生成
-            'type': 'program',
-            'glow_intensity': random.uniform(0.5, 1.0)
-        }
+            # 节目星星：更规则的形状（五角星、六角星、七角星）
+            num_points = self.np_rng.choice([5, 6, 7], n)
+            radius_variation = np.ones((n, max_points))
+
+        angles = 2 * np.pi * point_index[None, :] / num_points[:, None]
+        radius = sizes[:, None] * radius_variation
+
+        points = np.empty((n, max_points, 2))
+        points[:, :, 0] = np.cos(angles) * radius
+        points[:, :, 1] = np.sin(angles) * radius
+        return points, num_points
+
+    def spawn_background_stars(self, n):
+        """批量创建背景恒星"""
+        rng = self.np_rng
+        size = rng.uniform(1.5, 4.0, n)  # 较小的尺寸
+        shape_points, shape_count = self.create_star_shapes('background', size)
+        self.background_stars.spawn(
+            x=rng.uniform(50, self.width - 50, n),
+            y=rng.uniform(50, self.height - 50, n),
+            speed_x=np.zeros(n),
+            speed_y=np.zeros(n),
+            size=size,
+            base_brightness=rng.uniform(0.3, 0.8, n),
+            flicker_speed=rng.uniform(0.5, 2.0, n),
+            flicker_phase=rng.uniform(0, 2 * math.pi, n),
+            color_index=rng.integers(0, len(self.star_colors), n),
+            shape_points=shape_points,
+            shape_count=shape_count,
+            glow_intensity=np.zeros(n),
+        )
+
+    def spawn_program_stars(self, n):
+        """批量创建节目星星，从屏幕四边随机进入"""
+        if n <= 0:
+            return
+
+        rng = self.np_rng
+        # 随机选择进入方向：0=左, 1=右, 2=上, 3=下
+        side = rng.integers(0, 4, n)
+        along_x = rng.uniform(50, self.width - 50, n)
+        along_y = rng.uniform(50, self.height - 50, n)
+        speed = rng.uniform(1.0, 3.0, n)
+        drift = rng.uniform(-0.5, 0.5, n)
+
+        x = np.select([side == 0, side == 1], [np.full(n, -20.0), np.full(n, self.width + 20.0)], along_x)
+        y = np.select([side == 2, side == 3], [np.full(n, -20.0), np.full(n, self.height + 20.0)], along_y)
+        speed_x = np.select([side == 0, side == 1], [speed, -speed], drift)
+        speed_y = np.select([side == 2, side == 3], [speed, -speed], drift)
+
+        size = rng.uniform(5.0, 12.0, n)  # 较大的尺寸
+        shape_points, shape_count = self.create_star_shapes('program', size)
+        self.program_stars.spawn(
+            x=x,
+            y=y,
+            speed_x=speed_x,
+            speed_y=speed_y,
+            size=size,
+            base_brightness=rng.uniform(0.7, 1.0, n),
+            flicker_speed=rng.uniform(0.2, 0.8, n),
+            flicker_phase=rng.uniform(0, 2 * math.pi, n),
+            color_index=rng.integers(0, len(self.program_colors), n),
+            shape_points=shape_points,
+            shape_count=shape_count,
+            glow_intensity=rng.uniform(0.5, 1.0, n),
+        )
 
     def initialize(self):
         """初始化星星系统"""
         print("多星星图案初始化完成")
 
         # 重置时间跟踪
-        self.start_time = time.time()
-        self.last_update_time = time.time()
+        self.start_time = self.time_source()
+        self.last_update_time = self.time_source()
         self.frame_count = 0
 
         # 清空现有星星
-        self.background_stars = []
-        self.program_stars = []
-
-        # 创建背景恒星 (15-25颗)
-        num_background = random.randint(15, 25)
-        for _ in range(num_background):
-            star = self.create_background_star()
-            # 生成形状点
-            star['shape_points'] = self.create_star_shape('background', star['size'])
-            self.background_stars.append(star)
-
-        # 创建节目星星 (8-15颗)
-        num_program = random.randint(8, 15)
-        for _ in range(num_program):
-            star = self.create_program_star()
-            # 生成形状点
-            star['shape_points'] = self.create_star_shape('program', star['size'])
-            self.program_stars.append(star)
+        self.background_stars.clear()
+        self.program_stars.clear()
+
+        # 创建背景恒星 (默认15-25颗)
+        low, high = self.background_star_range
+        self.spawn_background_stars(int(self.np_rng.integers(low, high + 1)))
+
+        # 创建节目星星 (默认8-15颗)
+        low, high = self.program_star_range
+        self.spawn_program_stars(int(self.np_rng.integers(low, high + 1)))
 
+    @timed_stage("更新")
     def update(self, dt):
         """更新星星系统 - 使用精确时间计算"""
-        current_time = time.time()
+        current_time = self.time_source()
         actual_dt = current_time - self.last_update_time
         self.last_update_time = current_time
 
         self.frame_count += 1
 
-        # 更新背景恒星的闪烁
-        for star in self.background_stars:
-            # 简单的闪烁效果
-            pass  # 闪烁在绘制时计算
+        # 背景恒星只闪烁不移动，闪烁在绘制时计算
 
         # 更新节目星星的位置
-        for star in self.program_stars[:]:
-            star['x'] += star['speed_x'] * actual_dt * 60  # 乘以60使速度与帧率无关
-            star['y'] += star['speed_y'] * actual_dt * 60
-
-            # 移除屏幕外的星星并创建新的
-            if (star['x'] < -50 or star['x'] > self.width + 50 or
-                    star['y'] < -50 or star['y'] > self.height + 50):
-                self.program_stars.remove(star)
-                # 有一定概率创建新星星
-                if random.random() < 0.3 and len(self.program_stars) < 20:
-                    new_star = self.create_program_star()
-                    new_star['shape_points'] = self.create_star_shape('program', new_star['size'])
-                    self.program_stars.append(new_star)
+        stars = self.program_stars
+        stars.move(actual_dt * 60)  # 乘以60使速度与帧率无关
+
+        # 移除屏幕外的星星并创建新的
+        outside = stars.outside_mask(-50, -50, self.width + 50, self.height + 50)
+        removed = stars.kill(outside)
+        min_stars, max_stars = self.program_star_limits
+        if removed:
+            # 每颗移除的星星有一定概率补充一颗新星星
+            respawn = int(np.count_nonzero(self.np_rng.random(removed) < 0.3))
+            self.spawn_program_stars(min(respawn, max_stars - len(stars)))
 
         # 确保有一定数量的节目星星
-        while len(self.program_stars) < 8:
-            new_star = self.create_program_star()
-            new_star['shape_points'] = self.create_star_shape('program', new_star['size'])
-            self.program_stars.append(new_star)
+        self.spawn_program_stars(min_stars - len(stars))
 
         return self.should_continue()
 
-    def draw_star(self, surface, star, current_time):
-        """绘制单个星星"""
-        # 计算闪烁亮度
-        flicker = 0.7 + 0.3 * math.sin(current_time * star['flicker_speed'] + star['flicker_phase'])
-        brightness = star['base_brightness'] * flicker
-
-        # 计算最终颜色
-        base_color = star['color']
-        final_color = (
-            int(base_color[0] * brightness),
-            int(base_color[1] * brightness),
-            int(base_color[2] * brightness)
-        )
+    def draw_stars(self, surface, stars, palette, current_time, with_glow):
+        """批量绘制一组星星"""
+        indices = stars.alive_indices()
+        if len(indices) == 0:
+            return
+
+        # 向量化计算闪烁亮度和最终颜色
+        brightness = stars.brightness(current_time, indices)
+
+        if self.use_point_splat:
+            self._splat_stars(surface, stars, palette, indices, brightness, with_glow)
+            return
+
+        colors = stars.colors(palette, brightness, indices).tolist()
+        polygons = stars.polygons(indices).tolist()
+        shape_counts = stars.shape_count[indices].tolist()
+
+        if with_glow:
+            glow_radius = (stars.size[indices] * 1.5).astype(np.int32).tolist()
+            glow_alpha = (100 * stars.glow_intensity[indices] * brightness).astype(np.int32).tolist()
+            centers = np.stack([stars.x[indices], stars.y[indices]], axis=1).tolist()
+
+        for i, color in enumerate(colors):
+            # 绘制星星主体
+            self.dirty_rects.append(pygame.draw.polygon(surface, color, polygons[i][:shape_counts[i]]))
+
+            # 为节目星星添加光晕（缓存精灵）
+            if with_glow:
+                self.dirty_rects.append(self.glow_cache.blit_glow(
+                    surface, centers[i], glow_radius[i], color, glow_alpha[i],
+                    special_flags=pygame.BLEND_ALPHA_SDL2))
+
+    def _splat_stars(self, surface, stars, palette, indices, brightness, with_glow):
+        """批量绘制：背景恒星画成抗锯齿圆点，节目星星保留多边形、光晕合成一层"""
+        colors = stars.colors(palette, brightness, indices)
+        centers = np.stack([stars.x[indices], stars.y[indices]], axis=1)
+
+        if not with_glow:
+            rect = splat(surface, centers, stars.size[indices] * 0.8, colors)
+            if rect is not None:
+                self.dirty_rects.append(rect)
+            return
+
+        polygons = stars.polygons(indices).tolist()
+        shape_counts = stars.shape_count[indices].tolist()
+        for i, color in enumerate(colors.tolist()):
+            self.dirty_rects.append(pygame.draw.polygon(surface, color, polygons[i][:shape_counts[i]]))
+
+        layer = glow_layer(surface.get_size(), centers, colors,
+                           100 * stars.glow_intensity[indices] * brightness,
+                           float(np.mean(stars.size[indices])) * 1.5)
+        self.dirty_rects.append(surface.blit(layer, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2))
+
+    def quality_knobs(self):
+        """可由画质调节器（quality_governor.py）降级的参数，按降级顺序排列"""
+        return [
+            QualityKnob(self, 'effects_scale', (1.0, 0.5), name="星空光晕缓冲分辨率"),
+            QualityKnob(self, 'glow_fraction', (1.0, 0.5, 0.25, 0.0), name="节目星星光晕比例"),
+        ]
 
-        # 转换形状点到实际位置
-        actual_points = []
-        for dx, dy in star['shape_points']:
-            actual_points.append((
-                int(star['x'] + dx),
-                int(star['y'] + dy)
-            ))
-
-        # 绘制星星主体
-        if len(actual_points) > 2:
-            pygame.draw.polygon(surface, final_color, actual_points)
-
-        # 为节目星星添加光晕
-        if star['type'] == 'program':
-            glow_surface = pygame.Surface((int(star['size'] * 4), int(star['size'] * 4)), pygame.SRCALPHA)
-            glow_radius = int(star['size'] * 1.5)
-            glow_alpha = int(100 * star['glow_intensity'] * brightness)
-
-            # 绘制光晕
-            pygame.draw.circle(glow_surface, (*final_color, glow_alpha),
-                               (glow_radius * 2, glow_radius * 2), glow_radius)
-
-            # 应用光晕
-            surface.blit(glow_surface,
-                         (int(star['x'] - glow_radius * 2), int(star['y'] - glow_radius * 2)),
-                         special_flags=pygame.BLEND_ALPHA_SDL2)
+    def get_emitters(self):
+        """返回当前帧的发光体（无人机）状态：位置 (N,2)、颜色 (N,3)、亮度 (N,)、稳定编号 (N,)，用于轨迹导出"""
+        current_time = self.time_source() - self.start_time
+        positions, colors, brightness, ids = [], [], [], []
+        for stars, palette in ((self.background_stars, self.star_palette),
+                               (self.program_stars, self.program_palette)):
+            indices = stars.alive_indices()
+            positions.append(np.stack([stars.x[indices], stars.y[indices]], axis=1))
+            colors.append(palette[stars.color_index[indices]])
+            brightness.append(stars.brightness(current_time, indices))
+            ids.append(stars.serial[indices])
+
+        return (np.concatenate(positions).astype(np.float32),
+                np.concatenate(colors).astype(np.uint8),
+                np.concatenate(brightness).astype(np.float32),
+                np.concatenate(ids))
 
     def draw_basic_elements(self, surface):
         """绘制基础元素"""
-        surface.fill((0, 0, 0, 0))  # 透明背景
-        current_time = time.time() - self.start_time
+        self.dirty_rects = []
+        if self.clear_on_draw:
+            surface.fill((0, 0, 0, 0))  # 透明背景
+        current_time = self.time_source() - self.start_time
 
         # 绘制背景恒星
-        for star in self.background_stars:
-            self.draw_star(surface, star, current_time)
+        self.draw_stars(surface, self.background_stars, self.star_palette, current_time, with_glow=False)
 
         # 绘制节目星星
-        for star in self.program_stars:
-            self.draw_star(surface, star, current_time)
+        self.draw_stars(surface, self.program_stars, self.program_palette, current_time, with_glow=True)
 
     def apply_effects(self, surface):
         """应用特效"""
         if not self.debug_mode:
-            # 添加全局星空光晕效果
-            glow_surface = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
-
-            # 在节目星星位置添加更强的光晕
-            for star in self.program_stars:
-                if star['type'] == 'program':
-                    current_time = time.time() - self.start_time
-                    flicker = 0.7 + 0.3 * math.sin(current_time * star['flicker_speed'] + star['flicker_phase'])
-                    brightness = star['base_brightness'] * flicker
-
-                    glow_radius = int(star['size'] * 3)
-                    glow_alpha = int(60 * star['glow_intensity'] * brightness)
-
-                    pygame.draw.circle(glow_surface, (255, 255, 255, glow_alpha),
-                                       (int(star['x']), int(star['y'])), glow_radius)
-
-            surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+            # 在节目星星位置添加更强的光晕（画质降级时只给一部分星星加光晕）
+            stars = self.program_stars
+            indices = stars.alive_indices()
+            if self.glow_fraction < 1.0:
+                indices = indices[:int(len(indices) * self.glow_fraction)]
+            if not len(indices):
+                return
+
+            # 添加全局星空光晕效果，画质降级时在缩小的缓冲上绘制
+            scale = self.effects_scale
+            width, height = surface.get_size()
+            glow_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            glow_surface = self.surface_pool.acquire(glow_size)
+
+            current_time = self.time_source() - self.start_time
+            brightness = stars.brightness(current_time, indices)
+
+            glow_alpha = 60 * stars.glow_intensity[indices] * brightness
+            centers = np.stack([stars.x[indices], stars.y[indices]], axis=1) * scale
+
+            if self.use_point_splat:
+                # 批量：所有光晕合成一层（共用平均半径）
+                layer = glow_layer(glow_size, centers, (255, 255, 255), glow_alpha,
+                                   float(np.mean(stars.size[indices])) * 3 * scale)
+                glow_surface.blit(layer, (0, 0))
+            else:
+                glow_radius = (stars.size[indices] * 3 * scale).astype(np.int32).tolist()
+                for center, radius, alpha in zip(centers.tolist(), glow_radius, glow_alpha.astype(np.int32).tolist()):
+                    self.glow_cache.blit_glow(glow_surface, center, radius, (255, 255, 255), alpha)
+
+            if scale != 1.0:
+                surface.blit(pygame.transform.scale(glow_surface, (width, height)), (0, 0),
+                             special_flags=pygame.BLEND_RGB_ADD)
+            else:
+                surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+            self.surface_pool.release(glow_surface)
 
     def draw_debug(self, surface):
         """调试模式下的绘制 - 修复信息重叠"""
         if not self.debug_mode:
             return
 
-        # 左侧：基础图形
-        self.buffer_surface.fill((20, 20, 40, 255))
-        self.draw_basic_elements(self.buffer_surface)
+        # 左侧基础图形，右侧基础图形 + 特效，最后叠加调试信息；基础图层每帧只画一次（见 render_graph.py）
+        self.render_graph.present(surface, self.debug_views)
 
-        # 在左侧添加调试信息 - 使用不同位置避免重叠
-        font = self.get_chinese_font(14)
+    def _draw_legend(self, surface, position):
+        """左侧窗格的调试信息 - 使用不同位置避免重叠"""
         info_lines = [
             "=== 左侧: 基础星星 ===",
-            f"背景恒星: {len(self.background_stars)}颗",
-            f"节目星星: {len(self.program_stars)}颗",
+            ("背景恒星: ", f"{len(self.background_stars)}颗"),
+            ("节目星星: ", f"{len(self.program_stars)}颗"),
             "--- 颜色说明 ---",
             "白色系: 背景恒星",
             "彩色: 节目星星"
         ]
-
-        for i, line in enumerate(info_lines):
-            text = font.render(line, True, (255, 255, 255))
-            self.buffer_surface.blit(text, (10, 10 + i * 20))
-
-        # 右侧：应用特效
-        self.final_surface.fill((10, 10, 30, 255))
-        self.draw_basic_elements(self.final_surface)
-        self.apply_effects(self.final_surface)
-
-        # 合并到主surface
-        surface.blit(self.buffer_surface, (0, 0))
-        surface.blit(self.final_surface, (self.width // 2, 0))
-
-        # 绘制调试信息 - 在右侧surface上绘制，避免与左侧重叠
-        self._draw_debug_info(surface)
+        self.hud.draw_lines(surface, info_lines, (position[0] + 10, position[1] + 10), font_size=14)
 
     def draw_final(self, surface):
         """最终绘制模式"""
@@ -329,24 +385,20 @@ class PatternStars:
 
     def _draw_debug_info(self, surface):
         """绘制调试信息 - 修复位置重叠"""
-        font = self.get_chinese_font(16)
-
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = self.time_source() - self.start_time
         remaining_time = max(0, self.get_duration() - elapsed_time)
 
-        # 在右侧surface的左上角显示时间信息
+        # 在右侧surface的左上角显示时间信息 - 标签和数值分开缓存
         info_lines = [
-            f"图案: 多星星系统",
-            f"帧数: {self.frame_count}",
-            f"运行时间: {elapsed_time:.1f}s",
-            f"剩余时间: {remaining_time:.1f}s"
+            "图案: 多星星系统",
+            ("帧数: ", f"{self.frame_count}"),
+            ("运行时间: ", f"{elapsed_time:.1f}s"),
+            ("剩余时间: ", f"{remaining_time:.1f}s")
         ]
 
         # 计算在右侧surface上的位置
         right_start_x = self.width // 2
-        for i, line in enumerate(info_lines):
-            text = font.render(line, True, (255, 255, 255))
-            surface.blit(text, (right_start_x + 10, 10 + i * 20))
+        self.hud.draw_lines(surface, info_lines + self.hud.stage_lines(), (right_start_x + 10, 10))
 
     def get_duration(self):
         """返回图案建议持续时间"""
@@ -354,7 +406,7 @@ class PatternStars:
 
     def should_continue(self):
         """判断是否应该继续运行 - 使用精确时间计算"""
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = self.time_source() - self.start_time
         return elapsed_time < self.get_duration()
 
     def stop(self):
@@ -368,12 +420,5 @@ class PatternStars:
 
         self.debug_mode = debug_mode
 
-        if self.debug_mode:
-            self.buffer_surface = pygame.Surface((self.width // 2, self.height))
-            self.final_surface = pygame.Surface((self.width // 2, self.height))
-        else:
-            self.buffer_surface = pygame.Surface((self.width, self.height))
-            self.final_surface = pygame.Surface((self.width, self.height))
-
-        self.buffer_surface = self.buffer_surface.convert_alpha()
-        self.final_surface = self.final_surface.convert_alpha()
\ No newline at end of file
+        # 表面尺寸随调试模式变化：释放后下次使用时按新尺寸重新分配
+        release_surfaces(self)
\ No newline at end of file
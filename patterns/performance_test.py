@@ -1,6 +1,16 @@
 import pygame
 import time
 import math
+import os
+import sys
+
+# 添加当前目录到Python路径，确保可以导入辅助模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from gradients import linear_gradient
+from rotation_cache import RotationCache
 
 
 def get_chinese_font(size=24):
@@ -13,7 +23,18 @@ def get_chinese_font(size=24):
 
 
 def create_linear_gradient_rect_with_alpha(width, height, start_color, end_color):
-    """创建带Alpha通道的线性渐变矩形 - 修复渐变方向"""
+    """创建带Alpha通道的线性渐变矩形 - NumPy一次性填充像素数组"""
+    start_time = time.perf_counter()
+
+    # 不走缓存，测量的是真实的生成耗时
+    surface = linear_gradient(width, height, start_color, end_color, use_cache=False)
+
+    end_time = time.perf_counter()
+    return surface, end_time - start_time
+
+
+def create_linear_gradient_rect_with_alpha_legacy(width, height, start_color, end_color):
+    """创建带Alpha通道的线性渐变矩形 - 逐行画线的旧实现，保留用于对比"""
     start_time = time.perf_counter()
 
     surface = pygame.Surface((width, height), pygame.SRCALPHA)
@@ -95,6 +116,65 @@ def test_rotate_performance_with_alpha(surface, rotation_count, display_surface=
     return end_time - start_time
 
 
+def benchmark_rotation(surface, placements=2000, steps=72, memory_budget=64 * 1024 * 1024):
+    """旋转吞吐量对比：每次现场 transform.rotate vs 量化角度旋转缓存
+
+    返回 (名称, 耗时, 缓存统计) 列表
+    """
+    target = pygame.Surface((1200, 750), pygame.SRCALPHA)
+    center = (600, 375)
+    # 非整数步进的角度，避免恰好落在量化角度上
+    angles = [(i * 7.3) % 360 for i in range(placements)]
+    results = []
+
+    start_time = time.perf_counter()
+    for angle in angles:
+        rotated = pygame.transform.rotate(surface, angle)
+        target.blit(rotated, rotated.get_rect(center=center))
+    results.append(("现场旋转", time.perf_counter() - start_time, None))
+
+    for blend in (False, True):
+        name = f"旋转缓存{steps}级" + ("(混合)" if blend else "")
+        rotation_cache = RotationCache(surface, steps=steps, blend=blend, memory_budget=memory_budget)
+
+        start_time = time.perf_counter()
+        rotation_cache.prewarm()
+        results.append((name + "预热", time.perf_counter() - start_time, None))
+
+        start_time = time.perf_counter()
+        for angle in angles:
+            rotation_cache.blit(target, center, angle)
+        results.append((name, time.perf_counter() - start_time, rotation_cache.stats()))
+
+    return results
+
+
+def run_benchmarks(placements=2000, steps=72):
+    """无窗口运行性能对比并打印结果"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    gradient_surface, _ = create_linear_gradient_rect_with_alpha(20, 300, (255, 0, 0, 255), (0, 0, 255, 128))
+
+    print(f"旋转吞吐量对比 ({placements} 次放置):")
+    print("=" * 50)
+    results = benchmark_rotation(gradient_surface, placements, steps)
+    baseline = results[0][1]
+    for name, duration, stats in results:
+        if name.endswith("预热"):
+            print(f"  {name}: {duration:.6f} 秒")
+            continue
+
+        print(f"  {name}: {duration:.6f} 秒, {placements / duration:.0f} 次/秒, "
+              f"{baseline / duration:.1f}x")
+        if stats is not None:
+            print(f"    缓存: {stats['entries']} 帧, {stats['memory_used'] / 1024 / 1024:.1f}MB, "
+                  f"命中率 {stats['hit_rate']:.1%}")
+
+    pygame.quit()
+
+
 def main():
     # 初始化pygame
     pygame.init()
@@ -126,6 +206,13 @@ def main():
     test_results.append(("创建带Alpha渐变矩形", creation_time))
     print(f"  耗时: {creation_time:.6f} 秒")
 
+    # 与逐行画线的旧实现对比
+    _, legacy_time = create_linear_gradient_rect_with_alpha_legacy(
+        gradient_width, gradient_height, start_color, end_color
+    )
+    test_results.append(("创建渐变矩形(逐行画线)", legacy_time))
+    print(f"  逐行画线耗时: {legacy_time:.6f} 秒 (NumPy加速 {legacy_time / max(creation_time, 1e-9):.1f}x)")
+
     # 创建显示表面
     display_copy_alpha = pygame.Surface((1200, 750), pygame.SRCALPHA)
     display_rotate_alpha = pygame.Surface((1200, 750), pygame.SRCALPHA)
@@ -289,4 +376,15 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pygame Alpha通道性能测试")
+    parser.add_argument("--bench", action="store_true", help="无窗口运行旋转缓存吞吐量对比")
+    parser.add_argument("--placements", type=int, default=2000, help="对比测试的放置次数")
+    parser.add_argument("--steps", type=int, default=72, help="旋转缓存的量化角度数")
+    args = parser.parse_args()
+
+    if args.bench:
+        run_benchmarks(args.placements, args.steps)
+    else:
+        main()
\ No newline at end of file
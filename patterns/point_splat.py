@@ -0,0 +1,372 @@
+# patterns/point_splat.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 批量点渲染（point splat）：给定位置、半径、颜色数组，用NumPy一次性把抗锯齿圆点
+# 写入表面像素数组，取代逐个 pygame.draw.circle；光晕则累加到降采样网格后模糊放大，
+# 一次生成整层，取代逐个blit光晕精灵。每次调用有固定开销，点数较少时逐个绘制更快，
+# 上千个点时批量更快（交叉点见 main() 的基准），图案通过 use_point_splat 开启。
+# splat 的耗时随半径平方增长，只适合半径几像素的点（星空）；简单图案半径10-40的圆仍用
+# draw.circle，只把光晕换成 glow_layer
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pygame
+
+# 添加当前目录到Python路径，确保可以导入辅助模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from gradients import surface_from_rgba
+
+MAX_CHUNK_ELEMENTS = 1 << 20  # 每批 点数 x 核像素数 的上限，控制临时数组大小
+
+RADIUS_STEP = 0.25  # 半径量化步长，同一量化半径共用一个覆盖率核
+
+_kernels = {}
+
+
+def _kernel(radius):
+    """量化半径的抗锯齿圆核，按半径缓存
+
+    返回 (实心偏移 (dx, dy), 边缘偏移 (dx, dy), 边缘覆盖率)
+    """
+    kernel = _kernels.get(radius)
+    if kernel is None:
+        extent = int(np.ceil(radius + 1))
+        offsets = np.arange(-extent, extent + 1, dtype=np.int64)
+        dx, dy = np.meshgrid(offsets, offsets, indexing='ij')
+        # 像素中心到圆心的距离 -> 覆盖率（半径边缘1像素线性过渡）
+        cover = np.clip(radius + 0.5 - np.hypot(dx, dy), 0.0, 1.0).astype(np.float32)
+        core = cover >= 1.0
+        edge = (cover > 0) & ~core
+        kernel = ((dx[core], dy[core]), (dx[edge], dy[edge]), cover[edge])
+        _kernels[radius] = kernel
+    return kernel
+
+
+def _pack_colors(surface, colors):
+    """把 (N,3) 颜色映射为表面的32位像素值（不透明）"""
+    shifts = surface.get_shifts()
+    colors = colors.astype(np.uint32)
+    packed = (colors[:, 0] << shifts[0]) | (colors[:, 1] << shifts[1]) | (colors[:, 2] << shifts[2])
+    if surface.get_masks()[3]:
+        packed |= np.uint32(255) << np.uint32(shifts[3])
+    return packed
+
+
+def _flat_pixels(surface):
+    """32位表面像素的一维视图，像素 (x, y) 位于 y * row + x，返回 (视图, row)"""
+    pixels = pygame.surfarray.pixels2d(surface)
+    width, height = surface.get_size()
+    row = pixels.strides[1] // pixels.itemsize
+    flat = np.lib.stride_tricks.as_strided(pixels, shape=((height - 1) * row + width,),
+                                           strides=(pixels.itemsize,))
+    return flat, row
+
+
+def _offset_pixels(centers, dx, dy, width, height, row, clipped):
+    """每个圆心加上核偏移，返回像素一维下标 (N*K,)，以及表面内像素的掩码（clipped为False时为None）"""
+    index = ((centers[:, 1:2] + dy[None, :]) * row + (centers[:, 0:1] + dx[None, :])).ravel()
+    if not clipped:
+        return index, None
+
+    px = centers[:, 0:1] + dx[None, :]
+    py = centers[:, 1:2] + dy[None, :]
+    valid = ((px >= 0) & (px < width) & (py >= 0) & (py < height)).ravel()
+    return index[valid], valid
+
+
+def _blend_pixels(surface, pixels, index, colors, weight):
+    """在32位像素值上做alpha混合：一次读出、按通道混合、一次写回"""
+    shifts = surface.get_shifts()
+    has_alpha = surface.get_masks()[3] != 0
+    dst = pixels[index]
+
+    result = np.zeros(len(dst), dtype=np.uint32)
+    inverse = 1.0 - weight
+    for channel in range(3):
+        value = (dst >> np.uint32(shifts[channel])) & np.uint32(255)
+        mixed = colors[:, channel] * weight + value * inverse
+        result |= mixed.astype(np.uint32) << np.uint32(shifts[channel])
+    if has_alpha:
+        value = (dst >> np.uint32(shifts[3])) & np.uint32(255)
+        mixed = 255.0 * weight + value * inverse
+        result |= mixed.astype(np.uint32) << np.uint32(shifts[3])
+    pixels[index] = result
+
+
+def splat(surface, positions, radii, colors, alpha=255):
+    """把一批抗锯齿圆点一次性绘制到32位surface，返回受影响的外包矩形，无点可画时返回None
+
+    positions: (N,2) 圆心（与 pygame.draw.circle 一样取整到像素）；radii: (N,) 或标量半径；
+    colors: (N,3) 或单个颜色；alpha: (N,) 或标量不透明度 0-255。
+    不透明点的实心部分直接写入像素值，只有边缘（和半透明点）做alpha混合；
+    重叠的边缘像素以其中一个点为准，不做累加
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    count = len(positions)
+    if count == 0:
+        return None
+
+    width, height = surface.get_size()
+    centers = positions.astype(np.int64)
+    radius_keys = np.round(np.broadcast_to(np.asarray(radii, dtype=np.float64), (count,)) / RADIUS_STEP)
+    radius_keys = radius_keys.astype(np.int64)
+    colors = np.broadcast_to(np.asarray(colors, dtype=np.float32).reshape(-1, 3)[:, :3], (count, 3))
+    opacity = np.broadcast_to(np.asarray(alpha, dtype=np.float32), (count,)) / 255.0
+
+    extent = np.ceil(radius_keys * RADIUS_STEP + 1).astype(np.int64)
+    x0 = max(0, int((centers[:, 0] - extent).min()))
+    y0 = max(0, int((centers[:, 1] - extent).min()))
+    x1 = min(width, int((centers[:, 0] + extent).max()) + 1)
+    y1 = min(height, int((centers[:, 1] + extent).max()) + 1)
+    if x1 <= x0 or y1 <= y0:
+        return None
+
+    # 核超出表面边界的点需要逐像素裁剪，其余的点直接计算下标
+    clipped = ((centers[:, 0] - extent < 0) | (centers[:, 0] + extent >= width) |
+               (centers[:, 1] - extent < 0) | (centers[:, 1] + extent >= height))
+    packed = _pack_colors(surface, colors)
+    solid = opacity >= 1.0
+    pixels, row = _flat_pixels(surface)
+
+    for radius_key in np.unique(radius_keys):
+        (core_dx, core_dy), (edge_dx, edge_dy), edge_cover = _kernel(radius_key * RADIUS_STEP)
+        members = np.flatnonzero(radius_keys == radius_key)
+        chunk = max(1, MAX_CHUNK_ELEMENTS // max(1, len(core_dx) + len(edge_dx)))
+
+        for start in range(0, len(members), chunk):
+            chunk_members = members[start:start + chunk]
+            # 贴边的点单独处理，其余的点不需要逐像素裁剪
+            for is_clipped in (False, True):
+                index = chunk_members[clipped[chunk_members] == is_clipped]
+                if len(index) == 0:
+                    continue
+                opaque = index[solid[index]]
+                translucent = index[~solid[index]]
+
+                # 不透明点的实心部分：一次散射写入打包好的像素值
+                if len(core_dx) and len(opaque):
+                    target, valid = _offset_pixels(centers[opaque], core_dx, core_dy, width, height, row, is_clipped)
+                    values = np.repeat(packed[opaque], len(core_dx))
+                    pixels[target] = values if valid is None else values[valid]
+
+                # 边缘像素，以及半透明点的实心部分：alpha混合
+                blend_parts = [(index, edge_dx, edge_dy, edge_cover)]
+                if len(core_dx) and len(translucent):
+                    blend_parts.append((translucent, core_dx, core_dy, np.ones(len(core_dx), dtype=np.float32)))
+                for part, dx, dy, cover in blend_parts:
+                    if len(dx) == 0 or len(part) == 0:
+                        continue
+                    target, valid = _offset_pixels(centers[part], dx, dy, width, height, row, is_clipped)
+                    weight = np.tile(cover, len(part)) * np.repeat(opacity[part], len(dx))
+                    part_colors = np.repeat(colors[part], len(dx), axis=0)
+                    if valid is not None:
+                        weight, part_colors = weight[valid], part_colors[valid]
+                    _blend_pixels(surface, pixels, target, part_colors, weight)
+
+    del pixels
+    return pygame.Rect(x0, y0, x1 - x0, y1 - y0)
+
+
+def glow_layer(size, positions, colors, alpha, radius, downsample=None):
+    """一次生成所有点的柔和光晕层（SRCALPHA表面，尺寸为size）
+
+    点按位置双线性累加到粗网格（格子边长约为半径的一半），做一遍 [1,2,1] 模糊后
+    平滑放大回原尺寸，耗时主要取决于网格大小而不是点数。所有点共用同一个光晕半径radius，
+    光晕中心的不透明度约为alpha（与逐个blit半径为radius的光晕精灵相当）
+    """
+    width, height = size
+    cell = downsample or max(2, int(round(radius / 2)))
+    grid_width = -(-width // cell)
+    grid_height = -(-height // cell)
+
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    count = len(positions)
+    colors = np.broadcast_to(np.asarray(colors, dtype=np.float64).reshape(-1, 3)[:, :3], (count, 3))
+    weight = np.broadcast_to(np.asarray(alpha, dtype=np.float64), (count,)) / 255.0
+
+    # 双线性累加：格子中心位于 (i + 0.5) * cell，点的权重按距离分给相邻4个格子
+    u = positions[:, 0] / cell - 0.5
+    v = positions[:, 1] / cell - 0.5
+    gx = np.floor(u).astype(np.int64)
+    gy = np.floor(v).astype(np.int64)
+    fx = u - gx
+    fy = v - gy
+
+    grid = np.zeros((4, (grid_width + 2) * (grid_height + 2)))
+    channels = [weight * colors[:, c] for c in range(3)] + [weight]
+    for ox, oy, corner in ((0, 0, (1 - fx) * (1 - fy)), (1, 0, fx * (1 - fy)),
+                           (0, 1, (1 - fx) * fy), (1, 1, fx * fy)):
+        # 网格四周各留一格，落在表面外但光晕可见的点不会越界
+        cx = np.clip(gx + ox + 1, 0, grid_width + 1)
+        cy = np.clip(gy + oy + 1, 0, grid_height + 1)
+        flat = cx * (grid_height + 2) + cy
+        for c, values in enumerate(channels):
+            grid[c] += np.bincount(flat, weights=values * corner, minlength=grid.shape[1])
+    grid = grid.reshape(4, grid_width + 2, grid_height + 2)
+
+    # 可分离 [1,2,1] 模糊，中心权重 (2/4)^2，乘4恢复单个点中心处的强度
+    grid = grid[:, :-2] + 2 * grid[:, 1:-1] + grid[:, 2:]
+    grid = grid[:, :, :-2] + 2 * grid[:, :, 1:-1] + grid[:, :, 2:]
+    grid *= 4.0 / 16.0
+
+    coverage = grid[3]
+    rgba = np.empty((grid_width, grid_height, 4), dtype=np.uint8)
+    rgba[..., :3] = np.clip(grid[:3].transpose(1, 2, 0) / np.maximum(coverage, 1e-6)[..., None], 0, 255)
+    rgba[..., 3] = np.clip(coverage * 255.0, 0, 255)
+
+    layer = pygame.transform.smoothscale(surface_from_rgba(rgba), (grid_width * cell, grid_height * cell))
+    if layer.get_size() != (width, height):
+        layer = layer.subsurface((0, 0, width, height))
+    return layer
+
+
+def _best_time(draw, reset, repeats):
+    """预热一次后取最快一次耗时（毫秒）"""
+    reset()
+    draw()
+    best = float('inf')
+    for _ in range(repeats):
+        reset()
+        start = time.perf_counter()
+        draw()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def benchmark_primitives(counts, width=1200, height=750, repeats=5, radius_range=(1, 3), glow_pad=10, seed=0):
+    """圆点和光晕分别比较逐个绘制与批量绘制，返回 {'disc': [...], 'glow': [...]}，元素为 (点数, 逐个毫秒, 批量毫秒)"""
+    from sprite_cache import GlowSpriteCache
+
+    rng = np.random.default_rng(seed)
+    surface = pygame.Surface((width, height), pygame.SRCALPHA, 32)
+    glow_cache = GlowSpriteCache()
+    reset = lambda: surface.fill((0, 0, 0, 0))
+
+    results = {'disc': [], 'glow': []}
+    for count in counts:
+        positions = rng.uniform((0, 0), (width, height), (count, 2))
+        radii = rng.uniform(radius_range[0], radius_range[1], count)
+        colors = rng.integers(100, 256, (count, 3))
+        points = list(zip(positions.tolist(), radii.tolist(), colors.tolist()))
+        glow_radius = float(radii.mean()) + glow_pad
+
+        def discs_per_call():
+            for (x, y), radius, color in points:
+                pygame.draw.circle(surface, color, (int(x), int(y)), int(round(radius)))
+
+        def glows_per_call():
+            for center, radius, color in points:
+                glow_cache.blit_glow(surface, center, radius + glow_pad, color, 50)
+
+        def glows_batched():
+            surface.blit(glow_layer((width, height), positions, colors, 50, glow_radius), (0, 0),
+                         special_flags=pygame.BLEND_ALPHA_SDL2)
+
+        results['disc'].append((count, _best_time(discs_per_call, reset, repeats),
+                                _best_time(lambda: splat(surface, positions, radii, colors), reset, repeats)))
+        results['glow'].append((count, _best_time(glows_per_call, reset, repeats),
+                                _best_time(glows_batched, reset, repeats)))
+    return results
+
+
+def _scaled_pattern(pattern_name, width, height, count):
+    """创建含count个点的图案：PatternSimple的圆圈 / PatternStars的星星（七成背景、三成节目）"""
+    if pattern_name == 'pattern_simple':
+        from pattern_simple import PatternSimple
+        pattern = PatternSimple(width, height, seed=0)
+        pattern.circles.clear()
+        pattern.setup_circles(count)
+    else:
+        from pattern_stars import PatternStars
+        pattern = PatternStars(width, height, seed=0)
+        background = max(1, count * 7 // 10)
+        program = max(1, count - background)
+        pattern.background_star_range = (background, background)
+        pattern.program_star_range = (program, program)
+        pattern.program_star_limits = (program, program)
+    pattern.initialize()
+    pattern.update(1 / 60)
+    return pattern
+
+
+def benchmark_patterns(counts, pattern_names=('pattern_simple', 'pattern_stars'), width=1200, height=750, repeats=5):
+    """图案层面比较 use_point_splat 关闭/开启时 draw_basic_elements + apply_effects 的耗时
+
+    返回 {图案名: [(点数, 逐个毫秒, 批量毫秒)]}
+    """
+    results = {}
+    for pattern_name in pattern_names:
+        rows = []
+        for count in counts:
+            pattern = _scaled_pattern(pattern_name, width, height, count)
+            surface = pattern.final_surface
+            reset = lambda: surface.fill((0, 0, 0, 0))
+
+            def draw():
+                pattern.draw_basic_elements(surface)
+                pattern.apply_effects(surface)
+
+            timings = []
+            for use_point_splat in (False, True):
+                pattern.use_point_splat = use_point_splat
+                timings.append(_best_time(draw, reset, repeats))
+            rows.append((count, timings[0], timings[1]))
+        results[pattern_name] = rows
+    return results
+
+
+def find_crossover(rows):
+    """最小的点数，从它开始（含更大的点数）批量绘制都比逐个绘制快；没有时返回None"""
+    crossover = None
+    for count, per_call_ms, batched_ms in reversed(rows):
+        if batched_ms >= per_call_ms:
+            break
+        crossover = count
+    return crossover
+
+
+def _print_rows(title, rows):
+    print(title)
+    for count, per_call_ms, batched_ms in rows:
+        print(f"  {count:6d} 点: 逐个 {per_call_ms:8.2f}ms, 批量 {batched_ms:8.2f}ms, "
+              f"加速 {per_call_ms / batched_ms:.2f}x")
+    crossover = find_crossover(rows)
+    print(f"  交叉点: 约 {crossover} 点起批量更快" if crossover else "  测试范围内批量没有更快")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量点渲染与逐个绘制的交叉点基准")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 50, 100, 250, 500, 1000, 2500, 5000])
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=750)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--radius", type=float, nargs=2, default=[1, 3], help="圆点半径范围（图元测试）")
+    parser.add_argument("--skip-patterns", action="store_true", help="只测图元，不测图案")
+    args = parser.parse_args()
+
+    from render_engine import init_headless_display
+    init_headless_display()
+
+    print("批量点渲染基准（取最快一次）")
+    print("=" * 50)
+    primitives = benchmark_primitives(args.counts, args.width, args.height, args.repeats, tuple(args.radius))
+    _print_rows(f"圆点 (半径 {args.radius[0]}-{args.radius[1]}): draw.circle vs splat", primitives['disc'])
+    _print_rows("光晕: 逐个blit光晕精灵 vs glow_layer", primitives['glow'])
+
+    if not args.skip_patterns:
+        for pattern_name, rows in benchmark_patterns(args.counts, width=args.width, height=args.height,
+                                                     repeats=args.repeats).items():
+            _print_rows(f"{pattern_name}: use_point_splat 关闭 vs 开启", rows)
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
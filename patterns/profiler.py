@@ -0,0 +1,153 @@
+# patterns/profiler.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 帧分析器：按需在图案实例上包装 update / draw_basic_elements / apply_effects /
+# draw_final，记录滚动直方图，并可导出为 Chrome trace-event JSON 时间线
+# （chrome://tracing 或 Perfetto 打开）。未挂载时图案代码路径完全不变，零开销
+
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+PROFILED_STAGES = ('update', 'draw_basic_elements', 'apply_effects', 'draw_final')
+
+
+class FrameProfiler:
+    """帧分析器
+
+    history:    每个 (图案, 阶段) 保留的最近耗时样本数（滚动窗口）
+    max_events: trace时间线保留的最近事件数
+    """
+
+    def __init__(self, history=600, max_events=200000):
+        self.history = history
+        self.enabled = True
+        self.samples = {}  # (图案名, 阶段) -> deque[秒]
+        self.events = deque(maxlen=max_events)
+        self._attached = []  # (图案, 阶段, 原实例属性或None)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def attach(self, pattern, name=None):
+        """在图案实例上挂载计时包装（复合图案会连同已有子图案一起挂载）"""
+        name = name or pattern.__class__.__name__
+        for stage in PROFILED_STAGES:
+            if hasattr(pattern, stage):
+                self._wrap(pattern, stage, name)
+
+        pattern.profiler = self
+        pattern.profiler_name = name
+
+        # 复合图案：逐个挂载子图案，之后添加的子图案由 add_pattern 挂载
+        for index, child in enumerate(getattr(pattern, 'sub_patterns', [])):
+            self.attach(child, self.child_name(name, child, index))
+        return pattern
+
+    @staticmethod
+    def child_name(parent_name, child, index):
+        """子图案在报告中的名字"""
+        return f"{parent_name}/{index}:{child.__class__.__name__}"
+
+    def _wrap(self, pattern, stage, name):
+        method = getattr(pattern, stage)
+        previous = pattern.__dict__.get(stage)  # 可能已被调试信息层包装过
+        samples = self.samples.setdefault((name, stage), deque(maxlen=self.history))
+        events = self.events
+        perf_counter = time.perf_counter
+        origin = self._origin
+        profiler = self
+
+        def profiled(*args, **kwargs):
+            if not profiler.enabled:
+                return method(*args, **kwargs)
+
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                end = perf_counter()
+                samples.append(end - start)
+                events.append((name, stage, start - origin, end - start, threading.get_ident()))
+
+        setattr(pattern, stage, profiled)
+        self._attached.append((pattern, stage, previous))
+
+    def detach(self):
+        """移除所有包装，恢复图案原来的方法"""
+        for pattern, stage, previous in reversed(self._attached):
+            if previous is None:
+                pattern.__dict__.pop(stage, None)
+            else:
+                setattr(pattern, stage, previous)
+            if getattr(pattern, 'profiler', None) is self:
+                pattern.profiler = None
+        self._attached = []
+
+    def reset(self):
+        """清空样本和时间线"""
+        with self._lock:
+            for samples in self.samples.values():
+                samples.clear()
+            self.events.clear()
+
+    def histogram(self, name, stage, bins=20, max_ms=None):
+        """返回某个阶段的耗时直方图 (计数, 毫秒边界)"""
+        values = np.array(self.samples.get((name, stage), ())) * 1000
+        if values.size == 0:
+            return np.zeros(bins, dtype=np.int64), np.zeros(bins + 1)
+        upper = max_ms if max_ms is not None else max(values.max(), 1e-3)
+        return np.histogram(values, bins=bins, range=(0.0, upper))
+
+    def summary(self):
+        """各 (图案, 阶段) 的滚动统计，单位毫秒"""
+        result = {}
+        for (name, stage), samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.array(samples) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result.setdefault(name, {})[stage] = {
+                'count': len(values),
+                'mean_ms': float(values.mean()),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': float(values.max()),
+            }
+        return result
+
+    def print_summary(self):
+        """打印滚动统计"""
+        for name, stages in self.summary().items():
+            print(f"{name}:")
+            for stage, stats in stages.items():
+                print(f"  {stage}: 平均 {stats['mean_ms']:.3f}ms, p50 {stats['p50_ms']:.3f}ms, "
+                      f"p95 {stats['p95_ms']:.3f}ms, p99 {stats['p99_ms']:.3f}ms")
+
+    def trace_events(self):
+        """转换为 Chrome trace-event 格式（完整事件 ph='X'，微秒）"""
+        with self._lock:
+            events = list(self.events)
+        return [
+            {
+                'name': stage,
+                'cat': name,
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': duration * 1e6,
+                'pid': 0,
+                'tid': tid,
+                'args': {'pattern': name},
+            }
+            for name, stage, start, duration, tid in events
+        ]
+
+    def export_chrome_trace(self, path):
+        """导出时间线JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        print(f"时间线已导出: {path}")
\ No newline at end of file
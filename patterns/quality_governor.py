@@ -0,0 +1,174 @@
+# patterns/quality_governor.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 自适应画质调节：观察最近若干帧的渲染耗时，超出帧时间预算时逐级降低代价高的画质参数
+# （光束纹理分辨率、光晕圈数、逐星光晕、特效缓冲分辨率等），余量恢复后再逐级还原。
+# 每次调整都会打印出来，方便现场操作员了解画质变化
+
+from collections import deque
+
+
+STAGES = ('basic', 'effects')  # 绘制阶段：draw_basic_elements / apply_effects
+
+
+class QualityKnob:
+    """一个可调的画质参数：target 对象上的属性，levels 从高画质到低画质排列
+
+    stage 为参数影响的绘制阶段（'basic' 或 'effects'），父图案只调用子图案的部分阶段时，
+    只有那些阶段的参数才会被收集
+    """
+
+    def __init__(self, target, attribute, levels, name=None, stage='effects'):
+        if stage not in STAGES:
+            raise ValueError(f"未知的绘制阶段: {stage}")
+        self.target = target
+        self.attribute = attribute
+        self.levels = list(levels)
+        self.name = name or f"{target.__class__.__name__}.{attribute}"
+        self.stage = stage
+        # 从当前属性值对应的级别开始
+        value = getattr(target, attribute)
+        self.level = self.levels.index(value) if value in self.levels else 0
+        self.apply()
+
+    @property
+    def value(self):
+        return self.levels[self.level]
+
+    def apply(self):
+        setattr(self.target, self.attribute, self.value)
+
+    def can_degrade(self):
+        return self.level < len(self.levels) - 1
+
+    def can_recover(self):
+        return self.level > 0
+
+    def degrade(self):
+        """降低一级画质，返回是否有变化"""
+        if not self.can_degrade():
+            return False
+        self.level += 1
+        self.apply()
+        return True
+
+    def recover(self):
+        """提高一级画质，返回是否有变化"""
+        if not self.can_recover():
+            return False
+        self.level -= 1
+        self.apply()
+        return True
+
+
+def collect_knobs(pattern, stages=None):
+    """收集图案（含复合图案的子图案）提供的画质参数，按图案给出的降级顺序排列
+
+    stages 为实际会被调用的绘制阶段（None表示全部）。复合图案通过 sub_pattern_stages
+    声明它调用子图案的哪些阶段，子图案在其他阶段的参数调了也不会影响画面和耗时，不收集
+    """
+    knobs = list(pattern.quality_knobs()) if hasattr(pattern, 'quality_knobs') else []
+    if stages is not None:
+        knobs = [knob for knob in knobs if knob.stage in stages]
+    child_stages = getattr(pattern, 'sub_pattern_stages', None)
+    for sub_pattern in getattr(pattern, 'sub_patterns', ()):
+        knobs.extend(collect_knobs(sub_pattern, child_stages))
+    return knobs
+
+
+class QualityGovernor:
+    """按帧时间预算调节画质
+
+    最近 window 帧的平均渲染耗时超过目标时，按顺序降低下一个还能降级的参数；
+    低于目标的 recover_ratio 倍时，按相反顺序（后降的先恢复）逐级还原。
+    每次调整后等待 cooldown 帧再评估，让新设置的耗时进入统计
+    """
+
+    def __init__(self, knobs, target_frame_time=1 / 60, window=30, recover_ratio=0.7, cooldown=30,
+                 log=print):
+        self.knobs = list(knobs)
+        self.target_frame_time = target_frame_time
+        self.recover_ratio = recover_ratio
+        self.cooldown = cooldown
+        self.log = log
+        self.frame_times = deque(maxlen=window)
+        self.frames_since_change = 0
+        self.degraded = []  # 已降级的参数（栈），恢复时后进先出
+        self.exhausted = False  # 所有参数都已降到最低仍超预算
+        self.changes = []  # 调整记录
+
+        # 统计信息
+        self.frames = 0
+        self.frames_over_budget = 0
+
+    @classmethod
+    def for_pattern(cls, pattern, **kwargs):
+        """用图案提供的所有画质参数创建调节器"""
+        return cls(collect_knobs(pattern), **kwargs)
+
+    def record(self, frame_time):
+        """记录一帧的渲染耗时（秒），必要时调整画质；返回本帧是否做了调整"""
+        self.frames += 1
+        self.frame_times.append(frame_time)
+        if frame_time > self.target_frame_time:
+            self.frames_over_budget += 1
+
+        self.frames_since_change += 1
+        if self.frames_since_change < self.cooldown or len(self.frame_times) < self.frame_times.maxlen:
+            return False
+
+        mean_time = sum(self.frame_times) / len(self.frame_times)
+        if mean_time > self.target_frame_time:
+            return self._degrade(mean_time)
+        if mean_time < self.target_frame_time * self.recover_ratio:
+            return self._recover(mean_time)
+        return False
+
+    def _degrade(self, mean_time):
+        for knob in self.knobs:
+            if knob.can_degrade():
+                old_value = knob.value
+                knob.degrade()
+                self.degraded.append(knob)
+                self._changed(knob, old_value, mean_time, "降低")
+                return True
+
+        if not self.exhausted and self.log is not None:
+            self.log(f"画质已降到最低，平均帧时间 {mean_time * 1000:.1f}ms 仍超出目标 "
+                     f"{self.target_frame_time * 1000:.1f}ms")
+        self.exhausted = True
+        return False
+
+    def _recover(self, mean_time):
+        if not self.degraded:
+            return False
+        knob = self.degraded.pop()
+        self.exhausted = False
+        old_value = knob.value
+        knob.recover()
+        self._changed(knob, old_value, mean_time, "恢复")
+        return True
+
+    def _changed(self, knob, old_value, mean_time, action):
+        self.changes.append({
+            'frame': self.frames,
+            'knob': knob.name,
+            'old': old_value,
+            'new': knob.value,
+            'mean_frame_time': mean_time,
+        })
+        self.frames_since_change = 0
+        self.frame_times.clear()
+        if self.log is not None:
+            self.log(f"画质{action}: {knob.name} {old_value} -> {knob.value} "
+                     f"(平均帧时间 {mean_time * 1000:.1f}ms, 目标 {self.target_frame_time * 1000:.1f}ms)")
+
+    def stats(self):
+        """返回统计信息"""
+        return {
+            'frames': self.frames,
+            'over_budget_rate': self.frames_over_budget / self.frames if self.frames else 0.0,
+            'changes': len(self.changes),
+            'levels': {knob.name: knob.value for knob in self.knobs},
+        }
\ No newline at end of file
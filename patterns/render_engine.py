@@ -0,0 +1,239 @@
+# patterns/render_engine.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 离屏渲染引擎：在SDL dummy视频驱动下用模拟时钟驱动任意图案，
+# 以CPU所能达到的最快速度渲染完整节目（不受墙上时间限制）
+
+import argparse
+import importlib
+import math
+import os
+import sys
+import time
+
+# 添加当前目录到Python路径，确保可以导入其他图案
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from lazy_surfaces import print_surface_memory_report
+from profiler import FrameProfiler
+from surface_pool import get_shared_surface_pool
+
+
+def init_headless_display():
+    """初始化无窗口的pygame显示（dummy驱动）"""
+    # 必须在导入/初始化pygame显示之前设置
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    import pygame
+
+    pygame.display.init()
+    pygame.font.init()
+
+    # convert_alpha() 需要一个已设置模式的显示表面
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+    return pygame
+
+
+def load_pattern_class(pattern_name):
+    """按模块名加载图案类（类名规则与PatternManager一致）"""
+    module = importlib.import_module(pattern_name)
+    class_name = ''.join(word.capitalize() for word in pattern_name.split('_'))
+    return getattr(module, class_name)
+
+
+def discover_pattern_names(patterns_dir=current_dir):
+    """发现目录下所有图案模块名"""
+    names = []
+    for filename in sorted(os.listdir(patterns_dir)):
+        if filename.startswith("pattern_") and filename.endswith(".py"):
+            names.append(filename[:-3])
+    return names
+
+
+class SimulatedClock:
+    """模拟时钟 - 以固定步长推进，用来替代 time.time()"""
+
+    def __init__(self, fps=60, start_time=0.0):
+        self.fps = fps
+        self.step = 1.0 / fps
+        self.start_time = start_time
+        self.tick_count = 0
+
+    def time(self):
+        """返回当前模拟时间（秒）"""
+        # 用乘法而不是累加，避免浮点误差随帧数积累
+        return self.start_time + self.tick_count * self.step
+
+    def tick(self):
+        """推进一个固定步长，返回步长"""
+        self.tick_count += 1
+        return self.step
+
+
+class HeadlessRenderEngine:
+    """离屏渲染引擎"""
+
+    def __init__(self, pattern_class, width, height, fps=60, debug_mode=False, pattern_kwargs=None,
+                 profiler=None):
+        self.pattern_class = pattern_class
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.debug_mode = debug_mode
+        self.pattern_kwargs = pattern_kwargs or {}
+        self.profiler = profiler  # 可选的 FrameProfiler
+        self.clock = SimulatedClock(fps)
+        self.pattern = None
+        self.target_surface = None
+
+    def create_pattern(self):
+        """创建图案并注入模拟时钟"""
+        pygame = init_headless_display()
+
+        self.pattern = self.pattern_class(self.width, self.height, self.debug_mode, **self.pattern_kwargs)
+        # 必须在initialize之前注入，因为initialize会重置起始时间
+        self.pattern.time_source = self.clock.time
+        if self.profiler is not None:
+            # 在initialize之前挂载，复合图案创建的子图案也会被分析
+            self.profiler.attach(self.pattern)
+        self.pattern.initialize()
+
+        self.target_surface = pygame.Surface((self.width, self.height))
+        return self.pattern
+
+    def reset(self):
+        """模拟时钟拨回节目开头并重新创建图案（同一种子下状态与新引擎相同）"""
+        self.clock = SimulatedClock(self.fps)
+        return self.create_pattern()
+
+    def advance(self):
+        """只推进一步模拟（不绘制），返回图案是否要求继续
+
+        图案状态只在update中改变，所以分段渲染时可以用它快进到段首
+        """
+        dt = self.clock.tick()
+        keep_running = self.pattern.update(dt)
+        return keep_running is not False and self.pattern.should_continue()
+
+    def render_frame(self):
+        """推进一步模拟并渲染一帧，返回图案是否要求继续"""
+        keep_running = self.advance()
+
+        self.target_surface.fill((0, 0, 0))
+        if self.debug_mode:
+            self.pattern.draw_debug(self.target_surface)
+        else:
+            self.pattern.draw_final(self.target_surface)
+
+        # 帧结束：回收本帧未归还的临时表面
+        get_shared_surface_pool().end_frame()
+
+        return keep_running
+
+    def render(self, max_frames=None, frame_callback=None):
+        """渲染整段节目，返回统计信息
+
+        frame_callback(frame_index, surface) 在每帧渲染完成后调用，可用于导出帧
+        """
+        if self.pattern is None:
+            self.create_pattern()
+
+        if max_frames is None:
+            # 默认渲染图案建议的完整时长
+            max_frames = int(math.ceil(self.pattern.get_duration() * self.fps))
+
+        wall_start = time.perf_counter()
+        frames = 0
+        while frames < max_frames:
+            keep_running = self.render_frame()
+            if frame_callback is not None:
+                frame_callback(frames, self.target_surface)
+            frames += 1
+            if not keep_running:
+                break
+        wall_time = time.perf_counter() - wall_start
+
+        simulated_time = frames / self.fps
+        return {
+            'pattern': self.pattern_class.__name__,
+            'frames': frames,
+            'simulated_time': simulated_time,
+            'wall_time': wall_time,
+            'fps': frames / wall_time if wall_time > 0 else float('inf'),
+            'realtime_factor': simulated_time / wall_time if wall_time > 0 else float('inf'),
+            'surface_pool': get_shared_surface_pool().stats(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离屏批量渲染图案（模拟时钟，快于实时）")
+    parser.add_argument("patterns", nargs="*", help="图案模块名，如 pattern_stars；缺省为全部图案")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=750)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--frames", type=int, default=None, help="最多渲染帧数，缺省为图案建议时长")
+    parser.add_argument("--debug", action="store_true", help="使用调试模式绘制")
+    parser.add_argument("--profile", metavar="TRACE_JSON", help="分析各阶段耗时并导出Chrome时间线")
+    parser.add_argument("--seed", type=int, default=None, help="图案随机数种子，给定时渲染结果可复现")
+    parser.add_argument("--threads", type=int, default=0, help="复合图案的并行绘制线程数，0为逐个绘制")
+    parser.add_argument("--memory", action="store_true", help="渲染结束后打印表面内存报告")
+    parser.add_argument("--min-separation", type=float, default=None, help="复合图案逐帧检查无人机最小间距（像素）")
+    args = parser.parse_args()
+
+    init_headless_display()
+    pattern_names = args.patterns or discover_pattern_names()
+    profiler = FrameProfiler() if args.profile else None
+
+    print("开始离屏渲染...")
+    print("=" * 50)
+    for pattern_name in pattern_names:
+        try:
+            pattern_class = load_pattern_class(pattern_name)
+        except Exception as e:
+            print(f"加载图案 {pattern_name} 失败: {e}")
+            continue
+
+        engine = HeadlessRenderEngine(pattern_class, args.width, args.height, args.fps, args.debug,
+                                      pattern_kwargs={'seed': args.seed}, profiler=profiler)
+        pattern = engine.create_pattern()
+        if args.threads and hasattr(pattern, 'enable_parallel'):
+            pattern.enable_parallel(args.threads)
+        if args.min_separation and hasattr(pattern, 'enable_separation_check'):
+            pattern.enable_separation_check(args.min_separation)
+        stats = engine.render(max_frames=args.frames)
+        print(f"{pattern_name}: {stats['frames']} 帧, 模拟 {stats['simulated_time']:.1f} 秒, "
+              f"耗时 {stats['wall_time']:.2f} 秒, {stats['fps']:.1f} fps, "
+              f"{stats['realtime_factor']:.1f}x 实时")
+        if hasattr(pattern, 'parallel_stats') and pattern.executor is not None:
+            parallel = pattern.parallel_stats()
+            print(f"  并行加速: 平均 {parallel['mean_speedup']:.2f}x ({parallel['workers']} 线程, "
+                  f"最近 {parallel['frames']} 帧)")
+            pattern.disable_parallel()
+        if getattr(pattern, 'separation_checker', None) is not None:
+            separation = pattern.separation_checker.stats()
+            print(f"  间距检查: {separation['frames_with_violations']}/{separation['frames_checked']} 帧有告警, "
+                  f"共 {separation['total_violations']} 对, 中位耗时 {separation['median_time'] * 1000:.3f}ms")
+
+    pool_stats = get_shared_surface_pool().stats()
+    print(f"表面池: 分配 {pool_stats['allocations']} 次, 复用 {pool_stats['reuses']} 次 "
+          f"(避免分配 {pool_stats['reuse_rate']:.1%}), 帧末回收 {pool_stats['reclaimed']} 个")
+
+    if args.memory:
+        print("=" * 50)
+        print_surface_memory_report()
+
+    if profiler is not None:
+        print("=" * 50)
+        profiler.print_summary()
+        profiler.export_chrome_trace(args.profile)
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
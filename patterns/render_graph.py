@@ -0,0 +1,147 @@
+# patterns/render_graph.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 渲染图：把一帧拆成图层节点（基础图形、特效、调试信息），每个节点每帧最多渲染一次，
+# 输出由所有用到它的视图共用。调试分屏时左侧窗格和右侧特效图层用的是同一份基础图层，
+# 不再为两个窗格各画一遍；以后增加多视图布局（如基础/特效/最终并排）只需要增加视图。
+# 渲染图只弱引用所属图案，调用节点时把图案作为第一个参数传入，图案和渲染图之间没有引用环
+
+import weakref
+from contextlib import nullcontext
+
+
+class RenderNode:
+    """图层节点
+
+    render:  图层为 render(图案, 输出表面, *输入表面)；叠加层为 render(图案, 目标表面, 位置)，
+             可以直接用图案类上的方法，如 PatternNeon._draw_beam_previews
+    surface: surface(图案) 返回图层的输出表面（延迟表面释放后会重新分配，所以每帧取一次）；
+             为None时是叠加层，呈现时直接画在目标表面上，不缓存
+    inputs:  输入图层的节点名
+    stage:   调试信息里的计时阶段名
+    """
+
+    def __init__(self, name, render, surface=None, inputs=(), stage=None):
+        self.name = name
+        self.render = render
+        self.surface = surface
+        self.inputs = tuple(inputs)
+        self.stage = stage
+
+    @property
+    def is_overlay(self):
+        return self.surface is None
+
+
+class RenderGraph:
+    """每帧按需渲染的图层节点"""
+
+    def __init__(self, owner, hud=None):
+        self._owner = weakref.ref(owner)  # 所属图案（弱引用）
+        self.nodes = {}
+        self.hud = hud  # 有DebugHud时记录各节点的耗时
+        self.outputs = {}  # 本帧已渲染的图层输出
+
+        # 统计信息
+        self.frames = 0
+        self.renders = {}  # 节点名 -> 渲染次数
+        self.reuses = 0  # 同一帧内直接复用图层输出的次数
+
+    def add_node(self, name, render, surface=None, inputs=(), stage=None):
+        """添加（或替换）一个节点"""
+        self.nodes[name] = RenderNode(name, render, surface, inputs, stage)
+        self.renders.setdefault(name, 0)
+        return self.nodes[name]
+
+    def _stage(self, name):
+        return self.hud.stage(name) if self.hud is not None and name else nullcontext()
+
+    def begin_frame(self):
+        """开始新的一帧，之前的输出全部作废"""
+        self.outputs.clear()
+        self.frames += 1
+
+    def output(self, name):
+        """图层本帧的输出表面：第一次取用时渲染（先渲染它的输入），之后直接复用"""
+        if name in self.outputs:
+            self.reuses += 1
+            return self.outputs[name]
+
+        node = self.nodes[name]
+        inputs = [self.output(input_name) for input_name in node.inputs]
+        owner = self._owner()
+        target = node.surface(owner)
+        with self._stage(node.stage):
+            node.render(owner, target, *inputs)
+        self.renders[name] += 1
+        self.outputs[name] = target
+        return target
+
+    def present(self, surface, views, stage="合成"):
+        """呈现一帧：views 为 [(节点名, 位置), ...]
+
+        先渲染所有用到的图层，再按顺序贴到目标表面，叠加层在所有图层之后按顺序绘制
+        """
+        self.begin_frame()
+        layers = [(self.output(name), position) for name, position in views
+                  if not self.nodes[name].is_overlay]
+        with self._stage(stage):
+            surface.blits(layers, doreturn=False)
+
+        owner = self._owner()
+        for name, position in views:
+            node = self.nodes[name]
+            if node.is_overlay:
+                node.render(owner, surface, position)
+
+    def stats(self):
+        """返回统计信息"""
+        return {
+            'frames': self.frames,
+            'renders': dict(self.renders),
+            'reuses': self.reuses,
+        }
+
+
+def pattern_graph(pattern):
+    """图案的标准渲染图
+
+    base:    buffer_surface 上的基础图形
+    effects: final_surface 上的基础图层 + 特效
+    hud:     调试信息（叠加层）
+    """
+    graph = RenderGraph(pattern, pattern.hud)
+    graph.add_node('base', _draw_base, surface=buffer_surface, stage="基础绘制")
+    graph.add_node('effects', _draw_effects, surface=final_surface, inputs=('base',), stage="特效")
+    graph.add_node('hud', _draw_hud)
+    return graph
+
+
+def buffer_surface(pattern):
+    return pattern.buffer_surface
+
+
+def final_surface(pattern):
+    return pattern.final_surface
+
+
+def _draw_base(pattern, target):
+    target.fill((0, 0, 0, 0))
+    pattern.draw_basic_elements(target)
+
+
+def _draw_effects(pattern, target, base):
+    target.fill((0, 0, 0, 0))
+    target.blit(base, (0, 0))
+    pattern.apply_effects(target)
+
+
+def _draw_hud(pattern, target, position):
+    pattern._draw_debug_info(target)
+
+
+def split_screen_views(pattern, overlays=()):
+    """调试分屏：左侧基础图层、右侧特效图层，overlays 为额外的叠加层，最后是调试信息"""
+    return ([('base', (0, 0)), ('effects', (pattern.width // 2, 0))] +
+            [(name, (0, 0)) for name in overlays] + [('hud', (0, 0))])
\ No newline at end of file
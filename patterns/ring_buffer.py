@@ -0,0 +1,90 @@
+# patterns/ring_buffer.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 定长环形缓冲：按列保存短生命周期对象（如扩散的圆圈），每个字段一个 NumPy 数组。
+# 新对象写在最新位置，失效对象只清掉存活标记，最旧一端连续失效的槽位随即回收；
+# 整个更新过程没有列表拷贝和 list.remove，逐帧可以对全部槽位做向量化运算
+
+import numpy as np
+
+
+class RingBuffer:
+    """定长、按列存储的环形缓冲
+
+    fields: 字段名 -> dtype 或 (dtype, 每项形状)，如 color=(np.uint8, (3,))
+    缓冲已满时再写入会覆盖最旧的对象（计入 overwritten）
+    """
+
+    def __init__(self, capacity, **fields):
+        self.capacity = capacity
+        self.fields = {name: spec if isinstance(spec, tuple) else (spec, ()) for name, spec in fields.items()}
+        self.columns = {name: np.zeros((capacity,) + shape, dtype=dtype)
+                        for name, (dtype, shape) in self.fields.items()}
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.start = 0  # 最旧槽位
+        self.span = 0  # 从最旧到最新占用的槽位数（含中间已失效的）
+
+        # 统计信息
+        self.pushed = 0
+        self.overwritten = 0  # 缓冲已满时被覆盖的存活对象数
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))
+
+    def push(self, **values):
+        """写入一个新对象，返回槽位号"""
+        if self.span == self.capacity:
+            # 已满：丢弃最旧的一个
+            if self.alive[self.start]:
+                self.overwritten += 1
+            self.alive[self.start] = False
+            self.start = (self.start + 1) % self.capacity
+            self.span -= 1
+
+        slot = (self.start + self.span) % self.capacity
+        for name, column in self.columns.items():
+            column[slot] = values.get(name, 0)
+        self.alive[slot] = True
+        self.span += 1
+        self.pushed += 1
+        return slot
+
+    def discard(self, mask):
+        """按槽位布尔掩码移除对象，并回收最旧一端连续失效的槽位"""
+        self.alive &= ~mask
+        if not self.span:
+            return
+        order = self.slots(alive_only=False)
+        first_alive = np.flatnonzero(self.alive.take(order))
+        skip = int(first_alive[0]) if len(first_alive) else self.span
+        self.start = (self.start + skip) % self.capacity
+        self.span -= skip
+
+    def slots(self, alive_only=True):
+        """从旧到新的槽位号数组"""
+        order = (self.start + np.arange(self.span)) % self.capacity
+        return order[self.alive.take(order)] if alive_only else order
+
+    def reserve(self, capacity):
+        """扩大容量（保持对象顺序）"""
+        if capacity <= self.capacity:
+            return
+        order = self.slots(alive_only=False)
+        for name, (dtype, shape) in self.fields.items():
+            column = np.zeros((capacity,) + shape, dtype=dtype)
+            column[:self.span] = self.columns[name].take(order, axis=0)
+            self.columns[name] = column
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.span] = self.alive.take(order)
+        self.alive = alive
+        self.capacity = capacity
+        self.start = 0
+
+    def clear(self):
+        self.alive.fill(False)
+        self.start = 0
+        self.span = 0
\ No newline at end of file
@@ -0,0 +1,112 @@
+# patterns/rotation_cache.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 旋转缓存：把精灵按N个量化角度预先旋转（或用回调直接绘制），
+# 取最接近的一帧，可选在相邻两帧之间混合；按内存预算做LRU淘汰
+
+import math
+
+import numpy as np
+import pygame
+
+from sprite_cache import SpriteCache
+
+
+class RotationCache:
+    """量化角度的旋转精灵缓存
+
+    surface: 要旋转的原始精灵（逆时针为正，与 pygame.transform.rotate 一致）
+    render:  可选回调 render(angle) -> Surface，直接按角度绘制矢量图形，避免重采样；
+             所有角度返回的表面尺寸必须相同
+    steps:   一个周期内的量化角度数
+    period:  旋转对称周期（度），例如八角星为45
+    blend:   为True时在相邻两个量化角度之间混合，混合权重量化为blend_levels级并缓存
+    """
+
+    def __init__(self, surface=None, render=None, steps=72, period=360.0, blend=False,
+                 blend_levels=4, memory_budget=16 * 1024 * 1024):
+        if surface is None and render is None:
+            raise ValueError("RotationCache 需要 surface 或 render 之一")
+
+        self.surface = surface
+        self.render = render
+        self.steps = steps
+        self.period = period
+        self.step_angle = period / steps
+        self.blend = blend
+        self.blend_levels = blend_levels
+        self.cache = SpriteCache(memory_budget=memory_budget)
+
+    def _render_step(self, index):
+        # 每帧保持旋转后的自然尺寸（中心对齐使用），不额外填充，节省内存和混合带宽
+        angle = index * self.step_angle
+        if self.render is not None:
+            return self.render(angle)
+        return pygame.transform.rotate(self.surface, angle)
+
+    def _get_step(self, index):
+        index %= self.steps
+        return self.cache.get(('step', index), lambda: self._render_step(index))
+
+    @staticmethod
+    def _pad(sprite, size):
+        if sprite.get_size() == size:
+            return sprite
+        padded = pygame.Surface(size, pygame.SRCALPHA, 32)
+        padded.blit(sprite, sprite.get_rect(center=(size[0] // 2, size[1] // 2)))
+        return padded
+
+    def _blend_steps(self, index, level):
+        # 相邻两帧尺寸可能不同，先中心对齐到共同尺寸再逐像素混合
+        size = tuple(max(a, b) for a, b in zip(self._get_step(index).get_size(),
+                                                self._get_step(index + 1).get_size()))
+        first = self._pad(self._get_step(index), size)
+        second = self._pad(self._get_step(index + 1), size)
+        weight = level / self.blend_levels
+
+        rgb = (pygame.surfarray.pixels3d(first) * (1 - weight) +
+               pygame.surfarray.pixels3d(second) * weight)
+        alpha = (pygame.surfarray.pixels_alpha(first) * (1 - weight) +
+                 pygame.surfarray.pixels_alpha(second) * weight)
+
+        frame = pygame.Surface(size, pygame.SRCALPHA, 32)
+        pixels = pygame.surfarray.pixels3d(frame)
+        pixels[...] = rgb.astype(np.uint8)
+        del pixels
+        frame_alpha = pygame.surfarray.pixels_alpha(frame)
+        frame_alpha[...] = alpha.astype(np.uint8)
+        del frame_alpha
+        return frame
+
+    def get(self, angle):
+        """获取最接近angle（度）的旋转精灵"""
+        position = (angle % self.period) / self.step_angle
+
+        if not self.blend:
+            return self._get_step(int(round(position)))
+
+        index = int(math.floor(position))
+        level = int(round((position - index) * self.blend_levels))
+        if level == 0:
+            return self._get_step(index)
+        if level == self.blend_levels:
+            return self._get_step(index + 1)
+
+        index %= self.steps
+        return self.cache.get(('blend', index, level), lambda: self._blend_steps(index, level))
+
+    def blit(self, target, center, angle, special_flags=0):
+        """把旋转后的精灵以center为中心绘制到target，返回绘制区域"""
+        sprite = self.get(angle)
+        return target.blit(sprite, sprite.get_rect(center=(int(center[0]), int(center[1]))),
+                           special_flags=special_flags)
+
+    def prewarm(self):
+        """预先生成所有量化角度（避免运行中出现首帧卡顿）"""
+        for index in range(self.steps):
+            self._get_step(index)
+
+    def stats(self):
+        """返回缓存统计信息"""
+        return self.cache.stats()
\ No newline at end of file
@@ -0,0 +1,221 @@
+# patterns/separation_check.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 无人机最小间距检查：发光体在空中是真实的无人机，两两距离不能小于安全间距。
+# 用均匀网格（格子边长不小于安全间距）做空间哈希，每架无人机只和相邻格子里的比较，
+# 整体接近线性时间；每格只记一架（后写入的留下），同格多出的无人机逐层再查一遍。
+# 全部用 NumPy 整数 take/put 完成，1万架无人机每帧不到1毫秒，可以在预览时逐帧运行
+
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+MAX_GRID_CELLS = 1 << 20  # 网格格子数上限，分布范围太大时放大格子（结果不变，只是候选对变多）
+CELL_MARGIN = 1e-6  # 格子边长比安全间距略大，距离（float32）在安全间距附近舍入时也不会隔格漏检
+
+
+class SeparationChecker:
+    """逐帧检查发光体之间的最小间距"""
+
+    def __init__(self, min_distance, report_every=60, max_records=1000, log=print):
+        self.min_distance = float(min_distance)
+        self.report_every = report_every  # 连续告警时每隔多少帧打印一次
+        self.log = log
+        self._grid = np.empty(0, dtype=np.int32)
+
+        # 统计信息
+        self.frames_checked = 0
+        self.frames_with_violations = 0
+        self.total_violations = 0
+        self.check_times = deque(maxlen=120)
+        self.records = deque(maxlen=max_records)  # (帧号, 编号a, 编号b, 距离)
+        self.last_report_frame = None
+
+    def _grid_buffer(self, cells):
+        if len(self._grid) < cells:
+            self._grid = np.empty(max(cells, 2 * len(self._grid)), dtype=np.int32)
+        grid = self._grid[:cells]
+        grid.fill(-1)
+        return grid
+
+    def find_pairs(self, positions):
+        """找出距离小于安全间距的所有发光体对，返回 (i, j, 距离)，i/j 为 positions 的行号"""
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+        empty = np.zeros(0, dtype=np.int32)
+        if len(positions) < 2:
+            return empty, empty, np.zeros(0, dtype=np.float32)
+
+        xs = np.ascontiguousarray(positions[:, 0])
+        ys = np.ascontiguousarray(positions[:, 1])
+
+        # 格子坐标（四周各留一圈空格子，邻格偏移不会越界）；用 float64 计算，
+        # float32 下恰好一个安全间距的两架可能被舍入到隔一格，就比较不到了
+        cell_size = self.min_distance * (1 + CELL_MARGIN)
+        x_min, y_min = float(xs.min()), float(ys.min())
+        span_x, span_y = float(xs.max()) - x_min, float(ys.max()) - y_min
+        while (span_x / cell_size + 3) * (span_y / cell_size + 3) > MAX_GRID_CELLS:
+            cell_size *= 2
+        cx = ((xs.astype(np.float64) - x_min) / cell_size).astype(np.int32)
+        cy = ((ys.astype(np.float64) - y_min) / cell_size).astype(np.int32)
+        width = int(span_x / cell_size) + 3
+        keys = (cy + 1) * width + (cx + 1)
+        grid = self._grid_buffer((int(span_y / cell_size) + 3) * width)
+
+        forward = np.array([1, width - 1, width, width + 1], dtype=np.int32)  # 半邻域：每对格子只比较一次
+        around = np.array([0, 1, -1, width, -width, width + 1, width - 1, -width + 1, -width - 1], dtype=np.int32)
+
+        pairs_i, pairs_j = [], []
+        remaining = np.arange(len(positions), dtype=np.int32)
+        while len(remaining) > 1:
+            # 每格留下最后写入的一架，其余的下一轮再查
+            remaining_keys = keys.take(remaining)
+            np.put(grid, remaining_keys, remaining)
+            winner_mask = grid.take(remaining_keys) == remaining
+            winners, winner_keys = remaining[winner_mask], remaining_keys[winner_mask]
+            losers, loser_keys = remaining[~winner_mask], remaining_keys[~winner_mask]
+
+            # 留下的之间：向前的4个邻格
+            for offset in forward:
+                neighbors = grid.take(winner_keys + offset)
+                hits = np.flatnonzero(neighbors >= 0)
+                pairs_i.append(winners.take(hits))
+                pairs_j.append(neighbors.take(hits))
+
+            # 多出的和留下的之间：周围9格（含本格）
+            for offset in (around if len(losers) else ()):
+                neighbors = grid.take(loser_keys + offset)
+                hits = np.flatnonzero(neighbors >= 0)
+                pairs_i.append(losers.take(hits))
+                pairs_j.append(neighbors.take(hits))
+
+            np.put(grid, winner_keys, -1)
+            remaining = losers
+
+        i = np.concatenate(pairs_i)
+        j = np.concatenate(pairs_j)
+        dx = xs.take(i) - xs.take(j)
+        dy = ys.take(i) - ys.take(j)
+        distance_sq = dx * dx + dy * dy
+        close = np.flatnonzero(distance_sq < self.min_distance * self.min_distance)
+        return i.take(close), j.take(close), np.sqrt(distance_sq.take(close))
+
+    def check(self, positions, frame, labels=None):
+        """检查一帧，返回违规对数；labels(行号数组) -> 编号列表，用于告警里显示发光体编号"""
+        start = time.perf_counter()
+        i, j, distance = self.find_pairs(positions)
+        self.check_times.append(time.perf_counter() - start)
+        self.frames_checked += 1
+
+        count = len(i)
+        if not count:
+            return 0
+
+        self.frames_with_violations += 1
+        self.total_violations += count
+        names_i = labels(i) if labels is not None else i.tolist()
+        names_j = labels(j) if labels is not None else j.tolist()
+        for name_i, name_j, d in zip(names_i, names_j, distance.tolist()):
+            self.records.append((frame, name_i, name_j, d))
+
+        if (self.log is not None and
+                (self.last_report_frame is None or frame - self.last_report_frame >= self.report_every)):
+            self.last_report_frame = frame
+            closest = int(np.argmin(distance))
+            self.log(f"间距告警: 帧 {frame}, {count} 对小于 {self.min_distance:g}, "
+                     f"最近 {names_i[closest]} - {names_j[closest]} 距离 {distance[closest]:.2f}")
+        return count
+
+    def stats(self):
+        """返回统计信息"""
+        times = sorted(self.check_times)
+        return {
+            'frames_checked': self.frames_checked,
+            'frames_with_violations': self.frames_with_violations,
+            'total_violations': self.total_violations,
+            'median_time': times[len(times) // 2] if times else 0.0,
+            'max_time': times[-1] if times else 0.0,
+        }
+
+
+def brute_force_pairs(positions, min_distance):
+    """O(n²) 的参考实现，用于校验"""
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+    diff = positions[:, None, :] - positions[None, :, :]
+    distance_sq = (diff * diff).sum(axis=2)
+    i, j = np.nonzero(np.triu(distance_sq < min_distance * min_distance, k=1))
+    return i, j
+
+
+def _random_formation(count, width, height, min_distance, rng, violations=10):
+    """在画面上撒点：先放一个满足间距的网格，再抖动并制造若干违规对"""
+    side = int(np.ceil(np.sqrt(count * width / height)))
+    spacing = max(min(width / side, height / int(np.ceil(count / side))), min_distance * 1.5)
+    grid = np.stack(np.meshgrid(np.arange(side), np.arange(int(np.ceil(count / side)))), axis=2).reshape(-1, 2)
+    positions = grid[:count] * spacing + rng.uniform(0, (spacing - min_distance) / 2, (count, 2))
+    close = rng.choice(count, violations * 2, replace=False)
+    positions[close[1::2]] = positions[close[::2]] + min_distance * 0.3
+    return positions.astype(np.float32)
+
+
+def _lattice_formation(side, spacing, rng):
+    """间距恰好约等于安全间距的网格（相邻两架的距离在 float32 舍入的边界上）"""
+    grid = np.stack(np.meshgrid(np.arange(side), np.arange(side)), axis=2).reshape(-1, 2)
+    jitter = 1 + rng.uniform(-1e-6, 1e-6, grid.shape)
+    return (grid * spacing * jitter + rng.uniform(0, 500, 2)).astype(np.float32)
+
+
+def _same_pairs(checker, positions):
+    i, j, _ = checker.find_pairs(positions)
+    reference = set(zip(*[a.tolist() for a in brute_force_pairs(positions, checker.min_distance)]))
+    return {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())} == reference
+
+
+def main():
+    parser = argparse.ArgumentParser(description="最小间距检查的耗时和正确性测试")
+    parser.add_argument("--counts", type=int, nargs="*", default=[1000, 10000, 50000])
+    parser.add_argument("--min-distance", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    # 边界情况：两架相距恰好约一个安全间距
+    edge_cases = [(SeparationChecker(13.7, log=None), np.array([[68.5, 191.8], [82.2, 191.8]], dtype=np.float32))]
+    for _ in range(200):
+        spacing = float(rng.uniform(1, 20))
+        edge_cases.append((SeparationChecker(spacing, log=None), _lattice_formation(30, spacing, rng)))
+    mismatched = sum(not _same_pairs(checker, positions) for checker, positions in edge_cases)
+    print(f"边界网格 {len(edge_cases)} 组: " +
+          ("与暴力算法一致" if not mismatched else f"{mismatched} 组与暴力算法不一致!"))
+
+    for count in args.counts:
+        positions = _random_formation(count, 1200, 750, args.min_distance, rng)
+        checker = SeparationChecker(args.min_distance, log=None)
+        i, j, _ = checker.find_pairs(positions)
+
+        verified = ""
+        if count <= 5000:
+            reference = set(zip(*brute_force_pairs(positions, args.min_distance)))
+            found = {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())}
+            verified = ", 与暴力算法一致" if found == reference else ", 与暴力算法不一致!"
+
+        for frame in range(args.repeat):
+            checker.check(positions, frame)
+        stats = checker.stats()
+        print(f"{count} 架: {len(i)} 对违规, 中位耗时 {stats['median_time'] * 1000:.3f}ms, "
+              f"最长 {stats['max_time'] * 1000:.3f}ms{verified}")
+
+        # 同一位置堆叠多架（同格多层）的情况
+        stacked = positions[:min(count, 2000)].copy()
+        stacked[:len(stacked) // 10] = stacked[0]
+        start = time.perf_counter()
+        i, j, _ = checker.find_pairs(stacked)
+        print(f"  {len(stacked)} 架中堆叠 {len(stacked) // 10} 架: {len(i)} 对违规, "
+              f"耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,320 @@
+# patterns/show_sequencer.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 节目编排器：按时间线依次播放多个图案，时长取自各图案的 get_duration()。
+# 下一个图案在切换点之前由后台线程构造并初始化（复合图案的 initialize 要导入并构造子图案、
+# 分配表面），渲染线程在切换时直接接手；相邻图案交叉淡入淡出，
+# 淡变期间每帧只多绘制一个图案并多做一次全屏混合。
+# 编排器本身实现了图案接口，可以交给 SimulationLoop 或离屏渲染引擎驱动
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加当前目录到Python路径，确保可以导入其他图案
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from lazy_surfaces import release_surfaces
+from render_engine import SimulatedClock, init_headless_display, load_pattern_class
+from surface_pool import get_shared_surface_pool
+
+
+def pattern_class_duration(pattern_class):
+    """图案类的建议时长：get_duration() 只返回常量，不需要完整构造图案"""
+    return pattern_class.get_duration(object.__new__(pattern_class))
+
+
+class PatternClock:
+    """单个图案的时钟：从图案的切换点开始计时，预加载期间停在0"""
+
+    def __init__(self, time_source, cue_time):
+        self.time_source = time_source
+        self.cue_time = cue_time
+
+    def time(self):
+        return max(0.0, self.time_source() - self.cue_time)
+
+
+class ShowEntry:
+    """时间线上的一个图案"""
+
+    def __init__(self, name, pattern_class, duration):
+        self.name = name
+        self.pattern_class = pattern_class
+        self.duration = duration
+        self.cue_time = None  # 在节目时间中的起点
+        self.pattern = None
+        self.load_time = 0.0  # 构造和初始化耗时
+
+    @property
+    def end_time(self):
+        return self.cue_time + self.duration
+
+
+class ShowSequencer:
+    """按时间线播放图案，后台预加载下一个图案并交叉淡变
+
+    timeline:     图案模块名或 (模块名, 时长) 的列表
+    crossfade:    交叉淡变时长（秒），不超过相邻图案较短者的一半
+    preload_lead: 提前多少秒开始后台构造下一个图案；为0时在切换点同步构造（用于对比）
+    """
+
+    def __init__(self, timeline, width, height, debug_mode=False, crossfade=1.0, preload_lead=3.0,
+                 pattern_kwargs=None):
+        self.timeline = timeline
+        self.width = width
+        self.height = height
+        self.debug_mode = debug_mode
+        self.crossfade = crossfade
+        self.preload_lead = preload_lead
+        self.pattern_kwargs = pattern_kwargs or {}
+        self.time_source = time.time  # 时间源，离屏渲染时可注入模拟时钟
+        self.start_time = None
+        self.running = True
+        self.surface_pool = get_shared_surface_pool()
+
+        self.entries = []
+        self.current = None  # 正在播放的条目
+        self.incoming = None  # 淡入中的条目
+        self.pending = None  # (条目, Future) 后台加载中的下一个条目
+        self.executor = None
+
+        # 统计信息
+        self.transitions = []
+
+    def initialize(self):
+        """导入所有图案模块、确定时间线，同步加载第一个图案"""
+        self.entries = []
+        for item in self.timeline:
+            name, duration = (item, None) if isinstance(item, str) else item
+            pattern_class = load_pattern_class(name)
+            if duration is None:
+                duration = pattern_class_duration(pattern_class)
+            self.entries.append(ShowEntry(name, pattern_class, duration))
+
+        # 切换点：前一个图案结束前 crossfade 秒
+        cue_time = 0.0
+        for previous, entry in zip([None] + self.entries, self.entries):
+            if previous is not None:
+                cue_time = previous.end_time - self._fade_time(previous, entry)
+            entry.cue_time = cue_time
+
+        if self.preload_lead > 0:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="show-preload")
+
+        self.start_time = self.time_source()
+        self.current = self._load(self.entries[0])
+        print(f"节目编排: {len(self.entries)} 个图案, 共 {self.get_duration():.1f} 秒")
+
+    def _fade_time(self, outgoing, incoming):
+        return min(self.crossfade, outgoing.duration / 2, incoming.duration / 2)
+
+    def _elapsed(self):
+        return self.time_source() - self.start_time
+
+    def _load(self, entry):
+        """构造并初始化条目的图案（可在后台线程执行）"""
+        start = time.perf_counter()
+        pattern = entry.pattern_class(self.width, self.height, self.debug_mode, **self.pattern_kwargs)
+        # 必须在initialize之前注入，图案以切换点为时间零点
+        pattern.time_source = PatternClock(self._elapsed, entry.cue_time).time
+        pattern.initialize()
+        # 提前分配绘制表面，切换后的第一帧不再分配
+        pattern.final_surface
+        if self.debug_mode:
+            pattern.buffer_surface
+        entry.pattern = pattern
+        entry.load_time = time.perf_counter() - start
+        return entry
+
+    def _next_entry(self, entry):
+        index = self.entries.index(entry) + 1
+        return self.entries[index] if index < len(self.entries) else None
+
+    @property
+    def sub_patterns(self):
+        """当前在播的图案（淡变期间为两个），画质调节和渲染插值会遍历它们"""
+        active = [entry.pattern for entry in (self.current, self.incoming) if entry is not None]
+        return active
+
+    def update(self, dt):
+        """推进节目：按需预加载、切换和结束淡变，并更新在播的图案"""
+        now = self._elapsed()
+        next_entry = self._next_entry(self.current) if self.incoming is None else None
+
+        # 到预加载时间：提交后台加载
+        if (next_entry is not None and self.executor is not None and self.pending is None
+                and now >= next_entry.cue_time - self.preload_lead):
+            self.pending = (next_entry, self.executor.submit(self._load, next_entry))
+
+        # 到切换点：接手预加载好的图案，还没加载完时等待（计入统计）
+        if next_entry is not None and now >= next_entry.cue_time:
+            self._start_transition(next_entry, now)
+
+        for pattern in self.sub_patterns:
+            pattern.update(dt)
+
+        # 淡变结束：退出上一个图案并释放它的表面
+        if self.incoming is not None and now >= self.current.end_time:
+            self._retire(self.current)
+            self.current = self.incoming
+            self.incoming = None
+
+        return self.should_continue()
+
+    def _start_transition(self, entry, now):
+        wait_start = time.perf_counter()
+        if self.pending is not None:
+            _, future = self.pending
+            self.pending = None
+            future.result()
+            preloaded = True
+        else:
+            self._load(entry)
+            preloaded = False
+        wait_time = time.perf_counter() - wait_start
+
+        self.incoming = entry
+        self.transitions.append({
+            'from': self.current.name,
+            'to': entry.name,
+            'time': now,
+            'fade_end': self.current.end_time,
+            'preloaded': preloaded,
+            'load_time': entry.load_time,
+            'wait_time': wait_time,
+        })
+        print(f"节目切换: {self.current.name} -> {entry.name} "
+              f"({'后台预加载' if preloaded else '同步加载'} {entry.load_time * 1000:.0f}ms, "
+              f"渲染线程等待 {wait_time * 1000:.0f}ms)")
+
+    def _retire(self, entry):
+        entry.pattern.stop()
+        release_surfaces(entry.pattern)
+        entry.pattern = None
+
+    def fade_progress(self):
+        """淡入进度 0~1，不在淡变中时为None"""
+        if self.incoming is None:
+            return None
+        fade_time = self.current.end_time - self.incoming.cue_time
+        return min(max((self._elapsed() - self.incoming.cue_time) / fade_time, 0.0), 1.0)
+
+    def _draw_pattern(self, pattern, surface):
+        if self.debug_mode:
+            pattern.draw_debug(surface)
+        else:
+            pattern.draw_final(surface)
+
+    def _draw(self, surface):
+        self._draw_pattern(self.current.pattern, surface)
+
+        progress = self.fade_progress()
+        if progress is None:
+            return
+
+        # 淡入的图案画在不透明的黑底上，再按进度整体混合：结果为 旧*(1-p) + 新*p
+        layer = self.surface_pool.acquire(surface.get_size(), flags=0)
+        self._draw_pattern(self.incoming.pattern, layer)
+        layer.set_alpha(int(255 * progress))
+        surface.blit(layer, (0, 0))
+        layer.set_alpha(None)
+        self.surface_pool.release(layer)
+
+    def draw_debug(self, surface):
+        """调试模式下的绘制"""
+        if not self.debug_mode:
+            return
+        self._draw(surface)
+
+    def draw_final(self, surface):
+        """被调用模式下的最终绘制"""
+        self._draw(surface)
+
+    def get_duration(self):
+        """整场节目时长"""
+        return self.entries[-1].end_time if self.entries else 0.0
+
+    def should_continue(self):
+        return self.running and self._elapsed() < self.get_duration()
+
+    def stop(self):
+        """停止节目并释放所有图案"""
+        self.running = False
+        for entry in (self.current, self.incoming):
+            if entry is not None and entry.pattern is not None:
+                self._retire(entry)
+        if self.pending is not None:
+            entry, future = self.pending
+            self.pending = None
+            if future.result() is not None:
+                self._retire(entry)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+def measure_show(timeline, width, height, fps, preload_lead, crossfade):
+    """用模拟时钟逐帧渲染整场节目，返回每帧耗时和切换记录"""
+    pygame = init_headless_display()
+    clock = SimulatedClock(fps)
+    sequencer = ShowSequencer(timeline, width, height, crossfade=crossfade, preload_lead=preload_lead)
+    sequencer.time_source = clock.time
+    sequencer.initialize()
+
+    target = pygame.Surface((width, height))
+    frame_times = []
+    while True:
+        start = time.perf_counter()
+        keep_running = sequencer.update(clock.tick())
+        target.fill((0, 0, 0))
+        sequencer.draw_final(target)
+        get_shared_surface_pool().end_frame()
+        frame_times.append(time.perf_counter() - start)
+        if not keep_running:
+            break
+
+    sequencer.stop()
+    return frame_times, sequencer.transitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按时间线播放图案，对比后台预加载和同步加载的切换卡顿")
+    parser.add_argument("patterns", nargs="*", default=["pattern_simple", "pattern_neon", "pattern_composite"],
+                        help="图案模块名，可写成 名称:时长")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=750)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--crossfade", type=float, default=1.0, help="交叉淡变时长（秒）")
+    parser.add_argument("--lead", type=float, default=3.0, help="提前预加载的时间（秒）")
+    args = parser.parse_args()
+
+    timeline = []
+    for item in args.patterns:
+        name, _, duration = item.partition(":")
+        timeline.append((name, float(duration)) if duration else name)
+
+    for label, lead in (("同步加载", 0.0), ("后台预加载", args.lead)):
+        print("=" * 50)
+        frame_times, transitions = measure_show(timeline, args.width, args.height, args.fps, lead, args.crossfade)
+        ordered = sorted(frame_times)
+        median = ordered[len(ordered) // 2]
+        print(f"{label}: {len(frame_times)} 帧, 中位帧时间 {median * 1000:.1f}ms")
+        for transition in transitions:
+            # 切换点所在帧及之后半秒内的最长帧，以及淡变期间和淡变前的中位帧时间
+            first = int(round(transition['time'] * args.fps))
+            last = int(round(transition['fade_end'] * args.fps))
+            window = frame_times[max(first - 1, 0):first + args.fps // 2]
+            fading = sorted(frame_times[first:last])
+            before = sorted(frame_times[max(first - (last - first), 0):first])
+            print(f"  {transition['from']} -> {transition['to']}: 切换附近最长帧 {max(window) * 1000:.1f}ms, "
+                  f"淡变中位帧 {fading[len(fading) // 2] * 1000:.1f}ms (淡变前 {before[len(before) // 2] * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
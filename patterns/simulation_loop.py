@@ -0,0 +1,191 @@
+# patterns/simulation_loop.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 固定步长模拟循环：图案状态按固定步长（默认60Hz）推进，与显示帧率无关；
+# 渲染按显示实际能达到的速度进行，绘制时在上一步和当前步之间插值（render_alpha）。
+# 支持插值的图案：简单（位置）、圆圈（半径、透明度）、星星（旋转）、霓虹灯（旋转、颜色、脉冲）；
+# 星空图案的星星每步只移动几像素，不插值，直接画当前步
+# 渲染跟不上时跳过的是渲染帧而不是模拟步，节目不会变慢，也不会和音乐错位；
+# 只有单帧卡顿超过 max_frame_time 时才舍弃多出的时间，并计入统计
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+# 添加当前目录到Python路径，确保可以导入其他图案
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from quality_governor import QualityGovernor
+from render_engine import SimulatedClock, discover_pattern_names, init_headless_display, load_pattern_class
+from surface_pool import get_shared_surface_pool
+
+
+def set_render_alpha(pattern, alpha):
+    """设置图案（含复合图案的子图案）的渲染插值系数，不支持插值的图案忽略"""
+    if hasattr(pattern, 'render_alpha'):
+        pattern.render_alpha = alpha
+    for sub_pattern in getattr(pattern, 'sub_patterns', ()):
+        set_render_alpha(sub_pattern, alpha)
+
+
+class SimulationLoop:
+    """固定步长模拟 + 插值渲染的主循环
+
+    必须在 pattern.initialize() 之前创建：这里把模拟时钟注入为图案的时间源，
+    使用墙上时间的图案（霓虹灯、星空、复合图案）也改为按模拟步推进
+    """
+
+    def __init__(self, pattern, step_rate=60, max_frame_time=0.25, wall_time=time.perf_counter, governor=None):
+        self.pattern = pattern
+        self.governor = governor  # 可选的画质调节器（QualityGovernor），按渲染耗时调节画质
+        self.clock = SimulatedClock(step_rate)
+        self.step = self.clock.step
+        self.max_frame_time = max_frame_time  # 单帧最多追赶的模拟时间，防止越追越慢
+        self.wall_time = wall_time
+        self.accumulator = 0.0
+        self.last_time = None
+        self.running = True
+
+        # 统计信息
+        self.frames = 0  # 实际渲染的帧数
+        self.steps = 0  # 模拟步数
+        self.dropped_frames = 0  # 渲染跟不上而跳过的帧数（一帧内多出的模拟步）
+        self.lost_time = 0.0  # 超过 max_frame_time 被舍弃的模拟时间
+        self.steps_per_frame = deque(maxlen=120)
+        self.start_time = None
+
+        pattern.time_source = self.clock.time
+
+    def advance(self):
+        """按经过的墙上时间推进模拟，返回本帧执行的步数"""
+        now = self.wall_time()
+        if self.last_time is None:
+            self.start_time = now
+            self.last_time = now
+            return 0
+
+        frame_time = now - self.last_time
+        self.last_time = now
+        if frame_time > self.max_frame_time:
+            self.lost_time += frame_time - self.max_frame_time
+            frame_time = self.max_frame_time
+        self.accumulator += frame_time
+
+        steps = 0
+        while self.accumulator >= self.step and self.running:
+            dt = self.clock.tick()
+            keep_running = self.pattern.update(dt)
+            self.running = keep_running is not False and self.pattern.should_continue()
+            self.accumulator -= self.step
+            steps += 1
+
+        self.steps += steps
+        self.dropped_frames += max(steps - 1, 0)
+        self.steps_per_frame.append(steps)
+        return steps
+
+    def render(self, surface):
+        """按当前插值系数渲染一帧"""
+        set_render_alpha(self.pattern, min(self.accumulator / self.step, 1.0))
+        render_start = self.wall_time()
+
+        surface.fill((0, 0, 0))
+        if self.pattern.debug_mode:
+            self.pattern.draw_debug(surface)
+        else:
+            self.pattern.draw_final(surface)
+
+        # 帧结束：回收本帧未归还的临时表面
+        get_shared_surface_pool().end_frame()
+        self.frames += 1
+        if self.governor is not None:
+            self.governor.record(self.wall_time() - render_start)
+
+    def run_frame(self, surface):
+        """推进模拟并渲染一帧，返回是否继续"""
+        self.advance()
+        if self.running:
+            self.render(surface)
+        return self.running
+
+    def run(self, surface, present=None, max_fps=None, max_frames=None, frame_load=None):
+        """运行到图案结束
+
+        present:    每帧渲染后调用（如 pygame.display.flip）
+        max_fps:    渲染帧率上限，缺省不限（由 present 的垂直同步限速）
+        frame_load: 每帧额外调用的函数，用于模拟渲染负载
+        """
+        min_frame_time = 1.0 / max_fps if max_fps else 0.0
+        while self.run_frame(surface):
+            if frame_load is not None:
+                frame_load()
+            if present is not None:
+                present()
+            if max_frames is not None and self.frames >= max_frames:
+                break
+            if min_frame_time:
+                remaining = self.last_time + min_frame_time - self.wall_time()
+                if remaining > 0:
+                    time.sleep(remaining)
+        return self.stats()
+
+    def stats(self):
+        """返回统计信息"""
+        wall = self.wall_time() - self.start_time if self.start_time is not None else 0.0
+        target_frames = self.frames + self.dropped_frames
+        return {
+            'frames': self.frames,
+            'steps': self.steps,
+            'dropped_frames': self.dropped_frames,
+            'drop_rate': self.dropped_frames / target_frames if target_frames else 0.0,
+            'lost_time': self.lost_time,
+            'simulated_time': self.clock.time(),
+            'wall_time': wall,
+            'render_fps': self.frames / wall if wall > 0 else 0.0,
+            'max_steps_per_frame': max(self.steps_per_frame, default=0),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按固定步长实时运行图案，统计掉帧")
+    parser.add_argument("patterns", nargs="*", help="图案模块名，如 pattern_simple；缺省为全部图案")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=750)
+    parser.add_argument("--step-rate", type=int, default=60, help="模拟步频（Hz）")
+    parser.add_argument("--max-fps", type=int, default=60, help="渲染帧率上限")
+    parser.add_argument("--load-ms", type=float, default=0.0, help="每帧额外的模拟渲染负载（毫秒）")
+    parser.add_argument("--debug", action="store_true", help="使用调试模式绘制")
+    parser.add_argument("--governor", action="store_true", help="按帧时间预算自动调节画质")
+    parser.add_argument("--target-ms", type=float, default=None, help="画质调节的渲染耗时目标，缺省为一个模拟步")
+    args = parser.parse_args()
+
+    pygame = init_headless_display()
+    surface = pygame.Surface((args.width, args.height))
+    frame_load = (lambda: time.sleep(args.load_ms / 1000)) if args.load_ms else None
+
+    for pattern_name in args.patterns or discover_pattern_names():
+        pattern = load_pattern_class(pattern_name)(args.width, args.height, args.debug)
+        loop = SimulationLoop(pattern, args.step_rate)
+        pattern.initialize()
+        if args.governor:
+            # 复合图案在initialize中创建子图案，之后才能收集全部画质参数
+            target = args.target_ms / 1000 if args.target_ms else loop.step
+            loop.governor = QualityGovernor.for_pattern(pattern, target_frame_time=target)
+        stats = loop.run(surface, max_fps=args.max_fps, frame_load=frame_load)
+        print(f"{pattern_name}: 模拟 {stats['simulated_time']:.2f} 秒 / 实际 {stats['wall_time']:.2f} 秒, "
+              f"渲染 {stats['frames']} 帧 ({stats['render_fps']:.1f} fps), "
+              f"掉帧 {stats['dropped_frames']} ({stats['drop_rate']:.1%}), "
+              f"舍弃 {stats['lost_time']:.2f} 秒")
+        if loop.governor is not None:
+            governor_stats = loop.governor.stats()
+            print(f"  画质调节: {governor_stats['changes']} 次, 超预算帧 {governor_stats['over_budget_rate']:.1%}, "
+                  f"最终 {governor_stats['levels']}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
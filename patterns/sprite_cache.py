@@ -0,0 +1,161 @@
+# patterns/sprite_cache.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 精灵缓存：按内存预算做LRU淘汰；光晕精灵按 (半径, 颜色, 透明度) 量化分桶，
+# 让每帧的光晕绘制变成一次缓存精灵的blit，所有图案共享同一个缓存
+
+import threading
+from collections import OrderedDict
+
+import pygame
+
+
+def surface_bytes(surface):
+    """估算表面占用的像素内存（字节）"""
+    return surface.get_pitch() * surface.get_height()
+
+
+class SpriteCache:
+    """按内存预算做LRU淘汰的精灵缓存"""
+
+    def __init__(self, memory_budget=16 * 1024 * 1024):
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self._sprites = OrderedDict()
+        self._lock = threading.Lock()  # 复合图案的线程池模式下多个子图案会同时访问
+
+        # 命中统计，用于为节目调整缓存大小
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def get(self, key, factory):
+        """按键获取精灵，未命中时调用factory()生成并缓存"""
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+                self.hits += 1
+                return sprite
+            self.misses += 1
+
+        # 在锁外生成，避免一个线程生成精灵时阻塞其他线程的命中
+        sprite = factory()
+        with self._lock:
+            existing = self._sprites.get(key)
+            if existing is not None:
+                # 另一个线程已经生成了同一个精灵
+                return existing
+            self._sprites[key] = sprite
+            self.memory_used += surface_bytes(sprite)
+            self._evict()
+        return sprite
+
+    def _evict(self):
+        """淘汰最久未使用的精灵，直到回到预算以内（至少保留最新的一个）"""
+        while self.memory_used > self.memory_budget and len(self._sprites) > 1:
+            _, sprite = self._sprites.popitem(last=False)
+            self.memory_used -= surface_bytes(sprite)
+            self.evictions += 1
+
+    def clear(self):
+        """清空缓存（不重置统计）"""
+        with self._lock:
+            self._sprites.clear()
+            self.memory_used = 0
+
+    def reset_stats(self):
+        """重置命中统计"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """返回缓存统计信息"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._sprites),
+            'memory_used': self.memory_used,
+            'memory_budget': self.memory_budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class GlowSpriteCache(SpriteCache):
+    """光晕精灵缓存 - 半径、颜色、透明度量化到少量分桶"""
+
+    def __init__(self, memory_budget=16 * 1024 * 1024, radius_step=1, color_levels=16, alpha_levels=16):
+        super().__init__(memory_budget)
+        self.radius_step = radius_step
+        self.color_step = 255 / (color_levels - 1)
+        self.alpha_step = 255 / (alpha_levels - 1)
+
+    def quantize(self, radius, color, alpha, rings=1):
+        """把光晕参数量化为缓存键"""
+        radius = max(1, int(round(radius / self.radius_step)) * self.radius_step)
+        color = tuple(int(round(round(c / self.color_step) * self.color_step)) for c in color[:3])
+        alpha = int(round(round(max(0, min(255, alpha)) / self.alpha_step) * self.alpha_step))
+        return radius, color, alpha, rings
+
+    def get_glow(self, radius, color, alpha, rings=1, quantize=True):
+        """获取光晕精灵，精灵尺寸为 2r x 2r，圆心位于 (r, r)
+
+        quantize 为False时参数按原值作键（只取整），用于参数不变的光晕，结果与直接绘制一致
+        """
+        if quantize:
+            key = self.quantize(radius, color, alpha, rings)
+        else:
+            key = (max(1, int(radius)), tuple(int(c) for c in color[:3]), int(max(0, min(255, alpha))), rings)
+        return self.get(key, lambda: self._create_glow(*key))
+
+    def blit_glow(self, target, center, radius, color, alpha, rings=1, special_flags=0, quantize=True,
+                  overwrite=False):
+        """把光晕精灵以center为中心绘制到目标表面，返回受影响的矩形
+
+        overwrite 为True时与在目标上直接 pygame.draw.circle 一样覆盖圆内的像素（不做混合）：
+        先乘以圆内为0的遮罩清空圆内像素，再加上精灵；此时忽略 special_flags
+        """
+        sprite = self.get_glow(radius, color, alpha, rings, quantize)
+        half = sprite.get_width() // 2
+        position = (int(center[0]) - half, int(center[1]) - half)
+        if overwrite:
+            mask = self.get(('mask', half), lambda: self._create_mask(half))
+            target.blit(mask, position, special_flags=pygame.BLEND_RGBA_MULT)
+            return target.blit(sprite, position, special_flags=pygame.BLEND_RGBA_ADD)
+        return target.blit(sprite, position, special_flags=special_flags)
+
+    @staticmethod
+    def _create_glow(radius, color, alpha, rings):
+        """生成光晕精灵：由外向内绘制同心圆，越靠近中心越不透明"""
+        sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        for ring in range(rings):
+            ring_radius = max(1, radius * (rings - ring) // rings)
+            ring_alpha = alpha * (ring + 1) // rings
+            pygame.draw.circle(sprite, (*color, ring_alpha), (radius, radius), ring_radius)
+        return sprite
+
+    @staticmethod
+    def _create_mask(radius):
+        """覆盖绘制用的遮罩：光晕圆（最外层同心圆）内为0，其余为255"""
+        mask = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        mask.fill((255, 255, 255, 255))
+        pygame.draw.circle(mask, (0, 0, 0, 0), (radius, radius), radius)
+        return mask
+
+
+_shared_glow_cache = None
+
+
+def get_shared_glow_cache():
+    """获取所有图案共享的光晕精灵缓存"""
+    global _shared_glow_cache
+    if _shared_glow_cache is None:
+        _shared_glow_cache = GlowSpriteCache()
+    return _shared_glow_cache
\ No newline at end of file
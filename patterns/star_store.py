@@ -0,0 +1,118 @@
+# patterns/star_store.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 星星列式存储：每个属性一个NumPy数组（struct-of-arrays），
+# 运动、闪烁、移除与补充全部向量化，星星数量从几十颗扩展到上万颗
+
+import numpy as np
+
+
+class StarStore:
+    """星星列式存储"""
+
+    # 浮点属性列
+    FLOAT_COLUMNS = ('x', 'y', 'speed_x', 'speed_y', 'size', 'base_brightness',
+                     'flicker_speed', 'flicker_phase', 'glow_intensity')
+
+    def __init__(self, capacity=32, max_shape_points=8, id_offset=0):
+        self.capacity = 0
+        self.max_shape_points = max_shape_points
+        self.id_offset = id_offset  # 编号起点，同一图案的多个存储用不同起点区分
+        self.spawned = 0  # 累计创建数，新星星的编号为 id_offset + 创建序号
+
+        for name in self.FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(0, dtype=np.float64))
+        self.color_index = np.zeros(0, dtype=np.int16)
+        self.shape_points = np.zeros((0, max_shape_points, 2), dtype=np.float64)
+        self.shape_count = np.zeros(0, dtype=np.int8)
+        self.serial = np.zeros(0, dtype=np.uint32)  # 稳定编号：槽位会被复用，编号不会
+        self.alive = np.zeros(0, dtype=bool)
+        self.count = 0
+
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, new_capacity):
+        """扩容所有列（容量翻倍，避免频繁重新分配）"""
+        extra = new_capacity - self.capacity
+        if extra <= 0:
+            return
+
+        for name in self.FLOAT_COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.zeros(extra, dtype=column.dtype)]))
+        self.color_index = np.concatenate([self.color_index, np.zeros(extra, dtype=np.int16)])
+        self.shape_points = np.concatenate(
+            [self.shape_points, np.zeros((extra, self.max_shape_points, 2), dtype=np.float64)])
+        self.shape_count = np.concatenate([self.shape_count, np.zeros(extra, dtype=np.int8)])
+        self.serial = np.concatenate([self.serial, np.zeros(extra, dtype=np.uint32)])
+        self.alive = np.concatenate([self.alive, np.zeros(extra, dtype=bool)])
+        self.capacity = new_capacity
+
+    def clear(self):
+        """清空所有星星（保留已分配的容量）"""
+        self.alive[:] = False
+        self.count = 0
+
+    def spawn(self, **columns):
+        """在空闲槽位中批量创建星星，返回新星星的槽位索引
+
+        每个关键字参数是一列等长数组，如 x=..., y=..., color_index=...
+        """
+        n = len(next(iter(columns.values())))
+        if n == 0:
+            return np.zeros(0, dtype=np.intp)
+
+        if self.count + n > self.capacity:
+            self._grow(max(self.capacity * 2, self.count + n))
+
+        slots = np.flatnonzero(~self.alive)[:n]
+        for name, values in columns.items():
+            getattr(self, name)[slots] = values
+        self.serial[slots] = self.id_offset + self.spawned + np.arange(n)
+        self.spawned += n
+        self.alive[slots] = True
+        self.count += n
+        return slots
+
+    def kill(self, mask):
+        """移除mask为True的星星"""
+        mask = mask & self.alive
+        removed = int(np.count_nonzero(mask))
+        self.alive[mask] = False
+        self.count -= removed
+        return removed
+
+    def alive_indices(self):
+        """返回所有存活星星的槽位索引"""
+        return np.flatnonzero(self.alive)
+
+    def move(self, scale):
+        """按速度移动所有星星"""
+        self.x += self.speed_x * scale
+        self.y += self.speed_y * scale
+
+    def outside_mask(self, left, top, right, bottom):
+        """返回位于矩形范围之外的存活星星掩码"""
+        return self.alive & ((self.x < left) | (self.x > right) |
+                             (self.y < top) | (self.y > bottom))
+
+    def brightness(self, current_time, indices):
+        """计算闪烁后的亮度"""
+        flicker = 0.7 + 0.3 * np.sin(current_time * self.flicker_speed[indices] + self.flicker_phase[indices])
+        return self.base_brightness[indices] * flicker
+
+    def colors(self, palette, brightness, indices):
+        """按亮度缩放调色板颜色，返回 (n, 3) 的整数颜色数组"""
+        base = palette[self.color_index[indices]]
+        return (base * brightness[:, None]).astype(np.int32)
+
+    def polygons(self, indices):
+        """返回星星形状在屏幕上的整数坐标 (n, max_shape_points, 2)"""
+        points = self.shape_points[indices].copy()
+        points[:, :, 0] += self.x[indices, None]
+        points[:, :, 1] += self.y[indices, None]
+        return points.astype(np.int32)
\ No newline at end of file
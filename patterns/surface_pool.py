@@ -0,0 +1,104 @@
+# patterns/surface_pool.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 表面池：按 (尺寸, 标志, 像素格式) 复用帧内临时表面，
+# 避免每帧分配全屏SRCALPHA表面带来的分配器抖动和缺页
+
+import threading
+
+import pygame
+
+from sprite_cache import surface_bytes
+
+
+class SurfacePool:
+    """帧间复用的临时表面池"""
+
+    def __init__(self, max_free_per_key=4):
+        self.max_free_per_key = max_free_per_key
+        self._free = {}  # key -> 空闲表面列表
+        self._in_use = {}  # id(surface) -> (key, surface)
+        self._lock = threading.Lock()  # 复合图案的线程池模式下子图案会在工作线程中取用
+
+        # 统计信息
+        self.allocations = 0  # 实际分配的表面数
+        self.reuses = 0  # 复用的次数（即避免的分配次数）
+        self.reclaimed = 0  # 帧结束时被自动回收的表面数
+
+    @staticmethod
+    def _key(size, flags, depth):
+        return (int(size[0]), int(size[1])), flags, depth
+
+    def acquire(self, size, flags=pygame.SRCALPHA, depth=32, clear=True):
+        """取出一个临时表面，clear为True时保证全透明"""
+        key = self._key(size, flags, depth)
+        with self._lock:
+            free_list = self._free.get(key)
+            surface = free_list.pop() if free_list else None
+            if surface is not None:
+                self.reuses += 1
+            else:
+                self.allocations += 1
+
+        if surface is None:
+            # 新分配的表面本身就是全零
+            surface = pygame.Surface(key[0], flags, depth)
+        elif clear:
+            surface.fill((0, 0, 0, 0))
+
+        with self._lock:
+            self._in_use[id(surface)] = (key, surface)
+        return surface
+
+    def release(self, surface):
+        """归还临时表面"""
+        with self._lock:
+            entry = self._in_use.pop(id(surface), None)
+            if entry is None:
+                return
+
+            key, surface = entry
+            free_list = self._free.setdefault(key, [])
+            if len(free_list) < self.max_free_per_key:
+                free_list.append(surface)
+
+    def end_frame(self):
+        """帧结束：回收本帧所有未归还的表面"""
+        with self._lock:
+            in_use = list(self._in_use.values())
+        for _, surface in in_use:
+            self.release(surface)
+            self.reclaimed += 1
+
+    def clear(self):
+        """释放所有空闲表面"""
+        with self._lock:
+            self._free.clear()
+
+    def stats(self):
+        """返回表面池统计信息"""
+        requests = self.allocations + self.reuses
+        with self._lock:
+            surfaces = [surface for _, surface in self._in_use.values()]
+            surfaces += [surface for free_list in self._free.values() for surface in free_list]
+        return {
+            'allocations': self.allocations,
+            'reuses': self.reuses,
+            'reclaimed': self.reclaimed,
+            'in_use': len(self._in_use),
+            'free': sum(len(free_list) for free_list in self._free.values()),
+            'reuse_rate': self.reuses / requests if requests else 0.0,
+            'memory_bytes': sum(surface_bytes(surface) for surface in surfaces),
+        }
+
+
+_shared_surface_pool = None
+
+
+def get_shared_surface_pool():
+    """获取所有图案共享的表面池"""
+    global _shared_surface_pool
+    if _shared_surface_pool is None:
+        _shared_surface_pool = SurfacePool()
+    return _shared_surface_pool
\ No newline at end of file
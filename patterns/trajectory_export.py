@@ -0,0 +1,225 @@
+# patterns/trajectory_export.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 无人机轨迹导出：逐帧记录每个发光体（无人机）的位置、颜色和亮度，
+# 以定长NumPy结构化记录写入二进制文件，文件包含头部和时间索引，
+# 读取端用 np.memmap 零拷贝随机访问，上万架无人机、十分钟的节目也不必整体载入内存
+#
+# 文件布局：
+#   [头部 4096 字节: 魔数 + JSON]  [记录区: RECORD_DTYPE * record_count]  [时间索引: INDEX_DTYPE * frame_count]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加当前目录到Python路径，确保可以导入其他图案
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+MAGIC = b'DLSTRAJ1'
+HEADER_SIZE = 4096
+FORMAT_VERSION = 1
+
+# 每架无人机每帧一条记录（小端、紧凑排列，20字节）；id 是图案给出的稳定编号，
+# 同一架无人机在各帧中相同，可按 id 把逐帧记录连成轨迹
+RECORD_DTYPE = np.dtype([
+    ('id', '<u4'),
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('r', 'u1'),
+    ('g', 'u1'),
+    ('b', 'u1'),
+    ('reserved', 'u1'),
+    ('brightness', '<f4'),
+])
+
+# 每帧一条索引：时间、该帧第一条记录的序号、记录数
+INDEX_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('offset', '<u8'),
+    ('count', '<u4'),
+])
+
+
+class TrajectoryWriter:
+    """流式写入轨迹文件，关闭时补写时间索引和头部"""
+
+    def __init__(self, path, width, height, fps, pattern_name='', metadata=None):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.pattern_name = pattern_name
+        self.metadata = metadata or {}
+
+        self.file = open(path, 'wb')
+        self.file.write(b'\0' * HEADER_SIZE)  # 头部占位
+        self.index = []
+        self.record_count = 0
+
+    def write_frame(self, frame_time, positions, colors, brightness, ids=None):
+        """写入一帧的所有发光体；没有 ids 时用本帧的行号（只适合数量和顺序不变的图案）"""
+        count = len(positions)
+        records = np.zeros(count, dtype=RECORD_DTYPE)
+        records['id'] = np.arange(count) if ids is None else ids
+        records['x'] = positions[:, 0]
+        records['y'] = positions[:, 1]
+        records['r'] = colors[:, 0]
+        records['g'] = colors[:, 1]
+        records['b'] = colors[:, 2]
+        records['brightness'] = brightness
+
+        self.file.write(records.tobytes())
+        self.index.append((frame_time, self.record_count, count))
+        self.record_count += count
+
+    def close(self):
+        """写入时间索引并回填头部"""
+        if self.file is None:
+            return
+
+        index_offset = HEADER_SIZE + self.record_count * RECORD_DTYPE.itemsize
+        self.file.write(np.array(self.index, dtype=INDEX_DTYPE).tobytes())
+
+        header = {
+            'version': FORMAT_VERSION,
+            'pattern': self.pattern_name,
+            'width': self.width,
+            'height': self.height,
+            'fps': self.fps,
+            'frame_count': len(self.index),
+            'record_count': self.record_count,
+            'records_offset': HEADER_SIZE,
+            'index_offset': index_offset,
+            'record_dtype': RECORD_DTYPE.descr,
+            'index_dtype': INDEX_DTYPE.descr,
+            'metadata': self.metadata,
+        }
+        header_bytes = MAGIC + json.dumps(header, ensure_ascii=False).encode('utf-8')
+        if len(header_bytes) > HEADER_SIZE:
+            raise ValueError("轨迹文件头部超过4096字节，请减少metadata")
+
+        self.file.seek(0)
+        self.file.write(header_bytes.ljust(HEADER_SIZE, b' '))
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class TrajectoryReader:
+    """用 np.memmap 打开轨迹文件，按帧或按时间零拷贝访问"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER_SIZE)
+        if not raw.startswith(MAGIC):
+            raise ValueError(f"不是轨迹文件: {path}")
+        self.header = json.loads(raw[len(MAGIC):].decode('utf-8').rstrip())
+
+        record_dtype = np.dtype([tuple(field) for field in self.header['record_dtype']])
+        index_dtype = np.dtype([tuple(field) for field in self.header['index_dtype']])
+
+        self.records = np.memmap(path, dtype=record_dtype, mode='r',
+                                 offset=self.header['records_offset'],
+                                 shape=(self.header['record_count'],))
+        self.index = np.memmap(path, dtype=index_dtype, mode='r',
+                               offset=self.header['index_offset'],
+                               shape=(self.header['frame_count'],))
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def times(self):
+        return self.index['time']
+
+    def frame(self, frame_index):
+        """第frame_index帧的所有记录（memmap视图，不复制）"""
+        entry = self.index[frame_index]
+        start = int(entry['offset'])
+        return self.records[start:start + int(entry['count'])]
+
+    def frame_at_time(self, seconds):
+        """不晚于seconds的最后一帧"""
+        frame_index = int(np.searchsorted(self.index['time'], seconds, side='right')) - 1
+        return self.frame(max(frame_index, 0))
+
+
+def export_pattern(pattern_name, path, width=1200, height=750, fps=60, seed=0, max_frames=None):
+    """只推进模拟（不绘制），逐帧导出图案的发光体状态，返回统计信息"""
+    from render_engine import HeadlessRenderEngine, init_headless_display, load_pattern_class
+
+    init_headless_display()
+    engine = HeadlessRenderEngine(load_pattern_class(pattern_name), width, height, fps,
+                                  pattern_kwargs={'seed': seed})
+    pattern = engine.create_pattern()
+    if not hasattr(pattern, 'get_emitters'):
+        raise ValueError(f"{pattern_name} 不支持发光体导出")
+
+    total_frames = int(np.ceil(pattern.get_duration() * fps))
+    if max_frames is not None:
+        total_frames = min(total_frames, max_frames)
+
+    start = time.perf_counter()
+    with TrajectoryWriter(path, width, height, fps, pattern_name, {'seed': seed}) as writer:
+        for frame_index in range(total_frames):
+            keep_running = engine.advance()
+            positions, colors, brightness, ids = pattern.get_emitters()
+            writer.write_frame(engine.clock.time(), positions, colors, brightness, ids)
+            if not keep_running:
+                break
+        frames, records = len(writer.index), writer.record_count
+
+    return {
+        'pattern': pattern_name,
+        'frames': frames,
+        'records': records,
+        'bytes': os.path.getsize(path),
+        'wall_time': time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出图案的逐帧无人机轨迹（memmap二进制格式）")
+    parser.add_argument("pattern", help="图案模块名，如 pattern_stars；与 --read 一起使用时为轨迹文件")
+    parser.add_argument("output", nargs="?", help="输出文件")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=750)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=None, help="最多导出帧数，缺省为图案建议时长")
+    parser.add_argument("--read", action="store_true", help="读取并概要显示一个轨迹文件")
+    args = parser.parse_args()
+
+    if args.read:
+        reader = TrajectoryReader(args.pattern)
+        header = reader.header
+        counts = reader.index['count']
+        print(f"{header['pattern']}: {len(reader)} 帧, {header['record_count']} 条记录, "
+              f"{header['width']}x{header['height']} @ {header['fps']}fps")
+        if len(reader):
+            print(f"每帧无人机数: 最少 {counts.min()}, 最多 {counts.max()}, "
+                  f"时长 {reader.times[-1]:.2f} 秒")
+            print(f"最后一帧前3条: {reader.frame(len(reader) - 1)[:3]}")
+        return
+
+    output = args.output or f"{args.pattern}.traj"
+    stats = export_pattern(args.pattern, output, args.width, args.height, args.fps, args.seed, args.frames)
+    print(f"{stats['pattern']}: {stats['frames']} 帧, {stats['records']} 条记录, "
+          f"{stats['bytes'] / 1024 / 1024:.1f}MB, 耗时 {stats['wall_time']:.2f} 秒 -> {output}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+# patterns/transform_stage.py
+# A Mimic Program Manager for Drone-Light-Show Items , beta v0.9
+# work with drone-light-show-main.py and other code pieces in the bundle
+#
+# 顶点变换阶段：图案的顶点以模型坐标保存一次，每帧设置一次整体变换（旋转、缩放、平移可组合），
+# 第一次取用时用一次批量仿射乘法算出全部顶点，绘制和特效两遍共用同一份结果。
+# 支持多个实例（如多星编队）：每个实例有自己的变换，和整体变换合成后一起计算
+
+import math
+
+import numpy as np
+
+
+class Affine2D:
+    """二维仿射变换（2x3矩阵）：a @ b 表示先做 b 再做 a"""
+
+    __slots__ = ('matrix',)
+
+    def __init__(self, matrix=None):
+        self.matrix = np.eye(2, 3) if matrix is None else np.asarray(matrix, dtype=np.float64).reshape(2, 3)
+
+    @classmethod
+    def rotation(cls, angle):
+        """绕原点旋转angle弧度（与屏幕坐标下 x' = x·cos - y·sin 的写法一致）"""
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        return cls([[cos_a, -sin_a, 0.0], [sin_a, cos_a, 0.0]])
+
+    @classmethod
+    def scale(cls, sx, sy=None):
+        return cls([[sx, 0.0, 0.0], [0.0, sx if sy is None else sy, 0.0]])
+
+    @classmethod
+    def translation(cls, tx, ty):
+        return cls([[1.0, 0.0, tx], [0.0, 1.0, ty]])
+
+    def __matmul__(self, other):
+        # [A_l | A_t] ∘ [B_l | B_t] = [A_l·B_l | A_l·B_t + A_t]
+        matrix = self.matrix[:, :2] @ other.matrix
+        matrix[:, 2] += self.matrix[:, 2]
+        return Affine2D(matrix)
+
+    def apply(self, points):
+        """变换 (N,2) 顶点"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return points @ self.matrix[:, :2].T + self.matrix[:, 2]
+
+
+class TransformStage:
+    """每帧一次的批量顶点变换
+
+    model_points: 模型顶点 (N,2)
+    instances:    每个实例的 Affine2D 列表（缺省为单个恒等实例），结果为 (实例数, N, 2)
+    """
+
+    def __init__(self, model_points, instances=None):
+        self.model = np.asarray(model_points, dtype=np.float64).reshape(-1, 2)
+        self.transform = Affine2D()
+        self.set_instances(instances)
+
+        # 统计信息
+        self.computations = 0  # 实际做批量变换的次数
+
+    def set_instances(self, instances=None):
+        """设置实例变换列表"""
+        instances = instances or [Affine2D()]
+        self.instance_matrices = np.stack([instance.matrix for instance in instances])
+        self._invalidate()
+
+    def set_transform(self, transform):
+        """设置本帧的整体变换，结果在下一次取用时重新计算"""
+        self.transform = transform
+        self._invalidate()
+
+    def _invalidate(self):
+        self._points = None
+        self._vertices = None
+        self._polygons = None
+
+    def points(self):
+        """全部变换后的顶点 (实例数, N, 2)"""
+        if self._points is None:
+            world = self.transform.matrix
+            # 整体变换和各实例变换合成 (S,2,3)，再一次乘法算出所有实例的所有顶点
+            combined = world[:, :2] @ self.instance_matrices
+            combined[:, :, 2] += world[:, 2]
+            self._points = self.model @ combined[:, :, :2].transpose(0, 2, 1) + combined[:, None, :, 2]
+            self.computations += 1
+        return self._points
+
+    def flat_points(self):
+        """全部顶点展平为 (实例数×N, 2)"""
+        return self.points().reshape(-1, 2)
+
+    def vertices(self):
+        """全部顶点的 [x, y] 列表，供逐点绘制（转成Python列表的开销比变换本身大，只转一次）"""
+        if self._vertices is None:
+            self._vertices = self.flat_points().tolist()
+        return self._vertices
+
+    def polygons(self):
+        """每个实例一组顶点列表，供 pygame.draw.lines/polygon 使用（与 vertices 共用同一份列表）"""
+        if self._polygons is None:
+            vertices = self.vertices()
+            count = len(self.model)
+            self._polygons = [vertices[start:start + count] for start in range(0, len(vertices), count)]
+        return self._polygons
\ No newline at end of file